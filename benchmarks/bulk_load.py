@@ -0,0 +1,76 @@
+"""
+Compares the executemany, multi-row and LOAD DATA LOCAL INFILE insert strategies.
+
+Needs a running MySQL server with local_infile enabled (see docker-compose.yml).
+Usage: python -m benchmarks.bulk_load [student_count] [room_count]
+"""
+import sys
+import time
+import random
+import tempfile
+from src.app.database.database_connector import MySQLConnector
+from src.app.database.schema_manager import SchemaManager
+from src.app.database.database_operations import RoomRepository, StudentRepository
+from src.app.constants.application_config import ApplicationConfig
+
+DEFAULT_STUDENT_COUNT = 200_000
+DEFAULT_ROOM_COUNT = 1_000
+
+
+def _synthetic_rooms(count: int) -> list[dict]:
+    """Build room items shaped like rooms.json."""
+    return [{"id": room_id, "name": f"Room #{room_id}"} for room_id in range(count)]
+
+
+def _synthetic_students(count: int, room_count: int) -> list[dict]:
+    """Build student items shaped like students.json."""
+    rng = random.Random(0)
+    return [
+        {
+            "id": student_id,
+            "name": f"Student {student_id}",
+            "birthday": f"{rng.randint(1920, 2015)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T00:00:00.000000",
+            "sex": rng.choice("MF"),
+            "room": rng.randrange(room_count),
+        }
+        for student_id in range(count)
+    ]
+
+
+def _time_strategy(strategy: str, rooms: list[dict], students: list[dict]) -> float:
+    """Recreate the schema and time inserting every room and student with one strategy."""
+    connector = MySQLConnector(local_infile_dir=tempfile.gettempdir())
+    connector.connect()
+    try:
+        schema_manager = SchemaManager(connector)
+        schema_manager.drop_rooms_students_schema()
+        schema_manager.create_room_student_schema()
+
+        started = time.perf_counter()
+        RoomRepository(connector, strategy).insert_batch(iter(rooms))
+        StudentRepository(connector, strategy).insert_batch(iter(students))
+        return time.perf_counter() - started
+    finally:
+        connector.disconnect()
+
+
+def main(argv: list[str]) -> None:
+    student_count = int(argv[0]) if argv else DEFAULT_STUDENT_COUNT
+    room_count = int(argv[1]) if len(argv) > 1 else DEFAULT_ROOM_COUNT
+
+    rooms = _synthetic_rooms(room_count)
+    students = _synthetic_students(student_count, room_count)
+    rows = room_count + student_count
+
+    strategies = (
+        ApplicationConfig.EXECUTEMANY_STRATEGY,
+        ApplicationConfig.MULTI_ROW_STRATEGY,
+        ApplicationConfig.BULK_LOAD_STRATEGY,
+    )
+    for strategy in strategies:
+        elapsed = _time_strategy(strategy, rooms, students)
+        print(f"{strategy}: {rows} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,126 @@
+"""
+Generates rooms.json and students.json at any scale, deterministically.
+
+The same seed and parameters always produce byte-identical files. Rows are
+written as they are generated, so 50M students need no more memory than 10k.
+Usage: python -m benchmarks.data_generator OUT_DIR [--students N] [--rooms N]
+       [--invalid-ratio R] [--room-skew S] [--seed N]
+"""
+import os
+import sys
+import json
+import random
+import argparse
+from datetime import date, timedelta
+from src.app.constants.application_config import ApplicationConfig
+
+ROOMS_FILE = "rooms.json"
+STUDENTS_FILE = "students.json"
+
+_FIRST_NAMES = ("Peggy", "Christian", "Ava", "Noah", "Mia", "Liam", "Zoë", "Omar", "Yuki", "Ines")
+_LAST_NAMES = ("Ryan", "Bush", "Garcia", "Smith", "Kowalski", "Nguyen", "Okafor", "Müller", "Rossi", "Tanaka")
+_FIRST_BIRTHDAY = date(1920, 1, 1)
+_BIRTHDAY_SPAN_DAYS = (date(2015, 12, 31) - _FIRST_BIRTHDAY).days
+# the ways a generated student can break validation, picked uniformly
+_INVALID_KINDS = ("negative_id", "empty_name", "bad_birthday", "bad_sex", "missing_field")
+_WRITE_CHUNK_ROWS = 10_000
+
+
+def _write_array(path: str, rows) -> int:
+    """Write JSON objects as an array, one object per line, and return how many were written."""
+    count = 0
+    with open(path, ApplicationConfig.FILE_MODE_WRITE, encoding=ApplicationConfig.DEFAULT_ENCODING,
+              buffering=ApplicationConfig.WRITE_BUFFER_SIZE) as file:
+        file.write("[")
+        chunk = []
+        for row in rows:
+            chunk.append(("\n" if count == 0 else ",\n") + json.dumps(row, ensure_ascii=False))
+            count += 1
+            if len(chunk) >= _WRITE_CHUNK_ROWS:
+                file.write("".join(chunk))
+                chunk = []
+        file.write("".join(chunk) + "\n]\n")
+    return count
+
+
+def _rooms(count: int):
+    for room_id in range(count):
+        yield {"id": room_id, "name": f"Room #{room_id}"}
+
+
+def _students(count: int, room_count: int, invalid_ratio: float, room_skew: float, seed: int):
+    rng = random.Random(seed)
+    skew_exponent = 1.0 + room_skew
+    for student_id in range(count):
+        birthday = _FIRST_BIRTHDAY + timedelta(days=rng.randrange(_BIRTHDAY_SPAN_DAYS))
+        student = {
+            "birthday": f"{birthday.isoformat()}T00:00:00.000000",
+            "id": student_id,
+            "name": f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}",
+            # rng.random() ** (1 + skew) piles students into the low room ids as skew grows
+            "room": int(room_count * rng.random() ** skew_exponent),
+            "sex": "M" if rng.random() < 0.5 else "F",
+        }
+        if rng.random() < invalid_ratio:
+            _break(student, rng.choice(_INVALID_KINDS))
+        yield student
+
+
+def _break(student: dict, kind: str) -> None:
+    """Make a student fail exactly one validation rule."""
+    if kind == "negative_id":
+        student["id"] = -student["id"] - 1
+    elif kind == "empty_name":
+        student["name"] = " "
+    elif kind == "bad_birthday":
+        student["birthday"] = student["birthday"][:5] + "13" + student["birthday"][7:]
+    elif kind == "bad_sex":
+        student["sex"] = "X"
+    else:
+        del student["room"]
+
+
+def generate(out_dir: str, students: int, rooms: int = 1000, invalid_ratio: float = 0.0,
+             room_skew: float = 0.0, seed: int = 0) -> tuple[str, str]:
+    """
+    Write rooms.json and students.json shaped like the files in src/resources.
+
+    Args:
+        out_dir: Directory the files are written to
+        students: Number of students
+        rooms: Number of rooms; every student references one of them
+        invalid_ratio: Share of students that fail one validation rule
+        room_skew: 0 spreads students evenly over rooms, larger values crowd the low room ids
+        seed: Seed of the generator
+
+    Returns:
+        Paths of the rooms file and the students file
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    rooms_path = os.path.join(out_dir, ROOMS_FILE)
+    students_path = os.path.join(out_dir, STUDENTS_FILE)
+    _write_array(rooms_path, _rooms(rooms))
+    _write_array(students_path, _students(students, rooms, invalid_ratio, room_skew, seed))
+    return rooms_path, students_path
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the data shape options shared by the benchmarks."""
+    parser.add_argument("--students", type=int, default=10_000)
+    parser.add_argument("--rooms", type=int, default=1000)
+    parser.add_argument("--invalid-ratio", type=float, default=0.0)
+    parser.add_argument("--room-skew", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.data_generator")
+    parser.add_argument("out_dir")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    for path in generate(args.out_dir, args.students, args.rooms, args.invalid_ratio, args.room_skew, args.seed):
+        print(path)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
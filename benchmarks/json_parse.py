@@ -0,0 +1,52 @@
+"""
+Measures JSON parse throughput of FileLoader in MB/s.
+
+Streams the file through every installed ijson backend and parses it in one
+call, reporting the rate of each. The file is then converted to NDJSON and parsed,
+with validation, on every CPU. No database is needed.
+Usage: python -m benchmarks.json_parse [path]
+"""
+import os
+import sys
+import time
+import tempfile
+from src.app.services.file_loader import FileLoader
+from src.app.services.ndjson_loader import NdjsonLoader
+from src.app.constants.application_config import ApplicationConfig
+
+
+def _time_parse(path: str, whole_file_threshold: int, backend: str = None) -> tuple[int, float]:
+    """Parse every item of the file and return the item count and elapsed seconds."""
+    started = time.perf_counter()
+    items = sum(1 for _ in FileLoader.load_file_data(path, whole_file_threshold, backend))
+    return items, time.perf_counter() - started
+
+
+def main(argv: list[str]) -> None:
+    path = argv[0] if argv else ApplicationConfig.STUDENT_FILE_PATH
+    megabytes = os.path.getsize(path) / (1024 * 1024)
+    print(f"{path}: {megabytes:.1f} MB")
+
+    for backend in ApplicationConfig.JSON_BACKENDS:
+        try:
+            FileLoader.backend_name(backend)
+        except ImportError:
+            print(f"stream/{backend}: not installed")
+            continue
+        items, elapsed = _time_parse(path, whole_file_threshold=0, backend=backend)
+        print(f"stream/{backend}: {items} items in {elapsed:.2f}s ({megabytes / elapsed:.1f} MB/s)")
+
+    items, elapsed = _time_parse(path, whole_file_threshold=sys.maxsize)
+    print(f"whole-file/json: {items} items in {elapsed:.2f}s ({megabytes / elapsed:.1f} MB/s)")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        ndjson_path = os.path.join(temp_dir, "items.ndjson")
+        NdjsonLoader.convert(path, ndjson_path)
+        started = time.perf_counter()
+        valid = sum(1 for _ in NdjsonLoader.load_valid(ndjson_path, ApplicationConfig.STUDENT_STRATEGY))
+        elapsed = time.perf_counter() - started
+        print(f"ndjson/parallel: {valid} valid items in {elapsed:.2f}s ({megabytes / elapsed:.1f} MB/s)")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,46 @@
+"""
+Captures query plan baselines and checks the current plans against them.
+
+capture explains every tracked query and writes the plans, with their
+estimated row counts, to the baseline file; check explains them again and
+exits with status 1 when a plan regressed: a new full table scan, lost index
+use, a new filesort or temporary table, or estimated rows grown beyond the
+allowed factor. Plans depend on the data, so capture and check against data
+of the same shape. The backend is read from DB_BACKEND as in the application
+and the schema is created when missing.
+Usage: python -m benchmarks.query_plans capture|check BASELINE [--as-of YYYY-MM-DD]
+"""
+import sys
+import argparse
+from datetime import date
+from src.app.database.backends import create_connector
+from src.app.database.schema_manager import SchemaManager
+from src.app.database.query_plans import capture_plans, save_baseline, check_plans
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.query_plans")
+    parser.add_argument("command", choices=("capture", "check"))
+    parser.add_argument("baseline", help="baseline JSON file to write or check against")
+    parser.add_argument("--as-of", type=date.fromisoformat,
+                        help="date for queries computing ages when capturing; today by default")
+    args = parser.parse_args(argv)
+
+    connector = create_connector()
+    connector.connect()
+    try:
+        SchemaManager(connector).create_room_student_schema()
+        if args.command == "capture":
+            save_baseline(args.baseline, capture_plans(connector, args.as_of))
+            return 0
+
+        regressions = check_plans(connector, args.baseline)
+        for regression in regressions:
+            print(regression)
+        return 1 if regressions else 0
+    finally:
+        connector.disconnect()
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,96 @@
+"""
+Compares the dictionary ingest chain with the row fast path, without a database.
+
+Students are generated, then read by FileLoader and DataFilter into items
+unpacked with StudentRepository.get_item_value, as insert_batch does, and by
+RowLoader straight into row tuples, as insert_rows does. Rows are gathered
+into insert batches of DEFAULT_BATCH_SIZE and dropped. For each path the
+elapsed time, the peak memory traced by tracemalloc in a second run and the
+bytes a batch of rows holds per row are printed as JSON.
+Usage: python -m benchmarks.row_path [--students N] [--rooms N] [--invalid-ratio R]
+       [--room-skew S] [--seed N] [--data-dir DIR]
+"""
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+from datetime import date
+from typing import Callable, Iterable
+from src.app.services.file_loader import FileLoader
+from src.app.services.data_filter import DataFilter
+from src.app.services.row_loader import RowLoader
+from src.app.database.database_operations import StudentRepository
+from src.app.constants.application_config import ApplicationConfig
+from benchmarks.data_generator import generate, add_arguments
+
+
+def _row_bytes(row: tuple) -> int:
+    """Bytes of a row tuple and the values it alone holds; dates are shared through the cache."""
+    return sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row if not isinstance(value, date))
+
+
+def _batches(rows: Iterable[tuple]) -> tuple[int, int]:
+    """Gather rows into insert batches; returns the row count and the largest batch bytes per row."""
+    batch_size = ApplicationConfig.DEFAULT_BATCH_SIZE
+    batch_bytes = 0
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        count += 1
+        if len(batch) >= batch_size:
+            batch_bytes = max(batch_bytes, sum(map(_row_bytes, batch)) // len(batch))
+            batch = []
+    return count, batch_bytes
+
+
+def _measure(rows: Callable[[], Iterable[tuple]]) -> dict:
+    """Time the path, then run it again tracing its memory, as tracing slows it down."""
+    started = time.perf_counter()
+    count, batch_bytes = _batches(rows())
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    try:
+        _batches(rows())
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "rows": count,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(count / elapsed) if elapsed else None,
+        "peak_bytes": peak,
+        "batch_bytes_per_row": batch_bytes,
+    }
+
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.row_path")
+    add_arguments(parser)
+    parser.add_argument("--data-dir", help="Keep the generated files here instead of a temporary directory")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        _, students_path = generate(
+            args.data_dir or temp_dir, args.students, args.rooms, args.invalid_ratio, args.room_skew, args.seed
+        )
+        repository = StudentRepository.__new__(StudentRepository)
+        paths = {
+            "dict_chain": lambda: map(repository.get_item_value, DataFilter.filter_data(
+                FileLoader.load_file_data(students_path), ApplicationConfig.STUDENT_STRATEGY
+            )),
+            "dict_chain_streamed": lambda: map(repository.get_item_value, DataFilter.filter_data(
+                FileLoader.load_file_data(students_path, whole_file_threshold=0), ApplicationConfig.STUDENT_STRATEGY
+            )),
+            "row_fast_path": lambda: RowLoader.load_valid_rows(
+                students_path, ApplicationConfig.STUDENT_STRATEGY, StudentRepository.row_fields
+            ),
+        }
+        print(json.dumps({name: _measure(rows) for name, rows in paths.items()}, indent=2))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,204 @@
+"""
+Times every ingest and report stage separately and prints the results as JSON.
+
+Stages are FileLoader, DataFilter and execute_batch_insertion for rooms and
+students, then each ReportingService report. They run streamed as in the
+application, so a stage's time is measured exclusive of the stages feeding
+it. By default the data is generated for the run and inserted into the
+in-process stand-in backend; --backend mysql targets the configured server,
+and sqlite or duckdb run the same SQL path on an embedded database.
+Usage: python -m benchmarks.stages [--students N] [--rooms N] [--invalid-ratio R]
+       [--room-skew S] [--seed N] [--backend stand-in|mysql|sqlite|duckdb] [--strategy NAME]
+       [--data-dir DIR] [--output FILE] [--capture-plans FILE] [--check-plans FILE]
+
+On a database backend, --capture-plans writes the report query plans after
+the load as a baseline and --check-plans adds the regressions found against
+one to the results.
+"""
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+from collections import Counter
+from datetime import date
+from src.app.services.file_loader import FileLoader
+from src.app.services.data_filter import DataFilter
+from src.app.services.reporting_service import ReportingService
+from src.app.services.metrics import registry
+from src.app.database.database_operations import RoomRepository, StudentRepository
+from src.app.database.query_plans import capture_plans, save_baseline, check_plans
+from src.app.constants.application_config import ApplicationConfig
+from src.app.constants.database_config import DatabaseConfig
+from benchmarks.data_generator import generate, add_arguments
+from benchmarks.stand_in import StandInConnector
+
+STAND_IN_BACKEND = "stand-in"
+EMBEDDED_BACKENDS = (DatabaseConfig.SQLITE_BACKEND, DatabaseConfig.DUCKDB_BACKEND)
+DATABASE_BACKENDS = (DatabaseConfig.MYSQL_BACKEND,) + EMBEDDED_BACKENDS
+
+
+class _TimedStream:
+    """Iterator wrapper adding up the time spent producing each item."""
+
+    def __init__(self, items):
+        self.items = iter(items)
+        self.seconds = 0.0
+        self.count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            item = next(self.items)
+        finally:
+            self.seconds += time.perf_counter() - started
+        self.count += 1
+        return item
+
+
+def _stage(name: str, seconds: float, rows: int) -> dict:
+    return {
+        "stage": name,
+        "seconds": round(seconds, 6),
+        "rows": rows,
+        "rows_per_second": round(rows / seconds, 1) if seconds > 0 else None,
+    }
+
+
+def _ingest(path: str, data_type: str, repository, rejections: Counter) -> list[dict]:
+    """Load, filter and insert one file, timing each stage exclusive of its source."""
+    loaded = _TimedStream(FileLoader.load_file_data(path))
+    filtered = _TimedStream(DataFilter.filter_data(loaded, data_type, rejections))
+
+    started = time.perf_counter()
+    repository.execute_batch_insertion(filtered)
+    total = time.perf_counter() - started
+
+    return [
+        _stage(f"load.{data_type}", loaded.seconds, loaded.count),
+        _stage(f"filter.{data_type}", filtered.seconds - loaded.seconds, filtered.count),
+        _stage(f"insert.{data_type}", total - filtered.seconds, filtered.count),
+    ]
+
+
+def _reports(connector) -> list[dict]:
+    """Run each report on its own, streaming its rows."""
+    report = ReportingService(connector)
+    stages = []
+    for name in ApplicationConfig.REPORT_OUTPUTS:
+        started = time.perf_counter()
+        rows = sum(1 for _ in report.stream_report(name))
+        stages.append(_stage(f"report.{name}", time.perf_counter() - started, rows))
+    return stages
+
+
+def _connect(backend: str):
+    """Open the backend, with a fresh schema on a database backend."""
+    if backend == STAND_IN_BACKEND:
+        return StandInConnector(as_of=date.today())
+
+    from src.app.database.backends import create_connector
+    from src.app.database.schema_manager import SchemaManager
+
+    connector = create_connector(backend, local_infile_dir=tempfile.gettempdir())
+    connector.connect()
+    schema_manager = SchemaManager(connector)
+    schema_manager.drop_rooms_students_schema()
+    schema_manager.create_room_student_schema()
+    return connector
+
+
+def run(args: argparse.Namespace, data_dir: str) -> dict:
+    """Generate the data set, run every stage and return the results."""
+    started = time.perf_counter()
+    rooms_path, students_path = generate(
+        data_dir, args.students, args.rooms, args.invalid_ratio, args.room_skew, args.seed
+    )
+    generate_seconds = time.perf_counter() - started
+
+    registry.reset()
+    connector = _connect(args.backend)
+    plan_regressions = None
+    rejections = Counter()
+    try:
+        stages = _ingest(rooms_path, ApplicationConfig.ROOM_STRATEGY,
+                         RoomRepository(connector, args.strategy), rejections)
+        stages += _ingest(students_path, ApplicationConfig.STUDENT_STRATEGY,
+                          StudentRepository(connector, args.strategy), rejections)
+        stages += _reports(connector)
+        if args.capture_plans:
+            save_baseline(args.capture_plans, capture_plans(connector))
+        if args.check_plans:
+            plan_regressions = [regression._asdict() for regression in check_plans(connector, args.check_plans)]
+    finally:
+        connector.disconnect()
+
+    results = {
+        "parameters": {
+            "students": args.students,
+            "rooms": args.rooms,
+            "invalid_ratio": args.invalid_ratio,
+            "room_skew": args.room_skew,
+            "seed": args.seed,
+            "backend": args.backend,
+            "strategy": args.strategy,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "json_backend": FileLoader.backend_name(),
+        },
+        "generate_seconds": round(generate_seconds, 6),
+        "stages": stages,
+        "rejections": dict(+rejections),
+        "metrics": registry.to_dict(),
+    }
+    if plan_regressions is not None:
+        results["plan_regressions"] = plan_regressions
+    return results
+
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.stages")
+    add_arguments(parser)
+    parser.add_argument("--backend", choices=(STAND_IN_BACKEND,) + DATABASE_BACKENDS, default=STAND_IN_BACKEND)
+    parser.add_argument("--strategy", default=ApplicationConfig.MULTI_ROW_STRATEGY,
+                        choices=(ApplicationConfig.EXECUTEMANY_STRATEGY, ApplicationConfig.MULTI_ROW_STRATEGY,
+                                 ApplicationConfig.BULK_LOAD_STRATEGY))
+    parser.add_argument("--data-dir", help="keep the generated files here instead of a temporary directory")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    parser.add_argument("--capture-plans", help="write the query plans after the load to this baseline file")
+    parser.add_argument("--check-plans", help="report query plan regressions against this baseline file")
+    args = parser.parse_args(argv)
+
+    if args.backend == STAND_IN_BACKEND and args.strategy == ApplicationConfig.BULK_LOAD_STRATEGY:
+        parser.error("the stand-in backend does not support the bulk_load strategy")
+    if args.backend == STAND_IN_BACKEND and (args.capture_plans or args.check_plans):
+        parser.error("the stand-in backend has no query plans")
+    if args.backend in EMBEDDED_BACKENDS:
+        from src.app.database.backends import create_connector
+
+        strategies = create_connector(args.backend).insert_strategies
+        if args.strategy not in strategies:
+            parser.error(f"the {args.backend} backend supports the {', '.join(strategies)} strategies")
+
+    if args.data_dir:
+        results = run(args, args.data_dir)
+    else:
+        with tempfile.TemporaryDirectory() as data_dir:
+            results = run(args, data_dir)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, ApplicationConfig.FILE_MODE_WRITE, encoding=ApplicationConfig.DEFAULT_ENCODING) as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,127 @@
+"""
+An in-process stand-in for MySQLConnector, for benchmarks without a server.
+
+Insert statements are converted parameter by parameter with the driver's own
+MySQLConverter, which is the client-side work mysql-connector does before a
+statement goes on the wire, and their rows are upserted into dictionaries.
+Report queries are answered by the offline report engine (needs NumPy) over
+the stored rows. Only the executemany and multi_row strategies are supported.
+"""
+from datetime import date
+from mysql.connector.conversion import MySQLConverter
+from src.app.services.reporting_service import ReportingService
+from src.app.constants.sql_queries import SQLQueries
+from src.app.constants.application_config import ApplicationConfig
+
+# far above what the stand-in needs; lets multi-row statements grow freely
+STAND_IN_MAX_ALLOWED_PACKET = 64 * 1024 * 1024
+
+_ROOM_COLUMNS = 2
+_STUDENT_COLUMNS = 5
+
+
+class _StandInCursor:
+    """Cursor over a StandInConnector's tables."""
+
+    def __init__(self, connector: "StandInConnector", dictionary: bool):
+        self.connector = connector
+        self.dictionary = dictionary
+        self._converter = MySQLConverter()
+        self._rows: list = []
+
+    def execute(self, statement: str, params=()) -> None:
+        self._rows = []
+        for value in (params.values() if isinstance(params, dict) else params or ()):
+            self._converter.quote(self._converter.escape(self._converter.to_mysql(value)))
+
+        if statement.lstrip().startswith("INSERT INTO Rooms"):
+            self.connector.store(self.connector.rooms, params, _ROOM_COLUMNS)
+        elif statement.lstrip().startswith("INSERT INTO Students"):
+            self.connector.store(self.connector.students, params, _STUDENT_COLUMNS)
+        elif statement == SQLQueries.SELECT_MAX_ALLOWED_PACKET:
+            self._rows = [(STAND_IN_MAX_ALLOWED_PACKET,)]
+        elif statement == SQLQueries.BUMP_DATA_VERSION:
+            (self.connector.data_version,) = params
+        elif statement == SQLQueries.SELECT_DATA_VERSION:
+            self._rows = [(self.connector.data_version,)]
+        elif statement in self.connector.report_names:
+            as_of = date.fromisoformat(params["as_of"]) if params and "as_of" in params else self.connector.as_of
+            self._rows = self.connector.report(self.connector.report_names[statement], as_of)
+        else:
+            raise NotImplementedError(statement)
+
+    def executemany(self, statement: str, rows) -> None:
+        for row in rows:
+            self.execute(statement, row)
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchmany(self, size: int = 1) -> list:
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def fetchall(self) -> list:
+        rows, self._rows = self._rows, []
+        return rows
+
+    def close(self) -> None:
+        self._rows = []
+
+
+class StandInConnector:
+    """Drop-in for MySQLConnector backed by Python dictionaries."""
+
+    queries = SQLQueries
+    insert_strategies = (ApplicationConfig.EXECUTEMANY_STRATEGY, ApplicationConfig.MULTI_ROW_STRATEGY)
+    # statements never fail, so there are no row errors to bisect
+    row_errors = ()
+
+    def __init__(self, as_of: date = None):
+        """
+        Args:
+            as_of: Date report ages are computed at, today when not given
+        """
+        self.as_of = as_of
+        self.pool = None
+        self.rooms: dict[int, tuple] = {}
+        self.students: dict[int, tuple] = {}
+        self.data_version = None
+        self.report_names = {
+            getattr(SQLQueries, query): name for name, query in ReportingService._report_queries.items()
+        }
+
+    def db_is_connected(self) -> bool:
+        return True
+
+    def get_cursor(self, dictionary: bool = False, buffered: bool = None, prepared: bool = False) -> _StandInCursor:
+        return _StandInCursor(self, dictionary)
+
+    def get_max_allowed_packet(self) -> int:
+        return STAND_IN_MAX_ALLOWED_PACKET
+
+    def batch_sent(self) -> None:
+        """Stored rows are visible at once, so there is no load session to tell."""
+
+    def disconnect(self) -> None:
+        pass
+
+    @staticmethod
+    def store(table: dict, params, columns: int) -> None:
+        """Upsert flat statement parameters, `columns` per row, keyed by the first column."""
+        for start in range(0, len(params), columns):
+            row = tuple(params[start:start + columns])
+            table[row[0]] = row
+
+    def report(self, name: str, as_of: date = None) -> list[dict]:
+        """Compute one report over the stored rows, at as_of or the connector's date."""
+        # NumPy is only needed when reports are benchmarked
+        from src.app.services.offline_reports import OfflineReportEngine
+
+        engine = OfflineReportEngine(as_of=as_of or self.as_of)
+        engine.load_rooms({"id": room_id, "name": name} for room_id, name in self.rooms.values())
+        engine.load_students(
+            {"id": student_id, "name": name, "birthday": birthday, "sex": sex, "room": room_id}
+            for student_id, name, birthday, sex, room_id in self.students.values()
+        )
+        return engine.run_all()[name]
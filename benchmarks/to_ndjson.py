@@ -0,0 +1,22 @@
+"""
+Converts a JSON array input file to NDJSON, one object per line.
+
+Inputs named *.ndjson or *.jsonl are parsed and validated in parallel by the
+application, so converting large student exports lets ingest use every CPU.
+Usage: python -m benchmarks.to_ndjson SOURCE TARGET
+"""
+import sys
+import argparse
+from src.app.services.ndjson_loader import NdjsonLoader
+
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.to_ndjson")
+    parser.add_argument("source", help="JSON array file")
+    parser.add_argument("target", help="NDJSON file to write")
+    args = parser.parse_args(argv)
+    print(NdjsonLoader.convert(args.source, args.target))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,14 +1,32 @@
-from src.app.services.file_loader import FileLoader
-from src.app.services.data_filter import DataFilter
+from src.app.services.ndjson_loader import load_valid_items
+from src.app.services.row_loader import load_valid_rows
 from src.app.database.database_connector import MySQLConnector
+from src.app.database.async_connector import AsyncMySQLConnector
+from src.app.database.async_operations import AsyncRepository
+from src.app.database.backends import create_connector
 from src.app.database.schema_manager import SchemaManager
 from src.app.database.database_operations import RoomRepository, StudentRepository
+from src.app.database.sharded_insert import ShardedInserter
+from src.app.database.room_ids import RoomIdSet
 from src.app.services.reporting_service import ReportingService
-from src.app.services.file_writter import ResultWriter
+from src.app.services.async_reporting_service import AsyncReportingService
+from src.app.services.report_cache import ReportCache
+from src.app.services.ingest_pipeline import IngestPipeline
+from src.app.services.ingest_manifest import IngestManifest
+from src.app.services.file_writter import ResultWriter, output_path
+from src.app.services import metrics
 from src.app.constants.application_config import ApplicationConfig
+from src.app.constants.database_config import DatabaseConfig
+from src.app.constants.messages import LogMessages, ErrorMessages
 
-from typing import Final
+from contextlib import nullcontext
+from functools import partial
+from typing import Callable, Final, Optional
+import asyncio
 import logging
+import os
+import tempfile
+import time
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -17,47 +35,347 @@ room_file: Final = ApplicationConfig.ROOM_FILE_PATH
 student_file: Final = ApplicationConfig.STUDENT_FILE_PATH
 
 
-def start_application() -> None:
+def _local_infile_dir():
+    """Directory bulk loads write their TSV files to, or None when no repository bulk loads."""
+    strategies = (ApplicationConfig.ROOM_INSERT_STRATEGY, ApplicationConfig.STUDENT_INSERT_STRATEGY)
+    if ApplicationConfig.BULK_LOAD_STRATEGY not in strategies:
+        return None
+    return ApplicationConfig.BULK_LOAD_TMP_DIR or tempfile.gettempdir()
+
+
+def _pool_size():
+    """Connections needed for parallel inserts and concurrent reports, or None for a single connection."""
+    sizes = []
+    if ApplicationConfig.STUDENT_INSERT_WORKERS > 1:
+        sizes.append(ApplicationConfig.STUDENT_INSERT_WORKERS + 1)
+    if ApplicationConfig.CONCURRENT_REPORTS and not ApplicationConfig.SINGLE_SCAN_REPORTS:
+        sizes.append(len(ApplicationConfig.REPORT_OUTPUTS) + 1)
+    return max(sizes) if sizes else None
+
+
+def _insert_strategy(db_connection: MySQLConnector, strategy: str) -> str:
+    """The configured insert strategy, or the backend's preferred one when it does not support it."""
+    if strategy in db_connection.insert_strategies:
+        return strategy
+    preferred = db_connection.insert_strategies[0]
+    logger.warning(LogMessages.INSERT_STRATEGY_FALLBACK.format(strategy, db_connection.queries.DIALECT, preferred))
+    return preferred
+
+
+def _check_backend_features(db_connection: MySQLConnector) -> None:
+    """Refuse configured features that only the MySQL backend implements, or that do not work together."""
+    if ApplicationConfig.STUDENT_INSERT_WORKERS > 1 and ApplicationConfig.MAINTAIN_ROOM_STATS:
+        raise ValueError(ErrorMessages.SHARDS_WITH_ROOM_STATS)
+    if db_connection.queries.DIALECT == DatabaseConfig.MYSQL_BACKEND:
+        return
+
+    features = {
+        "MAINTAIN_ROOM_STATS": ApplicationConfig.MAINTAIN_ROOM_STATS,
+        "DEFERRED_INDEX_BUILD": ApplicationConfig.DEFERRED_INDEX_BUILD,
+        "STUDENT_INSERT_WORKERS": ApplicationConfig.STUDENT_INSERT_WORKERS > 1,
+    }
+    for feature, enabled in features.items():
+        if enabled:
+            raise ValueError(ErrorMessages.UNSUPPORTED_BY_BACKEND.format(feature))
+
+
+def _check_async_features() -> None:
+    """Refuse configured features that start_application_async does not implement."""
+    features = {
+        "MAINTAIN_ROOM_STATS": ApplicationConfig.MAINTAIN_ROOM_STATS,
+        "REJECT_FILE_PATH": ApplicationConfig.REJECT_FILE_PATH is not None,
+        "INCREMENTAL_INGEST": ApplicationConfig.INCREMENTAL_INGEST,
+        "LOAD_SESSION": ApplicationConfig.LOAD_SESSION,
+        "DEFERRED_INDEX_BUILD": ApplicationConfig.DEFERRED_INDEX_BUILD,
+        "STREAM_REPORTS": ApplicationConfig.STREAM_REPORTS,
+        "PAGED_REPORTS": ApplicationConfig.PAGED_REPORTS,
+        "EXPORT_METRICS": ApplicationConfig.EXPORT_METRICS,
+    }
+    for feature, enabled in features.items():
+        if enabled:
+            raise ValueError(ErrorMessages.UNSUPPORTED_BY_ASYNC.format(feature))
+
+
+def _student_repository(db_connection: MySQLConnector, room_ids: Optional[RoomIdSet] = None,
+                        on_unstored: Optional[Callable[[list], None]] = None) -> StudentRepository:
+    """Build the student repository with the configured insert strategy and orphan check."""
+    return StudentRepository(
+        db_connection,
+        _insert_strategy(db_connection, ApplicationConfig.STUDENT_INSERT_STRATEGY),
+        maintain_room_stats=ApplicationConfig.MAINTAIN_ROOM_STATS,
+        room_ids=room_ids,
+        quarantine_path=ApplicationConfig.ORPHAN_QUARANTINE_PATH,
+        reject_path=ApplicationConfig.REJECT_FILE_PATH,
+        on_unstored=on_unstored
+    )
+
+
+def _reset_reject_files() -> None:
+    """Remove the orphan quarantine and reject files of an earlier run, so they only hold this run's rows."""
+    for path in (ApplicationConfig.ORPHAN_QUARANTINE_PATH, ApplicationConfig.REJECT_FILE_PATH):
+        if path is None:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _room_ids(rooms_repo: RoomRepository) -> Optional[RoomIdSet]:
+    """Start the room id set students are checked against, from the rooms already stored."""
+    if not ApplicationConfig.ORPHAN_STUDENT_CHECK:
+        return None
+    rooms_repo.room_ids = RoomIdSet()
+    rooms_repo.load_room_ids()
+    return rooms_repo.room_ids
+
+
+def _row_fields(data_type: str) -> tuple[str, ...]:
+    """Layout of the rows the repository of a data type inserts."""
+    if data_type == ApplicationConfig.ROOM_STRATEGY:
+        return RoomRepository.row_fields
+    return StudentRepository.row_fields
+
+
+def _ingest_sequential(rooms_repo: RoomRepository, students_repo: StudentRepository, manifests: dict) -> None:
+    """Load, validate and insert rooms, then students, one stage after another."""
+    sources = (
+        (room_file, ApplicationConfig.ROOM_STRATEGY, rooms_repo),
+        (student_file, ApplicationConfig.STUDENT_STRATEGY, students_repo),
+    )
+    for path, data_type, repository in sources:
+        manifest = manifests.get(path)
+        if manifest is not None and manifest.is_unchanged():
+            logger.info(LogMessages.MANIFEST_FILE_UNCHANGED.format(path))
+            continue
+
+        if ApplicationConfig.ROW_FAST_PATH and manifest is None:
+            repository.insert_rows(load_valid_rows(path, data_type, _row_fields(data_type)))
+            continue
+
+        items = load_valid_items(path, data_type)
+        repository.insert_batch(items if manifest is None else manifest.changed_records(items))
+
+
+def _ingest_pipelined(rooms_repo: RoomRepository, students_repo: StudentRepository, manifests: dict) -> None:
+    """Run loading, validation and insertion as concurrent stages with bounded queues."""
+    pipeline = IngestPipeline()
+    pipeline.add_source(room_file, ApplicationConfig.ROOM_STRATEGY, rooms_repo, manifests.get(room_file))
+    pipeline.add_source(student_file, ApplicationConfig.STUDENT_STRATEGY, students_repo, manifests.get(student_file))
+    pipeline.run()
+
+
+def _open_manifests(rooms_repo: RoomRepository, students_repo: StudentRepository) -> dict:
+    """Open the ingest manifest of each input, forgetting it when its table was emptied."""
+    manifests = {}
+    for path, repository in ((room_file, rooms_repo), (student_file, students_repo)):
+        manifest = IngestManifest(path)
+        if not repository.has_rows():
+            manifest.reset()
+        manifests[path] = manifest
+    return manifests
+
+
+def _write_reports(results: dict) -> None:
+    """Write every report, a list or an iterator of rows, to its output file."""
+    output_format = ApplicationConfig.REPORT_OUTPUT_FORMAT
+    compress = ApplicationConfig.COMPRESS_REPORTS
+    for name, path in ApplicationConfig.REPORT_OUTPUTS.items():
+        ResultWriter.write(output_path(path, output_format, compress), results[name], output_format, compress)
+
+
+def _report_offline() -> None:
+    """Compute the reports in-process from the input files, without a database."""
+    # NumPy is only needed for offline reports
+    from src.app.services.offline_reports import OfflineReportEngine
+
+    engine = OfflineReportEngine(as_of=ApplicationConfig.REPORT_AS_OF)
+    engine.load_rooms(load_valid_items(room_file, ApplicationConfig.ROOM_STRATEGY))
+    engine.load_students(load_valid_items(student_file, ApplicationConfig.STUDENT_STRATEGY))
+    _write_reports(engine.run_all(ApplicationConfig.REPORT_TOP_N))
+
+
+def _export_metrics(started: float, succeeded: bool) -> None:
+    """Dump the run's metrics as JSON and in the Prometheus text format."""
+    metrics.RUN_SECONDS.set(time.perf_counter() - started)
+    metrics.RUN_SUCCEEDED.set(int(succeeded))
+    try:
+        metrics.registry.dump_json(ApplicationConfig.METRICS_JSON_OUTPUT)
+        metrics.registry.dump_prometheus(ApplicationConfig.METRICS_PROMETHEUS_OUTPUT)
+        logger.info(LogMessages.METRICS_EXPORTED.format(
+            ApplicationConfig.METRICS_JSON_OUTPUT, ApplicationConfig.METRICS_PROMETHEUS_OUTPUT
+        ))
+    except OSError as e:
+        logger.error(LogMessages.METRICS_EXPORT_FAILED.format(e))
+
+
+def start_application(pipelined: bool = ApplicationConfig.PIPELINED_INGEST,
+                      offline: bool = ApplicationConfig.OFFLINE_REPORTS) -> None:
     """
     Application flow logic:
     1. Load data from both files
-    2. Create database schema
+    2. Create database schema on the backend named by DB_BACKEND
     3. Insert data into database
     4. Retrieve data using SQL queries
+    :param pipelined: Overlap file parsing and validation with database inserts
+    :param offline: Skip the database and compute the reports in-process
     :return: None
     """
+    started = time.perf_counter()
+    succeeded = False
 
     try:
-        # load data from json
-        rooms = DataFilter.filter_data(FileLoader.load_file_data(room_file), ApplicationConfig.ROOM_STRATEGY)
-        students = DataFilter.filter_data(FileLoader.load_file_data(student_file), ApplicationConfig.STUDENT_STRATEGY)
+        if offline:
+            _report_offline()
+            succeeded = True
+            return
 
         # connect to database
-        db_connection = MySQLConnector()
+        workers = ApplicationConfig.STUDENT_INSERT_WORKERS
+        db_connection = create_connector(
+            local_infile_dir=_local_infile_dir(), pool_size=_pool_size(), prepared=ApplicationConfig.PREPARED_STATEMENTS
+        )
+        _check_backend_features(db_connection)
         db_connection.connect()
 
         # create schema
         schema_manager = SchemaManager(db_connection)
         schema_manager.create_room_student_schema()
+        if ApplicationConfig.MAINTAIN_ROOM_STATS:
+            schema_manager.create_room_stats_schema()
+        else:
+            # statistics would go stale while students change without them
+            schema_manager.drop_room_stats_schema()
+
+        # load data from json and insert it
+        _reset_reject_files()
+        rooms_repo = RoomRepository(
+            db_connection, _insert_strategy(db_connection, ApplicationConfig.ROOM_INSERT_STRATEGY),
+            reject_path=ApplicationConfig.REJECT_FILE_PATH
+        )
+        room_ids = _room_ids(rooms_repo)
 
-        # insert data
-        rooms_repo = RoomRepository(db_connection)
-        rooms_repo.insert_batch(rooms)
+        manifests = {}
+        students_unstored = None
+        if ApplicationConfig.INCREMENTAL_INGEST:
+            manifests = _open_manifests(rooms_repo, _student_repository(db_connection))
+            # rows that are not stored must not be remembered as loaded
+            rooms_repo.on_unstored = manifests[room_file].forget
+            students_unstored = manifests[student_file].forget
 
-        students_repo = StudentRepository(db_connection)
-        students_repo.insert_batch(students)
+        if workers > 1:
+            students_repo = ShardedInserter(
+                db_connection, partial(_student_repository, room_ids=room_ids, on_unstored=students_unstored),
+                workers, load_session=ApplicationConfig.LOAD_SESSION
+            )
+        else:
+            students_repo = _student_repository(db_connection, room_ids, students_unstored)
+
+        try:
+            # index rebuilds are DDL and commit implicitly, so they stay outside the load session
+            with schema_manager.bulk_load_mode() if ApplicationConfig.DEFERRED_INDEX_BUILD else nullcontext(), \
+                    db_connection.load_session() if ApplicationConfig.LOAD_SESSION else nullcontext():
+                if pipelined:
+                    _ingest_pipelined(rooms_repo, students_repo, manifests)
+                else:
+                    _ingest_sequential(rooms_repo, students_repo, manifests)
+        except Exception:
+            for manifest in manifests.values():
+                manifest.rollback()
+            raise
+        else:
+            for manifest in manifests.values():
+                manifest.commit()
+        finally:
+            for manifest in manifests.values():
+                manifest.close()
 
         # do report
-        report = ReportingService(db_connection)
+        cache = ReportCache(ApplicationConfig.REPORT_CACHE_DIR) if ApplicationConfig.REPORT_CACHE else None
+        report = ReportingService(db_connection, cache=cache, **_report_options())
+        if ApplicationConfig.STREAM_REPORTS:
+            # each report streams straight into its file, one after another
+            results = {name: report.stream_report(name) for name in ApplicationConfig.REPORT_OUTPUTS}
+        elif ApplicationConfig.PAGED_REPORTS:
+            # listings are written a page of rooms at a time as they are read
+            results = {name: report.paged_report(name) for name in ApplicationConfig.REPORT_OUTPUTS}
+        else:
+            results = report.run_all(
+                concurrent=ApplicationConfig.CONCURRENT_REPORTS,
+                single_scan=ApplicationConfig.SINGLE_SCAN_REPORTS,
+                from_room_stats=ApplicationConfig.MAINTAIN_ROOM_STATS and ApplicationConfig.ROOM_STATS_REPORTS
+            )
 
         # write report to files
-        ResultWriter.write_txt(ApplicationConfig.TOP_5_LEAST_AVG_AGE_OUTPUT, report.top_5_least_average_age_room())
+        _write_reports(results)
+        succeeded = True
 
-        ResultWriter.write_txt(ApplicationConfig.ROOMS_WITH_DIFFERENT_SEX_OUTPUT, report.rooms_with_different_sex())
+    except Exception as e:
+        print(e)
+    finally:
+        if ApplicationConfig.EXPORT_METRICS:
+            _export_metrics(started, succeeded)
 
-        ResultWriter.write_txt(ApplicationConfig.ROOMS_WITH_STUDENTS_COUNT_OUTPUT, report.rooms_with_students_count())
 
-        ResultWriter.write_txt(ApplicationConfig.TOP_5_LARGEST_AGE_DIFF_OUTPUT, report.top_5_rooms_with_largest_age_diff())
+def _report_options() -> dict:
+    """ReportingService settings from the configuration."""
+    return {
+        "as_of": ApplicationConfig.REPORT_AS_OF,
+        "top_n": ApplicationConfig.REPORT_TOP_N,
+        "first_room": ApplicationConfig.REPORT_FIRST_ROOM_ID,
+        "last_room": ApplicationConfig.REPORT_LAST_ROOM_ID,
+    }
 
-    except Exception as e:
-        print(e)
\ No newline at end of file
+
+def _create_schema() -> Optional[RoomIdSet]:
+    """Create the room and student schema over a short-lived blocking connection and read the stored room ids."""
+    db_connection = MySQLConnector()
+    db_connection.connect()
+    try:
+        schema_manager = SchemaManager(db_connection)
+        schema_manager.create_room_student_schema()
+        # students change without RoomStats maintenance, which would leave its statistics stale
+        schema_manager.drop_room_stats_schema()
+        _reset_reject_files()
+        return _room_ids(RoomRepository(db_connection))
+    finally:
+        db_connection.disconnect()
+
+
+async def start_application_async(concurrency: int = ApplicationConfig.ASYNC_INSERT_CONCURRENCY) -> None:
+    """
+    Application flow of start_application() on mysql.connector.aio, for callers running an event loop.
+
+    Insert batches and report queries run as coroutines on a pool of
+    connections, so several of them are in flight without a thread each.
+    Schema creation and writing the report files stay blocking and run once
+    in a worker thread, and input files are parsed a chunk at a time on
+    worker threads. Only the MySQL backend is supported; features this flow
+    does not implement raise ValueError before anything is touched.
+    :param concurrency: Insert batches in flight at once
+    :return: None
+    """
+    _check_async_features()
+    room_ids = await asyncio.to_thread(_create_schema)
+
+    db_connection = AsyncMySQLConnector(pool_size=max(concurrency, len(ApplicationConfig.REPORT_OUTPUTS)) + 1)
+    await db_connection.connect()
+    try:
+        sources = (
+            (room_file, ApplicationConfig.ROOM_STRATEGY,
+             RoomRepository(db_connection, _insert_strategy(db_connection, ApplicationConfig.ROOM_INSERT_STRATEGY),
+                            room_ids=room_ids, reject_path=ApplicationConfig.REJECT_FILE_PATH)),
+            (student_file, ApplicationConfig.STUDENT_STRATEGY,
+             _student_repository(db_connection, room_ids)),
+        )
+        for path, data_type, repository in sources:
+            await AsyncRepository(repository, concurrency).insert_batch(load_valid_items(path, data_type))
+
+        cache = ReportCache(ApplicationConfig.REPORT_CACHE_DIR) if ApplicationConfig.REPORT_CACHE else None
+        report = AsyncReportingService(db_connection, cache=cache, **_report_options())
+        results = await report.run_all(
+            concurrent=ApplicationConfig.CONCURRENT_REPORTS, single_scan=ApplicationConfig.SINGLE_SCAN_REPORTS
+        )
+        await asyncio.to_thread(_write_reports, results)
+    finally:
+        await db_connection.disconnect()
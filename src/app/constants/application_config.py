@@ -10,13 +10,161 @@ class ApplicationConfig:
     ROOMS_WITH_STUDENTS_COUNT_OUTPUT = f"{OUTPUT_DIR}/rooms_with_students_count.txt"
     TOP_5_LARGEST_AGE_DIFF_OUTPUT = f"{OUTPUT_DIR}/top_5_rooms_with_largest_age_diff.txt"
 
+    TOP_5_LEAST_AVG_AGE_REPORT = "top_5_least_average_age_room"
+    ROOMS_WITH_DIFFERENT_SEX_REPORT = "rooms_with_different_sex"
+    ROOMS_WITH_STUDENTS_COUNT_REPORT = "rooms_with_students_count"
+    TOP_5_LARGEST_AGE_DIFF_REPORT = "top_5_rooms_with_largest_age_diff"
+
+    # labels of the summary queries reports can be derived from
+    ROOM_AGE_SUMMARY_REPORT = "room_age_summary"
+    ROOM_STATS_SUMMARY_REPORT = "room_stats_summary"
+
+    REPORT_OUTPUTS = {
+        TOP_5_LEAST_AVG_AGE_REPORT: TOP_5_LEAST_AVG_AGE_OUTPUT,
+        ROOMS_WITH_DIFFERENT_SEX_REPORT: ROOMS_WITH_DIFFERENT_SEX_OUTPUT,
+        ROOMS_WITH_STUDENTS_COUNT_REPORT: ROOMS_WITH_STUDENTS_COUNT_OUTPUT,
+        TOP_5_LARGEST_AGE_DIFF_REPORT: TOP_5_LARGEST_AGE_DIFF_OUTPUT,
+    }
+
+    MAINTAIN_ROOM_STATS = False
+    ROOM_STATS_REPORTS = False
+    ROOM_STATS_CHUNK_SIZE = 5000
+
+    # students whose room was neither loaded nor already stored are kept from the server
+    ORPHAN_STUDENT_CHECK = True
+    # when set, orphan students are appended there as JSON lines instead of only being counted
+    ORPHAN_QUARANTINE_PATH = None
+    # when set, a batch the server refuses is split until the bad rows are found,
+    # they are appended there with the server error and the load goes on
+    REJECT_FILE_PATH = None
+    ROOM_ID_BITMAP_LIMIT = 1 << 27
+
+    OFFLINE_REPORTS = False
+    OFFLINE_CHUNK_SIZE = 100_000
+    # when every student id is known to appear once, offline reports skip the ledger that lets
+    # a repeated id replace its earlier row and hold memory proportional to the rooms only
+    OFFLINE_UNIQUE_STUDENT_IDS = False
+
+    TXT_FORMAT = "txt"
+    CSV_FORMAT = "csv"
+    JSONL_FORMAT = "jsonl"
+    OUTPUT_FORMATS = (TXT_FORMAT, CSV_FORMAT, JSONL_FORMAT)
+    REPORT_OUTPUT_FORMAT = TXT_FORMAT
+    COMPRESS_REPORTS = False
+    GZIP_SUFFIX = ".gz"
+    WRITE_CHUNK_ROWS = 1000
+    WRITE_BUFFER_SIZE = 1024 * 1024
+    # mkstemp creates files readable by the owner only; outputs get this mode less the umask, as open() gives
+    OUTPUT_FILE_MODE = 0o666
+
+    EXPORT_METRICS = False
+    METRICS_NAMESPACE = "python_sql"
+    METRICS_JSON_OUTPUT = f"{OUTPUT_DIR}/metrics.json"
+    METRICS_PROMETHEUS_OUTPUT = f"{OUTPUT_DIR}/metrics.prom"
+    METRICS_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    STREAM_REPORTS = False
+    REPORT_FETCH_SIZE = 1000
+
+    # None computes ages at today's date
+    REPORT_AS_OF = None
+    REPORT_CACHE = False
+    REPORT_CACHE_DIR = "src/app/state/report_cache"
+    REPORT_CACHE_MAX_ENTRIES = 256
+    REPORT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+    REPORT_CACHE_MAX_DISK_BYTES = 256 * 1024 * 1024
+    REPORT_CACHE_SUFFIX = ".pickle"
+
+    # estimated rows may grow by this factor before a plan counts as regressed
+    QUERY_PLAN_ROW_GROWTH = 10.0
+
+    REPORT_TOP_N = 5
+    # reports cover the rooms with ids in this range; the default spans every INT id
+    REPORT_FIRST_ROOM_ID = 0
+    REPORT_LAST_ROOM_ID = 2 ** 31 - 1
+    # read listing reports a page of REPORT_PAGE_SIZE rooms at a time
+    PAGED_REPORTS = False
+    REPORT_PAGE_SIZE = 1000
+    CONCURRENT_REPORTS = False
+    SINGLE_SCAN_REPORTS = False
+
     DEFAULT_BATCH_SIZE = 1000
+    MIN_BATCH_SIZE = 50
+    MAX_BATCH_SIZE = 50_000
+    BATCH_GROWTH_FACTOR = 1.5
+    BATCH_SHRINK_FACTOR = 0.75
+    BATCH_THROUGHPUT_TOLERANCE = 0.1
+    PACKET_SAFETY_RATIO = 0.8
+
+    EXECUTEMANY_STRATEGY = "executemany"
+    BULK_LOAD_STRATEGY = "bulk_load"
+    MULTI_ROW_STRATEGY = "multi_row"
+    ROOM_INSERT_STRATEGY = MULTI_ROW_STRATEGY
+    STUDENT_INSERT_STRATEGY = MULTI_ROW_STRATEGY
+    BULK_LOAD_ROWS_PER_FILE = 500_000
+    BULK_LOAD_TMP_DIR = None
+    BULK_LOAD_FILE_SUFFIX = ".tsv"
+
+    STUDENT_INSERT_WORKERS = 1
+    SHARD_KEY_BLOCK = 1000
+    SHARD_QUEUE_SIZE = 4
+
+    # group insert batches into transactions instead of committing each one
+    LOAD_SESSION = False
+    LOAD_SESSION_COMMIT_BATCHES = 50
+    LOAD_SESSION_COMMIT_SECONDS = 5.0
+    # report, data version and row check queries run as prepared statements on MySQL,
+    # each prepared once per connection; inserts keep the text protocol
+    PREPARED_STATEMENTS = False
+    STATEMENT_CACHE_SIZE = 64
+    # insert batches in flight at once on the asyncio connector, each on its own pooled connection
+    ASYNC_INSERT_CONCURRENCY = 4
+
+    DEFERRED_INDEX_BUILD = False
+
+    INCREMENTAL_INGEST = False
+    INGEST_STATE_DIR = "src/app/state"
+    MANIFEST_SUFFIX = ".manifest.sqlite3"
+    MANIFEST_LOOKUP_CHUNK = 500
+    MANIFEST_HASH_BLOCK_SIZE = 1024 * 1024
+
+    PIPELINED_INGEST = False
+    PIPELINE_QUEUE_SIZE = 8
+    PIPELINE_CHUNK_SIZE = 1000
+    PIPELINE_POLL_INTERVAL = 0.1
 
     STUDENT_STRATEGY = "student"
     ROOM_STRATEGY = "room"
 
     DEFAULT_ENCODING = "utf-8"
     FILE_MODE_WRITE = "w"
+    FILE_MODE_APPEND = "a"
     FILE_MODE_READ = "r"
+    FILE_MODE_READ_BINARY = "rb"
+
+    # ijson backends in order of preference; JSON_BACKEND pins one of them
+    JSON_BACKENDS = ("yajl2_c", "yajl2_cffi", "python")
+    JSON_BACKEND = None
+    JSON_READ_BUFFER_SIZE = 1024 * 1024
+    # files up to this size are parsed in one call instead of streamed
+    WHOLE_FILE_PARSE_THRESHOLD = 32 * 1024 * 1024
 
     JSON_ITEMS_PATH = "item"
+    # sequential ingest parses items straight into row tuples, with birthdays as dates,
+    # instead of dictionaries; incremental ingest still needs the dictionaries
+    ROW_FAST_PATH = False
+    # the parser hands over the events of a whole read at once, so reads stay small
+    ROW_READ_BUFFER_SIZE = 64 * 1024
+
+    # inputs with these suffixes hold one JSON object per line and are parsed in parallel
+    NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+    NDJSON_WORKERS = None  # processes parsing NDJSON; None uses every CPU
+    # parsing processes start from a clean server process rather than a fork of the
+    # multithreaded loader; platforms without forkserver spawn them instead
+    NDJSON_START_METHOD = "forkserver"
+    NDJSON_RANGE_SIZE = 64 * 1024 * 1024
+    NDJSON_PENDING_PER_WORKER = 2
+    # ranges shrink so the ranges in flight hold at most this many input bytes,
+    # which bounds the parsed rows the parent holds whatever the worker count
+    NDJSON_PENDING_BYTES = 64 * 1024 * 1024
+    VALIDATION_BATCH_SIZE = 1000
@@ -13,5 +13,20 @@ class DatabaseConfig:
     ENV_DB_USER = 'DB_USER'
     ENV_DB_PASSWORD = 'DB_PASSWORD'
 
+    # most connections one connector opens, well under the server's default max_connections
+    MAX_POOL_SIZE = 32
+
+    # session settings of a load session: unique_checks, transaction_isolation;
+    # primary keys are always checked, so upserts still find existing rows
+    LOAD_SESSION_SETTINGS = (0, 'READ-COMMITTED')
+
+    ENV_DB_BACKEND = 'DB_BACKEND'
+    ENV_DB_PATH = 'DB_PATH'
+    MYSQL_BACKEND = 'mysql'
+    SQLITE_BACKEND = 'sqlite'
+    DUCKDB_BACKEND = 'duckdb'
+    DEFAULT_BACKEND = MYSQL_BACKEND
+    DEFAULT_EMBEDDED_PATH = ':memory:'
+
     DEFAULT_CHARSET = 'utf8mb4'
     DEFAULT_ENGINE = 'InnoDB'
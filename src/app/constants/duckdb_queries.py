@@ -0,0 +1,226 @@
+from src.app.constants.sql_queries import SQLQueries
+
+
+class DuckDBQueries(SQLQueries):
+    """
+    SQL query templates for DuckDB.
+
+    Students has no foreign key, as DuckDB refuses updates to referenced
+    rows, and no secondary indexes, which columnar scans do not need. Ages
+    follow the MySQL reports exactly and rows are ordered down to room_id, as
+    in SQLiteQueries.
+    """
+
+    DIALECT = "duckdb"
+
+    STUDENT_INDEXES = {}
+
+    EXPLAIN_QUERY = "EXPLAIN (FORMAT JSON) {}"
+
+    CREATE_ROOMS_TABLE = """
+        CREATE TABLE IF NOT EXISTS Rooms (
+            room_id INTEGER PRIMARY KEY,
+            name VARCHAR NOT NULL
+        )
+    """
+
+    CREATE_STUDENTS_TABLE = """
+        CREATE TABLE IF NOT EXISTS Students (
+            student_id INTEGER PRIMARY KEY,
+            name VARCHAR NOT NULL,
+            birthday DATE NOT NULL,
+            sex VARCHAR NOT NULL CHECK (sex IN ('M', 'F')),
+            room_id INTEGER
+        )
+    """
+
+    CREATE_INDEX = "CREATE INDEX IF NOT EXISTS {} ON Students {}"
+
+    CREATE_DATA_VERSION_TABLE = """
+        CREATE TABLE IF NOT EXISTS DataVersion (
+            id INTEGER PRIMARY KEY,
+            token VARCHAR NOT NULL
+        )
+    """
+    SEED_DATA_VERSION = "INSERT INTO DataVersion (id, token) VALUES (1, ?) ON CONFLICT DO NOTHING"
+    BUMP_DATA_VERSION = "UPDATE DataVersion SET token = ? WHERE id = 1"
+
+    INSERT_ROOM_QUERY = """
+        INSERT INTO Rooms (room_id, name)
+        VALUES (?, ?)
+        ON CONFLICT (room_id) DO UPDATE SET name = excluded.name
+    """
+
+    # the cast keeps the day of ISO datetimes, as a MySQL DATE column does
+    INSERT_STUDENT_QUERY = """
+        INSERT INTO Students (student_id, name, birthday, sex, room_id)
+        VALUES (?, ?, CAST(CAST(? AS TIMESTAMP) AS DATE), ?, ?)
+        ON CONFLICT (student_id) DO UPDATE SET
+            name = excluded.name,
+            birthday = excluded.birthday,
+            sex = excluded.sex,
+            room_id = excluded.room_id
+    """
+
+    # Bulk loads read each RFC 4180 CSV file into a connection-local staging
+    # table with read_csv and merge it in one upsert, DuckDB's set-based path
+    BULK_LOAD_FILE_FORMAT = "csv"
+    CREATE_ROOMS_STAGING_TABLE = "CREATE TEMP TABLE IF NOT EXISTS Rooms_staging (room_id INTEGER, name VARCHAR)"
+    CREATE_STUDENTS_STAGING_TABLE = """
+        CREATE TEMP TABLE IF NOT EXISTS Students_staging (
+            student_id INTEGER, name VARCHAR, birthday VARCHAR, sex VARCHAR, room_id INTEGER
+        )
+    """
+
+    DROP_ROOMS_STAGING_TABLE = "DROP TABLE IF EXISTS Rooms_staging"
+    DROP_STUDENTS_STAGING_TABLE = "DROP TABLE IF EXISTS Students_staging"
+
+    LOAD_ROOMS_STAGING = """
+        INSERT INTO Rooms_staging
+        SELECT * FROM read_csv(
+            ?, header = false, auto_detect = false, delim = ',', quote = '"', escape = '"', new_line = '\\n',
+            columns = {'room_id': 'INTEGER', 'name': 'VARCHAR'}
+        )
+    """
+
+    LOAD_STUDENTS_STAGING = """
+        INSERT INTO Students_staging
+        SELECT * FROM read_csv(
+            ?, header = false, auto_detect = false, delim = ',', quote = '"', escape = '"', new_line = '\\n',
+            columns = {
+                'student_id': 'INTEGER', 'name': 'VARCHAR', 'birthday': 'VARCHAR', 'sex': 'VARCHAR',
+                'room_id': 'INTEGER'
+            }
+        )
+    """
+
+    # one upsert may not touch a row twice, so only the last staged occurrence
+    # of an id is merged, as repeated upserts would leave it
+    MERGE_ROOMS_STAGING = """
+        INSERT INTO Rooms (room_id, name)
+        SELECT staged.room_id, staged.name
+        FROM Rooms_staging AS staged
+        QUALIFY row_number() OVER (PARTITION BY staged.room_id ORDER BY staged.rowid DESC) = 1
+        ON CONFLICT (room_id) DO UPDATE SET name = excluded.name
+    """
+
+    MERGE_STUDENTS_STAGING = """
+        INSERT INTO Students (student_id, name, birthday, sex, room_id)
+        SELECT
+            staged.student_id,
+            staged.name,
+            CAST(CAST(staged.birthday AS TIMESTAMP) AS DATE),
+            staged.sex,
+            staged.room_id
+        FROM Students_staging AS staged
+        QUALIFY row_number() OVER (PARTITION BY staged.student_id ORDER BY staged.rowid DESC) = 1
+        ON CONFLICT (student_id) DO UPDATE SET
+            name = excluded.name,
+            birthday = excluded.birthday,
+            sex = excluded.sex,
+            room_id = excluded.room_id
+    """
+
+    ROOMS_WITH_STUDENTS_COUNT = """
+        SELECT Rooms.room_id, Rooms.name, count(Students.student_id) AS students_count
+        FROM Rooms
+        LEFT JOIN Students
+        ON Rooms.room_id = Students.room_id
+        WHERE Rooms.room_id BETWEEN $first_room AND $last_room
+        GROUP BY Rooms.room_id, Rooms.name
+        ORDER BY Rooms.room_id
+    """
+
+    ROOMS_WITH_STUDENTS_COUNT_PAGE = """
+        SELECT Rooms.room_id, Rooms.name, count(Students.student_id) AS students_count
+        FROM Rooms
+        LEFT JOIN Students
+        ON Rooms.room_id = Students.room_id
+        WHERE Rooms.room_id > $after_room AND Rooms.room_id <= $last_room
+        GROUP BY Rooms.room_id, Rooms.name
+        ORDER BY Rooms.room_id
+        LIMIT $page_size
+    """
+
+    TOP_5_LEAST_AVERAGE_AGE_ROOMS = """
+        SELECT
+            Rooms.room_id,
+            Rooms.name,
+            ROUND(AVG(date_diff('day', Students.birthday, CAST($as_of AS DATE)) * 4 // 1461), 4) AS avg_age
+        FROM Rooms
+        INNER JOIN Students ON Rooms.room_id = Students.room_id
+        WHERE Rooms.room_id BETWEEN $first_room AND $last_room
+        GROUP BY Rooms.room_id, Rooms.name
+        ORDER BY avg_age ASC, Rooms.room_id
+        LIMIT $top_n
+    """
+
+    TOP_5_LARGEST_AGE_DIFF_ROOMS = """
+        SELECT
+            Rooms.room_id,
+            Rooms.name,
+            MAX(
+                year(CAST($as_of AS DATE)) - year(Students.birthday)
+                - CAST(strftime(CAST($as_of AS DATE), '%m-%d') < strftime(Students.birthday, '%m-%d') AS INTEGER)
+            ) - MIN(
+                year(CAST($as_of AS DATE)) - year(Students.birthday)
+                - CAST(strftime(CAST($as_of AS DATE), '%m-%d') < strftime(Students.birthday, '%m-%d') AS INTEGER)
+            ) AS age_diff
+        FROM Rooms
+        INNER JOIN Students
+            ON Rooms.room_id = Students.room_id
+        WHERE Rooms.room_id BETWEEN $first_room AND $last_room
+        GROUP BY Rooms.room_id, Rooms.name
+        ORDER BY age_diff DESC, Rooms.room_id
+        LIMIT $top_n
+    """
+
+    ROOMS_WITH_DIFFERENT_SEX = """
+        SELECT
+            Rooms.room_id,
+            Rooms.name
+        FROM Rooms
+        INNER JOIN Students
+            ON Rooms.room_id = Students.room_id
+        WHERE Rooms.room_id BETWEEN $first_room AND $last_room
+        GROUP BY Rooms.room_id, Rooms.name
+        HAVING COUNT(DISTINCT Students.sex) > 1
+        ORDER BY Rooms.room_id
+    """
+
+    ROOMS_WITH_DIFFERENT_SEX_PAGE = """
+        SELECT
+            Rooms.room_id,
+            Rooms.name
+        FROM Rooms
+        INNER JOIN Students
+            ON Rooms.room_id = Students.room_id
+        WHERE Rooms.room_id > $after_room AND Rooms.room_id <= $last_room
+        GROUP BY Rooms.room_id, Rooms.name
+        HAVING COUNT(DISTINCT Students.sex) > 1
+        ORDER BY Rooms.room_id
+        LIMIT $page_size
+    """
+
+    ROOM_AGE_SUMMARY = """
+        SELECT
+            Rooms.room_id,
+            Rooms.name,
+            COUNT(Students.student_id) AS students_count,
+            ROUND(AVG(date_diff('day', Students.birthday, CAST($as_of AS DATE)) * 4 // 1461), 4) AS avg_age,
+            MIN(
+                year(CAST($as_of AS DATE)) - year(Students.birthday)
+                - CAST(strftime(CAST($as_of AS DATE), '%m-%d') < strftime(Students.birthday, '%m-%d') AS INTEGER)
+            ) AS min_age,
+            MAX(
+                year(CAST($as_of AS DATE)) - year(Students.birthday)
+                - CAST(strftime(CAST($as_of AS DATE), '%m-%d') < strftime(Students.birthday, '%m-%d') AS INTEGER)
+            ) AS max_age,
+            COUNT(DISTINCT Students.sex) AS sex_count
+        FROM Rooms
+        LEFT JOIN Students
+            ON Rooms.room_id = Students.room_id
+        WHERE Rooms.room_id BETWEEN $first_room AND $last_room
+        GROUP BY Rooms.room_id, Rooms.name
+        ORDER BY Rooms.room_id
+    """
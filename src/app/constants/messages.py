@@ -5,6 +5,7 @@ class LogMessages:
     DB_ALREADY_CONNECTED = "Database is already connected"
     DB_CONNECTED = "Connected to database"
     DB_CONNECTION_FAILED = "Connection failed: {}"
+    DB_POOL_CREATED = "Created connection pool of {} connections"
     DB_UNEXPECTED_CONNECTION_ERROR = "Unexpected error while connecting to database: {}"
     DB_CONNECTION_CLOSED = "Database connection closed"
     DB_DISCONNECT_FAILED = "Failed to disconnect from database due to: {}"
@@ -12,11 +13,23 @@ class LogMessages:
     DB_NOT_CONNECTED = "Database is not connected"
     DB_CURSOR_MYSQL_ERROR = "MySQL error getting cursor: {}"
     DB_CURSOR_UNEXPECTED_ERROR = "Unexpected error getting cursor: {}"
+    PREPARED_STATEMENT_CLOSE_FAILED = "Failed to deallocate prepared statement: {}"
 
     ROOMS_TABLE_DROPPED = "Rooms table dropped"
     STUDENTS_TABLE_DROPPED = "Students table dropped"
     STUDENTS_TABLE_CREATED = "Students table created"
     ROOMS_TABLE_CREATED = "Rooms table created"
+    ROOM_STATS_TABLE_DROPPED = "RoomStats table dropped"
+    ROOM_STATS_TABLE_CREATED = "RoomStats table created"
+    ROOM_STATS_REBUILT = "RoomStats rebuilt from Students"
+    ROOM_STATS_UPDATED = "Updated statistics of {} rooms"
+    STUDENT_INDEXES_BUILT = "Built {} Students indexes and constraints in one pass"
+    STUDENT_INDEXES_DROPPED = "Dropped {} Students indexes and constraints for bulk load"
+    BULK_LOAD_MODE_MYSQL_ERROR = "MySQL error in bulk load mode: {}"
+    LOAD_SESSION_COMMITTED = "Load session committed {} batches"
+    LOAD_SESSION_FINISHED = "Load session finished after {} commits"
+    LOAD_SESSION_ROLLED_BACK = "Load session rolled back its open transaction: {}"
+    REFERENTIAL_INTEGRITY_VERIFIED = "Every student references an existing room"
     SCHEMA_CREATED_SUCCESS = "Successfully created rooms and students schema"
     SCHEMA_DROPPED_SUCCESS = "Successfully dropped rooms and students schema"
     SCHEMA_MYSQL_ERROR_CREATE = "MySQL error creating schema: {}"
@@ -30,14 +43,54 @@ class LogMessages:
     UNEXPECTED_INSERTION_ERROR = "Unexpected error during insertion: {}"
     ROOM_INSERTION_COMPLETED = "Room insertion completed"
     STUDENT_INSERTION_COMPLETED = "inserted in students"
+    ORPHAN_STUDENTS_SKIPPED = "Skipped {} students referencing unknown rooms"
+    ORPHAN_STUDENTS_QUARANTINED = "Quarantined {} students referencing unknown rooms to {}"
+    BATCH_REFUSED_SPLITTING = "Server refused a batch of {} rows, splitting it: {}"
+    ROWS_REJECTED_BY_SERVER = "Wrote {} {} rows the server refused to {}"
+
+    PACKET_TOO_LARGE_RETRY = "Packet too large for {} rows, retrying with smaller statements"
+    PACKET_TOO_LARGE_CONNECTION_LOST = "Packet too large for {} rows and the server closed the connection"
+
+    BULK_LOAD_CHUNK_MERGED = "Bulk loaded {} items through staging table"
+    BULK_LOAD_STAGING_DROP_FAILED = "Failed to drop staging table: {}"
+
+    REPORT_CACHE_EVICTED = "Evicted {} report cache files to stay under {} bytes"
+    REPORT_CACHE_UNREADABLE = "Ignoring unreadable report cache file {}: {}"
+
+    QUERY_PLANS_CAPTURED = "Captured {} query plans on {}"
+    QUERY_PLAN_REGRESSION = "Query plan regression in {} on {}: {} ({} -> {})"
+
+    INSERT_STRATEGY_FALLBACK = "{} inserts are not supported by the {} backend, using {}"
+
+    SHARD_WORKER_FAILED = "Insert worker {} failed: {}"
+    SHARD_WORKER_ABORTED = "Insert worker {} stopped because another part of the insert failed"
+    SHARDED_INSERTION_COMPLETED = "Sharded insertion across {} workers completed"
+
+    MANIFEST_FILE_UNCHANGED = "{} is unchanged since the last load, skipping it"
+    MANIFEST_CHANGED_RECORDS = "{}: {} of {} records are new or changed"
+    MANIFEST_RESET = "Manifest of {} reset"
+    MANIFEST_UNSTORED_RECORDS = "{}: {} records were not stored and are offered again next load"
+
+    PIPELINE_STAGE_FAILED = "Pipeline stage {} failed: {}"
+    PIPELINE_COMPLETED = "Pipelined ingestion completed"
+
+    JSON_BACKEND_SELECTED = "Parsing {} with the ijson {} backend"
+    JSON_WHOLE_FILE_PARSE = "Parsing {} with json.loads as it is at most {} bytes"
+    NDJSON_PARSING = "Parsing {} as {} byte ranges on {} processes"
+    NDJSON_CONVERTED = "Converted {} items from {} to {}"
 
     SKIPPING_INVALID_ITEM = "skipping {}"
+    ITEMS_REJECTED = "Rejected {} of {} {} items: {}"
     ROOM_VALIDATION_FAILED = "Room validation failed {}"
     STUDENT_VALIDATION_FAILED = "Student validation failed: {}"
 
+    OFFLINE_STUDENTS_DROPPED = "Dropped {} students with an unknown room or sex from offline reports"
+
     NO_DATA_TO_WRITE = "No data to write for file: {}"
     FILE_WRITE_SUCCESS = "Successfully wrote {} rows to {}"
     FILE_WRITE_FAILED = "Failed to write to {}: {}"
+    METRICS_EXPORTED = "Exported metrics to {} and {}"
+    METRICS_EXPORT_FAILED = "Failed to export metrics: {}"
 
 
 class ErrorMessages:
@@ -45,6 +98,8 @@ class ErrorMessages:
 
     APPLICATION_FAILURE = "Application failed"
     DB_NOT_CONNECTED = "Database is not connected"
+    DB_POOL_NOT_CONFIGURED = "Connector was not created with a connection pool"
+    DB_POOL_TOO_LARGE = "A pool of {} connections was asked for; at most {} are allowed"
     ROOM_DATA_INCOMPLETE = "Room data is incomplete"
     STUDENT_DATA_INCOMPLETE = "Student data is incomplete"
     INVALID_ROOM_ID = "Room ID must be positive integer, got: {}"
@@ -52,6 +107,21 @@ class ErrorMessages:
     INVALID_STUDENT_ID = "Student ID must be positive integer, got: {}"
     INVALID_STUDENT_NAME = "Student name must be non-empty string, got: {}"
     INVALID_STUDENT_ROOM_ID = "Room ID must be positive integer, got: {}"
+    INVALID_STUDENT_BIRTHDAY = "Student birthday must be a YYYY-MM-DD date or datetime, got: {}"
+    INVALID_STUDENT_SEX = "Student sex must be 'M' or 'F', got: {}"
+    ORPHAN_STUDENTS = "{} students reference rooms that do not exist"
     UNKNOWN_STRATEGY_TYPE = "{} is unknown to the application"
+    PLAN_DIALECT_MISMATCH = "Baseline holds {} plans but the connector runs {}"
+    UNKNOWN_DB_BACKEND = "{} is not a supported database backend"
+    UNSUPPORTED_BY_BACKEND = "{} is only available on the MySQL backend"
+    UNSUPPORTED_BY_ASYNC = "{} is not available on the asyncio connector"
+    REJECTS_WITH_ROOM_STATS = "Batch recovery cannot be combined with RoomStats maintenance"
+    SHARDS_WITH_ROOM_STATS = "Parallel student inserts cannot be combined with RoomStats maintenance"
+    UNKNOWN_INSERT_STRATEGY = "{} is not a supported insert strategy"
+    UNKNOWN_OUTPUT_FORMAT = "{} is not a supported output format"
+    REPORT_NOT_PAGED = "{} is not a listing report and cannot be paged"
+    METRIC_LABELS_MISMATCH = "{} takes labels {}, got {}"
     INVALID_JSON_FORMAT = "Invalid JSON format in file: {}"
+    INVALID_NDJSON_LINE = "Invalid JSON in the line at byte {} of {}"
     FILE_READ_ERROR = "Error reading file: {}"
+    JSON_BACKEND_UNAVAILABLE = "None of the ijson backends {} is available"
@@ -1,5 +1,21 @@
 class SQLQueries:
-    """SQL query templates"""
+    """SQL query templates for MySQL, the base every dialect's query set derives from"""
+
+    DIALECT = "mysql"
+
+    # queries computing ages, which take the as-of date as a parameter
+    DATED_QUERIES = frozenset((
+        "TOP_5_LEAST_AVERAGE_AGE_ROOMS", "TOP_5_LARGEST_AGE_DIFF_ROOMS", "ROOM_AGE_SUMMARY", "ROOM_STATS_SUMMARY",
+    ))
+    # queries returning the first top_n rooms by a metric
+    TOP_N_QUERIES = frozenset(("TOP_5_LEAST_AVERAGE_AGE_ROOMS", "TOP_5_LARGEST_AGE_DIFF_ROOMS"))
+    # queries reading the rooms with ids from first_room to last_room
+    ROOM_RANGE_QUERIES = frozenset((
+        "ROOMS_WITH_STUDENTS_COUNT", "TOP_5_LEAST_AVERAGE_AGE_ROOMS", "TOP_5_LARGEST_AGE_DIFF_ROOMS",
+        "ROOMS_WITH_DIFFERENT_SEX", "ROOM_AGE_SUMMARY", "ROOM_STATS_SUMMARY",
+    ))
+
+    EXPLAIN_QUERY = "EXPLAIN FORMAT=JSON {}"
 
     CREATE_ROOMS_TABLE = """
         CREATE TABLE IF NOT EXISTS Rooms (
@@ -15,12 +31,120 @@ class SQLQueries:
             birthday DATE NOT NULL,
             sex ENUM('M', 'F') NOT NULL,
             room_id INT,
+            CONSTRAINT fk_students_room FOREIGN KEY (room_id) REFERENCES Rooms(room_id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """
+
+    # Secondary indexes on Students, see index_optimization_suggestions.txt
+    STUDENT_INDEXES = {
+        "idx_students_room_birthday": "(room_id, birthday)",
+        "idx_students_room_sex": "(room_id, sex)",
+    }
+
+    ROOMS_TABLE = "Rooms"
+    STUDENTS_TABLE = "Students"
+    ADD_STUDENTS_ROOM_FOREIGN_KEY = (
+        "ADD CONSTRAINT fk_students_room FOREIGN KEY (room_id) REFERENCES Rooms(room_id)"
+    )
+    ADD_INDEX = "ADD INDEX {} {}"
+    DROP_INDEX = "DROP INDEX {}"
+    DROP_FOREIGN_KEY = "DROP FOREIGN KEY {}"
+    ALTER_TABLE = "ALTER TABLE {} {}"
+
+    SELECT_SECONDARY_INDEXES = """
+        SELECT DISTINCT index_name FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name <> 'PRIMARY'
+    """
+
+    SELECT_FOREIGN_KEYS = """
+        SELECT constraint_name FROM information_schema.referential_constraints
+        WHERE constraint_schema = DATABASE() AND table_name = %s
+    """
+
+    SELECT_BULK_CHECKS = "SELECT @@SESSION.foreign_key_checks, @@SESSION.unique_checks"
+    SET_BULK_CHECKS = "SET SESSION foreign_key_checks = %s, unique_checks = %s"
+    SELECT_LOAD_SESSION = "SELECT @@SESSION.unique_checks, @@SESSION.transaction_isolation"
+    SET_LOAD_SESSION = "SET SESSION unique_checks = %s, transaction_isolation = %s"
+    BEGIN_TRANSACTION = "BEGIN"
+
+    COUNT_ORPHAN_STUDENTS = """
+        SELECT COUNT(*)
+        FROM Students
+        LEFT JOIN Rooms
+            ON Students.room_id = Rooms.room_id
+        WHERE Students.room_id IS NOT NULL AND Rooms.room_id IS NULL
+    """
+
+    # Per-room aggregates kept up to date by StudentRepository; sum_birth_days sums TO_DAYS(birthday)
+    CREATE_ROOM_STATS_TABLE = """
+        CREATE TABLE IF NOT EXISTS RoomStats (
+            room_id INT PRIMARY KEY,
+            student_count INT NOT NULL DEFAULT 0,
+            min_birthday DATE NULL,
+            max_birthday DATE NULL,
+            sum_birth_days BIGINT NOT NULL DEFAULT 0,
+            male_count INT NOT NULL DEFAULT 0,
+            female_count INT NOT NULL DEFAULT 0,
             FOREIGN KEY (room_id) REFERENCES Rooms(room_id)
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
     """
 
     DROP_ROOMS_TABLE = "DROP TABLE IF EXISTS Rooms"
     DROP_STUDENTS_TABLE = "DROP TABLE IF EXISTS Students"
+    DROP_ROOM_STATS_TABLE = "DROP TABLE IF EXISTS RoomStats"
+
+    ROOM_STATS_TABLE_EXISTS = """
+        SELECT COUNT(*) FROM information_schema.tables
+        WHERE table_schema = DATABASE() AND table_name = 'RoomStats'
+    """
+
+    CLEAR_ROOM_STATS = "DELETE FROM RoomStats"
+
+    REBUILD_ROOM_STATS = """
+        INSERT INTO RoomStats
+            (room_id, student_count, min_birthday, max_birthday, sum_birth_days, male_count, female_count)
+        SELECT
+            room_id,
+            COUNT(*),
+            MIN(birthday),
+            MAX(birthday),
+            SUM(TO_DAYS(birthday)),
+            SUM(sex = 'M'),
+            SUM(sex = 'F')
+        FROM Students
+        WHERE room_id IS NOT NULL
+        GROUP BY room_id
+    """
+
+    SELECT_STUDENTS_BY_ID = (
+        "SELECT student_id, birthday, sex, room_id FROM Students WHERE student_id IN ({}) FOR UPDATE"
+    )
+
+    APPLY_ROOM_STATS_DELTA = """
+        INSERT INTO RoomStats
+            (room_id, student_count, min_birthday, max_birthday, sum_birth_days, male_count, female_count)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            student_count = student_count + VALUES(student_count),
+            min_birthday = LEAST(
+                COALESCE(min_birthday, VALUES(min_birthday)), COALESCE(VALUES(min_birthday), min_birthday)
+            ),
+            max_birthday = GREATEST(
+                COALESCE(max_birthday, VALUES(max_birthday)), COALESCE(VALUES(max_birthday), max_birthday)
+            ),
+            sum_birth_days = sum_birth_days + VALUES(sum_birth_days),
+            male_count = male_count + VALUES(male_count),
+            female_count = female_count + VALUES(female_count)
+    """
+
+    # Min/max cannot be decremented; recompute them for rooms a student left
+    REFRESH_ROOM_STATS_BOUNDS = """
+        UPDATE RoomStats
+        SET
+            min_birthday = (SELECT MIN(birthday) FROM Students WHERE Students.room_id = RoomStats.room_id),
+            max_birthday = (SELECT MAX(birthday) FROM Students WHERE Students.room_id = RoomStats.room_id)
+        WHERE room_id IN ({})
+    """
 
     INSERT_ROOM_QUERY = """
         INSERT INTO Rooms (room_id, name)
@@ -38,38 +162,133 @@ class SQLQueries:
             room_id = VALUES(room_id)
     """
 
+    # Multi-row INSERT pieces: prefix + row, row, ... + suffix
+    INSERT_ROOMS_PREFIX = "INSERT INTO Rooms (room_id, name) VALUES "
+    ROOM_VALUES_ROW = "(%s, %s)"
+    UPSERT_ROOMS_SUFFIX = " ON DUPLICATE KEY UPDATE name = VALUES(name)"
+
+    INSERT_STUDENTS_PREFIX = "INSERT INTO Students (student_id, name, birthday, sex, room_id) VALUES "
+    STUDENT_VALUES_ROW = "(%s, %s, %s, %s, %s)"
+    UPSERT_STUDENTS_SUFFIX = (
+        " ON DUPLICATE KEY UPDATE name = VALUES(name), birthday = VALUES(birthday),"
+        " sex = VALUES(sex), room_id = VALUES(room_id)"
+    )
+
+    SELECT_MAX_ALLOWED_PACKET = "SELECT @@SESSION.max_allowed_packet"
+
+    # Opaque token replaced after every committed insert, so cached reports can tell the data changed
+    CREATE_DATA_VERSION_TABLE = """
+        CREATE TABLE IF NOT EXISTS DataVersion (
+            id TINYINT PRIMARY KEY,
+            token CHAR(32) NOT NULL
+        )
+    """
+    DROP_DATA_VERSION_TABLE = "DROP TABLE IF EXISTS DataVersion"
+    SEED_DATA_VERSION = "INSERT IGNORE INTO DataVersion (id, token) VALUES (1, %s)"
+    BUMP_DATA_VERSION = "UPDATE DataVersion SET token = %s WHERE id = 1"
+    SELECT_DATA_VERSION = "SELECT token FROM DataVersion WHERE id = 1"
+
+    ROOMS_HAS_ROWS = "SELECT EXISTS(SELECT 1 FROM Rooms)"
+    STUDENTS_HAS_ROWS = "SELECT EXISTS(SELECT 1 FROM Students)"
+    SELECT_ROOM_IDS = "SELECT room_id FROM Rooms"
+
+    # bulk loads stage rows from TSV files with MySQL's LOAD DATA escapes
+    BULK_LOAD_FILE_FORMAT = "tsv"
+    CREATE_ROOMS_STAGING_TABLE = "CREATE TEMPORARY TABLE IF NOT EXISTS Rooms_staging LIKE Rooms"
+    CREATE_STUDENTS_STAGING_TABLE = "CREATE TEMPORARY TABLE IF NOT EXISTS Students_staging LIKE Students"
+
+    DROP_ROOMS_STAGING_TABLE = "DROP TEMPORARY TABLE IF EXISTS Rooms_staging"
+    DROP_STUDENTS_STAGING_TABLE = "DROP TEMPORARY TABLE IF EXISTS Students_staging"
+
+    CLEAR_ROOMS_STAGING = "DELETE FROM Rooms_staging"
+    CLEAR_STUDENTS_STAGING = "DELETE FROM Students_staging"
+
+    # REPLACE keeps the last occurrence of a duplicated id, like repeated upserts would
+    LOAD_ROOMS_STAGING = r"""
+        LOAD DATA LOCAL INFILE %s
+        REPLACE INTO TABLE Rooms_staging
+        CHARACTER SET utf8mb4
+        FIELDS TERMINATED BY '\t' ESCAPED BY '\\'
+        LINES TERMINATED BY '\n'
+        (room_id, name)
+    """
+
+    LOAD_STUDENTS_STAGING = r"""
+        LOAD DATA LOCAL INFILE %s
+        REPLACE INTO TABLE Students_staging
+        CHARACTER SET utf8mb4
+        FIELDS TERMINATED BY '\t' ESCAPED BY '\\'
+        LINES TERMINATED BY '\n'
+        (student_id, name, birthday, sex, room_id)
+    """
+
+    MERGE_ROOMS_STAGING = """
+        INSERT INTO Rooms (room_id, name)
+        SELECT staged.room_id, staged.name
+        FROM Rooms_staging AS staged
+        ON DUPLICATE KEY UPDATE name = staged.name
+    """
+
+    MERGE_STUDENTS_STAGING = """
+        INSERT INTO Students (student_id, name, birthday, sex, room_id)
+        SELECT staged.student_id, staged.name, staged.birthday, staged.sex, staged.room_id
+        FROM Students_staging AS staged
+        ON DUPLICATE KEY UPDATE
+            name = staged.name,
+            birthday = staged.birthday,
+            sex = staged.sex,
+            room_id = staged.room_id
+    """
+
     ROOMS_WITH_STUDENTS_COUNT = """
         SELECT Rooms.room_id, Rooms.name, count(Students.student_id) AS students_count
         FROM Rooms
         LEFT JOIN Students
         ON Rooms.room_id = Students.room_id
-        GROUP BY Rooms.room_id;
+        WHERE Rooms.room_id BETWEEN %(first_room)s AND %(last_room)s
+        GROUP BY Rooms.room_id
+        ORDER BY Rooms.room_id;
+    """
+
+    # Keyset pages of a listing: up to page_size rooms after after_room, read
+    # through the Rooms primary key rather than skipped over with OFFSET
+    ROOMS_WITH_STUDENTS_COUNT_PAGE = """
+        SELECT Rooms.room_id, Rooms.name, count(Students.student_id) AS students_count
+        FROM Rooms
+        LEFT JOIN Students
+        ON Rooms.room_id = Students.room_id
+        WHERE Rooms.room_id > %(after_room)s AND Rooms.room_id <= %(last_room)s
+        GROUP BY Rooms.room_id
+        ORDER BY Rooms.room_id
+        LIMIT %(page_size)s;
     """
 
     TOP_5_LEAST_AVERAGE_AGE_ROOMS = """
         SELECT
             Rooms.room_id,
             Rooms.name,
-            AVG(FLOOR(DATEDIFF(CURDATE(), Students.birthday) / 365.25)) AS avg_age
+            AVG(FLOOR(DATEDIFF(%(as_of)s, Students.birthday) / 365.25)) AS avg_age
         FROM Rooms
         INNER JOIN Students ON Rooms.room_id = Students.room_id
+        WHERE Rooms.room_id BETWEEN %(first_room)s AND %(last_room)s
         GROUP BY Rooms.room_id
-        ORDER BY avg_age ASC
-        LIMIT 5;
+        ORDER BY avg_age ASC, Rooms.room_id
+        LIMIT %(top_n)s;
     """
 
     TOP_5_LARGEST_AGE_DIFF_ROOMS = """
         SELECT
             Rooms.room_id,
             Rooms.name,
-            MAX(TIMESTAMPDIFF(YEAR, Students.birthday, CURDATE())) -
-            MIN(TIMESTAMPDIFF(YEAR, Students.birthday, CURDATE())) AS age_diff
+            MAX(TIMESTAMPDIFF(YEAR, Students.birthday, %(as_of)s)) -
+            MIN(TIMESTAMPDIFF(YEAR, Students.birthday, %(as_of)s)) AS age_diff
         FROM Rooms
         INNER JOIN Students
             ON Rooms.room_id = Students.room_id
+        WHERE Rooms.room_id BETWEEN %(first_room)s AND %(last_room)s
         GROUP BY Rooms.room_id, Rooms.name
-        ORDER BY age_diff DESC
-        LIMIT 5;
+        ORDER BY age_diff DESC, Rooms.room_id
+        LIMIT %(top_n)s;
     """
 
     ROOMS_WITH_DIFFERENT_SEX = """
@@ -79,6 +298,86 @@ class SQLQueries:
         FROM Rooms
         INNER JOIN Students
             ON Rooms.room_id = Students.room_id
+        WHERE Rooms.room_id BETWEEN %(first_room)s AND %(last_room)s
+        GROUP BY Rooms.room_id
+        HAVING COUNT(DISTINCT Students.sex) > 1
+        ORDER BY Rooms.room_id;
+    """
+
+    ROOMS_WITH_DIFFERENT_SEX_PAGE = """
+        SELECT
+            Rooms.room_id,
+            Rooms.name
+        FROM Rooms
+        INNER JOIN Students
+            ON Rooms.room_id = Students.room_id
+        WHERE Rooms.room_id > %(after_room)s AND Rooms.room_id <= %(last_room)s
         GROUP BY Rooms.room_id
-        HAVING COUNT(DISTINCT Students.sex) > 1;
-    """
\ No newline at end of file
+        HAVING COUNT(DISTINCT Students.sex) > 1
+        ORDER BY Rooms.room_id
+        LIMIT %(page_size)s;
+    """
+
+    # One pass over Students that every report can be derived from
+    ROOM_AGE_SUMMARY = """
+        SELECT
+            Rooms.room_id,
+            Rooms.name,
+            COUNT(Students.student_id) AS students_count,
+            AVG(FLOOR(DATEDIFF(%(as_of)s, Students.birthday) / 365.25)) AS avg_age,
+            MIN(TIMESTAMPDIFF(YEAR, Students.birthday, %(as_of)s)) AS min_age,
+            MAX(TIMESTAMPDIFF(YEAR, Students.birthday, %(as_of)s)) AS max_age,
+            COUNT(DISTINCT Students.sex) AS sex_count
+        FROM Rooms
+        LEFT JOIN Students
+            ON Rooms.room_id = Students.room_id
+        WHERE Rooms.room_id BETWEEN %(first_room)s AND %(last_room)s
+        GROUP BY Rooms.room_id, Rooms.name
+        ORDER BY Rooms.room_id;
+    """
+
+    # Same columns as ROOM_AGE_SUMMARY, read from RoomStats in O(rooms).
+    # avg_age is the mean exact age, not the mean of whole-year ages.
+    ROOM_STATS_SUMMARY = """
+        SELECT
+            Rooms.room_id,
+            Rooms.name,
+            COALESCE(RoomStats.student_count, 0) AS students_count,
+            ROUND(
+                (TO_DAYS(%(as_of)s) * RoomStats.student_count - RoomStats.sum_birth_days)
+                / NULLIF(RoomStats.student_count, 0) / 365.25, 4
+            ) AS avg_age,
+            TIMESTAMPDIFF(YEAR, RoomStats.max_birthday, %(as_of)s) AS min_age,
+            TIMESTAMPDIFF(YEAR, RoomStats.min_birthday, %(as_of)s) AS max_age,
+            (RoomStats.male_count > 0) + (RoomStats.female_count > 0) AS sex_count
+        FROM Rooms
+        LEFT JOIN RoomStats
+            ON Rooms.room_id = RoomStats.room_id
+        WHERE Rooms.room_id BETWEEN %(first_room)s AND %(last_room)s
+        ORDER BY Rooms.room_id;
+    """
+
+    # Ingest manifest, kept in a local SQLite file per input
+    MANIFEST_CREATE_FILE_TABLE = """
+        CREATE TABLE IF NOT EXISTS input_file (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            content_hash TEXT NOT NULL
+        )
+    """
+
+    MANIFEST_CREATE_RECORD_TABLE = """
+        CREATE TABLE IF NOT EXISTS record_hash (
+            record_id INTEGER PRIMARY KEY,
+            hash BLOB NOT NULL
+        )
+    """
+
+    MANIFEST_SELECT_FILE = "SELECT size, mtime_ns, content_hash FROM input_file WHERE id = 1"
+    MANIFEST_UPSERT_FILE = "INSERT OR REPLACE INTO input_file (id, size, mtime_ns, content_hash) VALUES (1, ?, ?, ?)"
+    MANIFEST_CLEAR_FILE = "DELETE FROM input_file"
+    MANIFEST_SELECT_RECORDS = "SELECT record_id, hash FROM record_hash WHERE record_id IN ({})"
+    MANIFEST_UPSERT_RECORD = "INSERT OR REPLACE INTO record_hash (record_id, hash) VALUES (?, ?)"
+    MANIFEST_DELETE_RECORD = "DELETE FROM record_hash WHERE record_id = ?"
+    MANIFEST_CLEAR_RECORDS = "DELETE FROM record_hash"
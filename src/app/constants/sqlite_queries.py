@@ -0,0 +1,170 @@
+from src.app.constants.sql_queries import SQLQueries
+
+
+class SQLiteQueries(SQLQueries):
+    """
+    SQL query templates for SQLite.
+
+    Only the statements the ingest and report path needs are redefined;
+    MySQL-only features (bulk load, RoomStats, deferred index build) are not
+    available on this dialect. Ages follow the MySQL reports exactly: whole
+    years as FLOOR(days / 365.25) in integer arithmetic, and age differences
+    in completed years like TIMESTAMPDIFF(YEAR, ...). Every report is
+    ordered down to room_id, as the engine may return groups in any order.
+    """
+
+    DIALECT = "sqlite"
+
+    ENABLE_FOREIGN_KEYS = "PRAGMA foreign_keys = ON"
+    EXPLAIN_QUERY = "EXPLAIN QUERY PLAN {}"
+
+    CREATE_ROOMS_TABLE = """
+        CREATE TABLE IF NOT EXISTS Rooms (
+            room_id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL
+        )
+    """
+
+    CREATE_STUDENTS_TABLE = """
+        CREATE TABLE IF NOT EXISTS Students (
+            student_id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            birthday DATE NOT NULL,
+            sex TEXT NOT NULL CHECK (sex IN ('M', 'F')),
+            room_id INTEGER REFERENCES Rooms(room_id)
+        )
+    """
+
+    CREATE_INDEX = "CREATE INDEX IF NOT EXISTS {} ON Students {}"
+
+    CREATE_DATA_VERSION_TABLE = """
+        CREATE TABLE IF NOT EXISTS DataVersion (
+            id INTEGER PRIMARY KEY,
+            token TEXT NOT NULL
+        )
+    """
+    SEED_DATA_VERSION = "INSERT INTO DataVersion (id, token) VALUES (1, ?) ON CONFLICT DO NOTHING"
+    BUMP_DATA_VERSION = "UPDATE DataVersion SET token = ? WHERE id = 1"
+
+    INSERT_ROOM_QUERY = """
+        INSERT INTO Rooms (room_id, name)
+        VALUES (?, ?)
+        ON CONFLICT (room_id) DO UPDATE SET name = excluded.name
+    """
+
+    # date() keeps the day of ISO datetimes, as a MySQL DATE column does
+    INSERT_STUDENT_QUERY = """
+        INSERT INTO Students (student_id, name, birthday, sex, room_id)
+        VALUES (?, ?, date(?), ?, ?)
+        ON CONFLICT (student_id) DO UPDATE SET
+            name = excluded.name,
+            birthday = excluded.birthday,
+            sex = excluded.sex,
+            room_id = excluded.room_id
+    """
+
+    ROOMS_WITH_STUDENTS_COUNT = """
+        SELECT Rooms.room_id, Rooms.name, count(Students.student_id) AS students_count
+        FROM Rooms
+        LEFT JOIN Students
+        ON Rooms.room_id = Students.room_id
+        WHERE Rooms.room_id BETWEEN :first_room AND :last_room
+        GROUP BY Rooms.room_id, Rooms.name
+        ORDER BY Rooms.room_id
+    """
+
+    ROOMS_WITH_STUDENTS_COUNT_PAGE = """
+        SELECT Rooms.room_id, Rooms.name, count(Students.student_id) AS students_count
+        FROM Rooms
+        LEFT JOIN Students
+        ON Rooms.room_id = Students.room_id
+        WHERE Rooms.room_id > :after_room AND Rooms.room_id <= :last_room
+        GROUP BY Rooms.room_id, Rooms.name
+        ORDER BY Rooms.room_id
+        LIMIT :page_size
+    """
+
+    TOP_5_LEAST_AVERAGE_AGE_ROOMS = """
+        SELECT
+            Rooms.room_id,
+            Rooms.name,
+            ROUND(AVG(CAST(julianday(:as_of) - julianday(Students.birthday) AS INTEGER) * 4 / 1461), 4)
+                AS avg_age
+        FROM Rooms
+        INNER JOIN Students ON Rooms.room_id = Students.room_id
+        WHERE Rooms.room_id BETWEEN :first_room AND :last_room
+        GROUP BY Rooms.room_id, Rooms.name
+        ORDER BY avg_age ASC, Rooms.room_id
+        LIMIT :top_n
+    """
+
+    TOP_5_LARGEST_AGE_DIFF_ROOMS = """
+        SELECT
+            Rooms.room_id,
+            Rooms.name,
+            MAX(
+                strftime('%Y', :as_of) - strftime('%Y', Students.birthday)
+                - (strftime('%m-%d', :as_of) < strftime('%m-%d', Students.birthday))
+            ) - MIN(
+                strftime('%Y', :as_of) - strftime('%Y', Students.birthday)
+                - (strftime('%m-%d', :as_of) < strftime('%m-%d', Students.birthday))
+            ) AS age_diff
+        FROM Rooms
+        INNER JOIN Students
+            ON Rooms.room_id = Students.room_id
+        WHERE Rooms.room_id BETWEEN :first_room AND :last_room
+        GROUP BY Rooms.room_id, Rooms.name
+        ORDER BY age_diff DESC, Rooms.room_id
+        LIMIT :top_n
+    """
+
+    ROOMS_WITH_DIFFERENT_SEX = """
+        SELECT
+            Rooms.room_id,
+            Rooms.name
+        FROM Rooms
+        INNER JOIN Students
+            ON Rooms.room_id = Students.room_id
+        WHERE Rooms.room_id BETWEEN :first_room AND :last_room
+        GROUP BY Rooms.room_id, Rooms.name
+        HAVING COUNT(DISTINCT Students.sex) > 1
+        ORDER BY Rooms.room_id
+    """
+
+    ROOMS_WITH_DIFFERENT_SEX_PAGE = """
+        SELECT
+            Rooms.room_id,
+            Rooms.name
+        FROM Rooms
+        INNER JOIN Students
+            ON Rooms.room_id = Students.room_id
+        WHERE Rooms.room_id > :after_room AND Rooms.room_id <= :last_room
+        GROUP BY Rooms.room_id, Rooms.name
+        HAVING COUNT(DISTINCT Students.sex) > 1
+        ORDER BY Rooms.room_id
+        LIMIT :page_size
+    """
+
+    ROOM_AGE_SUMMARY = """
+        SELECT
+            Rooms.room_id,
+            Rooms.name,
+            COUNT(Students.student_id) AS students_count,
+            ROUND(AVG(CAST(julianday(:as_of) - julianday(Students.birthday) AS INTEGER) * 4 / 1461), 4)
+                AS avg_age,
+            MIN(
+                strftime('%Y', :as_of) - strftime('%Y', Students.birthday)
+                - (strftime('%m-%d', :as_of) < strftime('%m-%d', Students.birthday))
+            ) AS min_age,
+            MAX(
+                strftime('%Y', :as_of) - strftime('%Y', Students.birthday)
+                - (strftime('%m-%d', :as_of) < strftime('%m-%d', Students.birthday))
+            ) AS max_age,
+            COUNT(DISTINCT Students.sex) AS sex_count
+        FROM Rooms
+        LEFT JOIN Students
+            ON Rooms.room_id = Students.room_id
+        WHERE Rooms.room_id BETWEEN :first_room AND :last_room
+        GROUP BY Rooms.room_id, Rooms.name
+        ORDER BY Rooms.room_id
+    """
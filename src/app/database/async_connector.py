@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import mysql.connector.aio
+from mysql.connector import Error as MYSQLError
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from src.app.database.database_connector import connection_parameters
+from src.app.constants.sql_queries import SQLQueries
+from src.app.constants.database_config import DatabaseConfig
+from src.app.constants.application_config import ApplicationConfig
+from src.app.constants.messages import LogMessages, ErrorMessages
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class AsyncMySQLConnector:
+    """
+    Manages MySQL connections through mysql.connector.aio.
+
+    Mirrors MySQLConnector with coroutines. A connection runs one statement
+    at a time, so work overlaps only across connections: with a pool, lease()
+    hands out the spare ones and waits, without blocking the event loop,
+    while all of them are busy.
+    """
+
+    queries = SQLQueries
+    # LOAD DATA LOCAL INFILE staging is implemented on the blocking connector only
+    insert_strategies = (
+        ApplicationConfig.EXECUTEMANY_STRATEGY,
+        ApplicationConfig.MULTI_ROW_STRATEGY,
+    )
+
+    def __init__(self, pool_size: Optional[int] = None):
+        """
+        Initialize database connector with configuration parameters.
+
+        :param pool_size: Open this many connections on connect, at most
+            DatabaseConfig.MAX_POOL_SIZE; the connector keeps one and lease()
+            hands out the rest
+        """
+        if pool_size is not None and pool_size > DatabaseConfig.MAX_POOL_SIZE:
+            raise ValueError(ErrorMessages.DB_POOL_TOO_LARGE.format(pool_size, DatabaseConfig.MAX_POOL_SIZE))
+
+        self.connection = None
+        self.pool: Optional[asyncio.Queue] = None
+        self.pool_size = pool_size
+        self._max_allowed_packet = None
+        self.connection_parameters = connection_parameters()
+
+    async def _open(self):
+        """Open one autocommitting connection."""
+        connection = await mysql.connector.aio.connect(**self.connection_parameters)
+        await connection.set_autocommit(True)
+        return connection
+
+    async def connect(self) -> None:
+        """Establish connection to MySQL database, opening the pool first when sized."""
+        if self.connection is not None and await self.db_is_connected():
+            logger.warning(LogMessages.DB_ALREADY_CONNECTED)
+            return
+
+        try:
+            if self.pool_size and self.pool is None:
+                self.pool = asyncio.Queue()
+                for _ in range(self.pool_size - 1):
+                    self.pool.put_nowait(await self._open())
+                logger.info(LogMessages.DB_POOL_CREATED.format(self.pool_size))
+            self.connection = await self._open()
+            logger.info(LogMessages.DB_CONNECTED)
+        except MYSQLError as error:
+            logger.error(LogMessages.DB_CONNECTION_FAILED.format(error))
+            await self.disconnect()
+            raise
+        except Exception as error:
+            logger.error(LogMessages.DB_UNEXPECTED_CONNECTION_ERROR.format(error))
+            await self.disconnect()
+            raise
+
+    async def disconnect(self) -> None:
+        """Close the connection and the pool's idle connections; leased ones close when returned."""
+        if self.connection is None and self.pool is None:
+            return
+
+        pool, self.pool = self.pool, None
+        try:
+            if self.connection is not None and await self.connection.is_connected():
+                await self.connection.close()
+                logger.info(LogMessages.DB_CONNECTION_CLOSED)
+            while pool is not None and not pool.empty():
+                await pool.get_nowait().close()
+        except MYSQLError as e:
+            logger.error(LogMessages.DB_DISCONNECT_FAILED.format(e))
+        except Exception as e:
+            logger.error(LogMessages.DB_UNEXPECTED_DISCONNECT_ERROR.format(e))
+        finally:
+            self.connection = None
+            self._max_allowed_packet = None
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator["AsyncMySQLConnector"]:
+        """
+        Borrow a pooled connection wrapped in its own connector.
+
+        Waits for a connection when every one is leased. The borrowed
+        connector goes back to the pool when the block exits.
+        """
+        if self.pool is None:
+            raise ConnectionError(ErrorMessages.DB_POOL_NOT_CONFIGURED)
+
+        pool = self.pool
+        leased = AsyncMySQLConnector()
+        leased.connection_parameters = self.connection_parameters
+        leased.connection = await pool.get()
+        try:
+            if not await leased.connection.is_connected():
+                await leased.connection.reconnect()
+                await leased.connection.set_autocommit(True)
+            yield leased
+        finally:
+            if self.pool is pool:
+                pool.put_nowait(leased.connection)
+            else:
+                # the connector was disconnected while this connection was out
+                await leased.connection.close()
+
+    async def db_is_connected(self) -> bool:
+        """Check if database is connected."""
+        try:
+            return self.connection is not None and await self.connection.is_connected()
+        except (MYSQLError, Exception):
+            return False
+
+    async def get_cursor(self, dictionary: bool = False, buffered: Optional[bool] = None):
+        """
+        Get database cursor for executing queries.
+
+        :param dictionary: Return rows as dictionaries
+        :param buffered: False streams rows from the server as they are fetched;
+            None keeps the connection's default
+        """
+        if not await self.db_is_connected():
+            logger.warning(LogMessages.DB_NOT_CONNECTED)
+            raise ConnectionError(ErrorMessages.DB_NOT_CONNECTED)
+
+        try:
+            return await self.connection.cursor(dictionary=dictionary, buffered=buffered)
+        except MYSQLError as error:
+            logger.error(LogMessages.DB_CURSOR_MYSQL_ERROR.format(error))
+            raise
+        except Exception as e:
+            logger.error(LogMessages.DB_CURSOR_UNEXPECTED_ERROR.format(e))
+            raise
+
+    async def get_max_allowed_packet(self) -> int:
+        """Get the session's max_allowed_packet in bytes, queried once per connection."""
+        if self._max_allowed_packet is None:
+            cursor = await self.get_cursor()
+            try:
+                await cursor.execute(SQLQueries.SELECT_MAX_ALLOWED_PACKET)
+                (value,) = await cursor.fetchone()
+                self._max_allowed_packet = int(value)
+            finally:
+                await cursor.close()
+        return self._max_allowed_packet
@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import time
+from itertools import islice
+from typing import AsyncIterator, Iterable, Iterator
+from src.app.database.async_connector import AsyncMySQLConnector
+from src.app.database.database_connector import MYSQLError
+from src.app.database.database_operations import EntityRepository
+from src.app.database.data_version import bump_data_version_async
+from src.app.database.batch_sizing import MultiRowInsertBuilder, PACKET_ERRORS
+from src.app.services.metrics import (
+    ROWS_INSERTED, INSERT_SECONDS, INSERT_ROWS_PER_SECOND, INSERT_STATEMENT_SECONDS
+)
+from src.app.constants.application_config import ApplicationConfig
+from src.app.constants.messages import LogMessages, ErrorMessages
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+_END_OF_SHARD = object()
+
+
+def _take(items: Iterator, count: int) -> list:
+    """The next count items, fewer at the end."""
+    return list(islice(items, count))
+
+
+async def _chunks(items: Iterable) -> AsyncIterator[list]:
+    """Pull items a chunk at a time on a worker thread, so parsing them never blocks the event loop."""
+    items = iter(items)
+    while chunk := await asyncio.to_thread(_take, items, ApplicationConfig.PIPELINE_CHUNK_SIZE):
+        yield chunk
+
+
+class AsyncRepository:
+    """
+    Runs a repository's inserts on an AsyncMySQLConnector.
+
+    The wrapped repository supplies the statements and row values and is
+    never asked to run anything itself. With a pooled connector, batches go
+    to `concurrency` insert tasks that each lease a connection, so that many
+    batches are in flight at once. Like ShardedInserter, keys are dealt to
+    the tasks in blocks of SHARD_KEY_BLOCK ids, which keeps repeated ids on
+    one connection and in input order. Items are drawn from their iterable
+    in chunks on a worker thread, as parsing the input is blocking work.
+    """
+
+    def __init__(self, repository: EntityRepository,
+                 concurrency: int = ApplicationConfig.ASYNC_INSERT_CONCURRENCY, key_field: str = "id"):
+        """
+        Args:
+            repository: Repository built on an AsyncMySQLConnector
+            concurrency: Most batches in flight at once; needs a pool of that many spare connections
+            key_field: Item field holding the primary key
+        """
+        if repository.insert_strategy not in AsyncMySQLConnector.insert_strategies:
+            raise ValueError(ErrorMessages.UNSUPPORTED_BY_ASYNC.format(repository.insert_strategy))
+        if getattr(repository, "room_stats", None) is not None:
+            raise ValueError(ErrorMessages.UNSUPPORTED_BY_ASYNC.format("MAINTAIN_ROOM_STATS"))
+        if repository.reject_path is not None:
+            raise ValueError(ErrorMessages.UNSUPPORTED_BY_ASYNC.format("REJECT_FILE_PATH"))
+
+        self.repository = repository
+        self.connector = repository.connector
+        self.concurrency = concurrency
+        self.key_field = key_field
+
+    async def insert_batch(self, items: Iterable[dict]) -> None:
+        """Insert items, checked by the repository's prepare_items, and log completion."""
+        await self.execute_batch_insertion(self.repository.prepare_items(items))
+        logger.info(LogMessages.SHARDED_INSERTION_COMPLETED.format(self._workers()))
+
+    async def execute_batch_insertion(self, items: Iterable[dict]) -> None:
+        """Execute batch insertion of items into database."""
+        if not await self.connector.db_is_connected():
+            raise ConnectionError(ErrorMessages.DB_NOT_CONNECTED)
+
+        table = self.repository.table_name
+        started = time.perf_counter()
+        if self._workers() == 1:
+            inserted = await self._insert_on(self.connector, self._batches(items))
+        else:
+            inserted = await self._insert_sharded(items)
+
+        elapsed = time.perf_counter() - started
+        if inserted:
+            await bump_data_version_async(self.connector)
+        ROWS_INSERTED.inc(inserted, table=table)
+        INSERT_SECONDS.inc(elapsed, table=table)
+        if elapsed > 0:
+            INSERT_ROWS_PER_SECOND.set(inserted / elapsed, table=table)
+
+    def _workers(self) -> int:
+        """Number of insert tasks; one when there is no pool to lease from."""
+        return 1 if self.connector.pool is None else self.concurrency
+
+    def _batch_size(self) -> int:
+        if self.repository.insert_strategy == ApplicationConfig.MULTI_ROW_STRATEGY:
+            return self.repository.batch_sizer.size
+        return self.repository.batch_size
+
+    async def _batches(self, items: Iterable[dict]) -> AsyncIterator[list[tuple]]:
+        """Group the items' row values into batches."""
+        batch = []
+        async for chunk in _chunks(items):
+            for item in chunk:
+                batch.append(self.repository.get_item_value(item))
+                if len(batch) >= self._batch_size():
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    async def _insert_sharded(self, items: Iterable[dict]) -> int:
+        """Deal batches to the insert tasks by key block and wait for every task."""
+        workers = self._workers()
+        inboxes = [asyncio.Queue(maxsize=ApplicationConfig.SHARD_QUEUE_SIZE) for _ in range(workers)]
+
+        async def drain(inbox: asyncio.Queue):
+            while (batch := await inbox.get()) is not _END_OF_SHARD:
+                yield batch
+
+        async def shard(inbox: asyncio.Queue) -> int:
+            async with self.connector.lease() as leased:
+                return await self._insert_on(leased, drain(inbox))
+
+        async def dispatch() -> None:
+            batches = [[] for _ in inboxes]
+            async for chunk in _chunks(items):
+                for item in chunk:
+                    index = (item[self.key_field] // ApplicationConfig.SHARD_KEY_BLOCK) % workers
+                    batches[index].append(self.repository.get_item_value(item))
+                    if len(batches[index]) >= self._batch_size():
+                        await inboxes[index].put(batches[index])
+                        batches[index] = []
+            for inbox, batch in zip(inboxes, batches):
+                if batch:
+                    await inbox.put(batch)
+                await inbox.put(_END_OF_SHARD)
+
+        try:
+            # a failing shard cancels the dispatcher and the other shards
+            async with asyncio.TaskGroup() as group:
+                group.create_task(dispatch())
+                shards = [group.create_task(shard(inbox)) for inbox in inboxes]
+        except BaseExceptionGroup as errors:
+            raise errors.exceptions[0]
+        return sum(task.result() for task in shards)
+
+    async def _insert_on(self, connector: AsyncMySQLConnector, batches: AsyncIterator[list[tuple]]) -> int:
+        """Insert every batch over one connection with the repository's strategy."""
+        cursor = await connector.get_cursor()
+        try:
+            builder = None
+            if self.repository.insert_strategy == ApplicationConfig.MULTI_ROW_STRATEGY:
+                builder = MultiRowInsertBuilder(
+                    self.repository.get_multi_row_template(), await connector.get_max_allowed_packet()
+                )
+
+            inserted = 0
+            async for batch in batches:
+                inserted += await self._insert_one(connector, cursor, builder, batch)
+            return inserted
+
+        except MYSQLError as error:
+            logger.error(LogMessages.MYSQL_INSERTION_ERROR.format(error))
+            raise
+        except Exception as error:
+            logger.error(LogMessages.UNEXPECTED_INSERTION_ERROR.format(error))
+            raise
+        finally:
+            await cursor.close()
+
+    async def _insert_one(self, connector: AsyncMySQLConnector, cursor, builder, batch: list[tuple]) -> int:
+        """Send one batch with executemany, or as packet-sized multi-row statements."""
+        if builder is None:
+            with INSERT_STATEMENT_SECONDS.time(
+                    table=self.repository.table_name, strategy=self.repository.insert_strategy):
+                await cursor.executemany(self.repository.get_insert_query(), batch)
+        else:
+            await self._insert_sized(connector, cursor, builder, batch)
+        logger.info(LogMessages.ITEMS_INSERTED.format(len(batch)))
+        return len(batch)
+
+    async def _insert_sized(self, connector: AsyncMySQLConnector, cursor, builder: MultiRowInsertBuilder,
+                            rows: list[tuple]) -> None:
+        """EntityRepository._insert_sized() with awaited statements."""
+        sizer = self.repository.batch_sizer
+        for group in builder.split(rows):
+            statement, params = builder.build(group)
+            started = time.perf_counter()
+            try:
+                await cursor.execute(statement, params)
+                INSERT_STATEMENT_SECONDS.observe(
+                    time.perf_counter() - started,
+                    table=self.repository.table_name, strategy=self.repository.insert_strategy
+                )
+            except MYSQLError as error:
+                if error.errno not in PACKET_ERRORS or len(group) == 1:
+                    raise
+                if not await connector.db_is_connected():
+                    logger.error(LogMessages.PACKET_TOO_LARGE_CONNECTION_LOST.format(len(group)))
+                    raise
+                logger.warning(LogMessages.PACKET_TOO_LARGE_RETRY.format(len(group)))
+                builder.record_packet_error(group)
+                sizer.record_packet_error()
+                await self._insert_sized(connector, cursor, builder, group)
+                continue
+
+            sizer.record(len(group), time.perf_counter() - started)
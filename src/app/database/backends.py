@@ -0,0 +1,235 @@
+import os
+import sqlite3
+import logging
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import date
+from typing import Iterator, NoReturn, Optional
+from src.app.database.database_connector import MySQLConnector
+from src.app.database.load_session import LoadSession
+from src.app.constants.sqlite_queries import SQLiteQueries
+from src.app.constants.duckdb_queries import DuckDBQueries
+from src.app.constants.database_config import DatabaseConfig
+from src.app.constants.application_config import ApplicationConfig
+from src.app.constants.messages import LogMessages, ErrorMessages
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# rows from RowLoader carry birthdays as dates; sqlite3's own date adapter is deprecated
+sqlite3.register_adapter(date, date.isoformat)
+
+
+class EmbeddedCursor:
+    """Wraps a DB-API cursor so it returns rows the way mysql-connector cursors do."""
+
+    def __init__(self, cursor, dictionary: bool = False):
+        """
+        :param cursor: Cursor of the embedded engine
+        :param dictionary: Return rows as dictionaries keyed by column name
+        """
+        self.cursor = cursor
+        self.dictionary = dictionary
+        self._columns: Optional[list[str]] = None
+
+    def execute(self, query: str, params=None) -> None:
+        """Run a statement, remembering its column names for dictionary rows."""
+        if params:
+            self.cursor.execute(query, params)
+        else:
+            self.cursor.execute(query)
+        self._columns = [column[0] for column in self.cursor.description] if self.cursor.description else None
+
+    def executemany(self, query: str, rows) -> None:
+        """Run a statement once per row of parameters."""
+        self.cursor.executemany(query, rows)
+        self._columns = None
+
+    def _convert(self, row):
+        """A fetched row, as a dictionary in dictionary mode."""
+        return dict(zip(self._columns, row)) if self.dictionary and row is not None else row
+
+    def fetchone(self):
+        """The next row of the result, or None when it is exhausted."""
+        return self._convert(self.cursor.fetchone())
+
+    def fetchmany(self, size: int = 1) -> list:
+        """Up to size next rows of the result."""
+        return [self._convert(row) for row in self.cursor.fetchmany(size)]
+
+    def fetchall(self) -> list:
+        """The remaining rows of the result."""
+        return [self._convert(row) for row in self.cursor.fetchall()]
+
+    def close(self) -> None:
+        """Close the engine's cursor."""
+        self.cursor.close()
+
+
+class EmbeddedConnector(ABC):
+    """
+    Base for in-process database backends used in place of MySQLConnector.
+
+    Embedded backends run the ingest and report path with their own query
+    set. They have no connection pool and insert with the strategies in
+    insert_strategies, the first being the one the backend prefers; the
+    MySQL-specific RoomStats and deferred index features are not available.
+    """
+
+    queries = None
+    insert_strategies = (ApplicationConfig.EXECUTEMANY_STRATEGY,)
+    # errors caused by the rows of a statement rather than the connection
+    row_errors = ()
+
+    def __init__(self, path: str = DatabaseConfig.DEFAULT_EMBEDDED_PATH):
+        """
+        :param path: Database file, or ':memory:' for a database that lives as long as the connection
+        """
+        self.path = path
+        self.connection = None
+        self.pool = None
+        self._load_session: Optional[LoadSession] = None
+
+    @abstractmethod
+    def _open(self):
+        """
+        Open a connection to the embedded database in autocommit mode
+
+        :return: DB-API connection of the engine
+        """
+        pass
+
+    def connect(self) -> None:
+        """Open the database."""
+        if self.connection is not None:
+            logger.warning(LogMessages.DB_ALREADY_CONNECTED)
+            return
+        self.connection = self._open()
+        logger.info(LogMessages.DB_CONNECTED)
+
+    def disconnect(self) -> None:
+        """Close the database."""
+        if self.connection is None:
+            return
+        try:
+            self.connection.close()
+            logger.info(LogMessages.DB_CONNECTION_CLOSED)
+        except Exception as e:
+            logger.error(LogMessages.DB_UNEXPECTED_DISCONNECT_ERROR.format(e))
+        finally:
+            self.connection = None
+
+    def lease(self) -> NoReturn:
+        """Embedded backends have no pool to lease connections from, so this raises ConnectionError."""
+        raise ConnectionError(ErrorMessages.DB_POOL_NOT_CONFIGURED)
+
+    @contextmanager
+    def load_session(self, commit_batches: int = ApplicationConfig.LOAD_SESSION_COMMIT_BATCHES,
+                     commit_seconds: float = ApplicationConfig.LOAD_SESSION_COMMIT_SECONDS) -> Iterator[LoadSession]:
+        """MySQLConnector.load_session() with explicit transactions and no session settings to change."""
+        if self._load_session is not None:
+            yield self._load_session
+            return
+
+        def commit():
+            self.connection.commit()
+            self.connection.execute(self.queries.BEGIN_TRANSACTION)
+
+        self.connection.execute(self.queries.BEGIN_TRANSACTION)
+        self._load_session = LoadSession(commit, commit_batches, commit_seconds)
+        try:
+            yield self._load_session
+            self._load_session.commit()
+            self.connection.commit()
+            logger.info(LogMessages.LOAD_SESSION_FINISHED.format(self._load_session.commits))
+        except BaseException as error:
+            logger.error(LogMessages.LOAD_SESSION_ROLLED_BACK.format(error))
+            self.connection.rollback()
+            raise
+        finally:
+            self._load_session = None
+
+    def in_load_session(self) -> bool:
+        """Whether batches are grouped into transactions."""
+        return self._load_session is not None
+
+    def batch_sent(self) -> None:
+        """Tell the load session, when one is open, that an insert batch was sent."""
+        if self._load_session is not None:
+            self._load_session.batch_sent()
+
+    def db_is_connected(self) -> bool:
+        """Check if the database is open."""
+        return self.connection is not None
+
+    def get_cursor(self, dictionary: bool = False, buffered: Optional[bool] = None,
+                   prepared: bool = False) -> EmbeddedCursor:
+        """
+        Get a cursor; rows are always read incrementally, so buffered is ignored.
+
+        prepared is ignored too: embedded engines keep their own cache of
+        compiled statements and have no protocol to encode parameters for.
+        """
+        if not self.db_is_connected():
+            logger.warning(LogMessages.DB_NOT_CONNECTED)
+            raise ConnectionError(ErrorMessages.DB_NOT_CONNECTED)
+        return EmbeddedCursor(self.connection.cursor(), dictionary)
+
+
+class SQLiteConnector(EmbeddedConnector):
+    """Runs the pipeline on SQLite from the standard library."""
+
+    queries = SQLiteQueries
+    row_errors = (sqlite3.IntegrityError, sqlite3.DataError)
+
+    def _open(self):
+        connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        connection.execute(SQLiteQueries.ENABLE_FOREIGN_KEYS)
+        return connection
+
+
+class DuckDBConnector(EmbeddedConnector):
+    """
+    Runs the pipeline on DuckDB, a columnar engine suited to the report aggregations.
+
+    Per-row prepared upserts are DuckDB's slowest path, so batches are bulk
+    loaded: staged from CSV files with read_csv and merged set-based.
+    """
+
+    queries = DuckDBQueries
+    insert_strategies = (ApplicationConfig.BULK_LOAD_STRATEGY, ApplicationConfig.EXECUTEMANY_STRATEGY)
+
+    @property
+    def row_errors(self) -> tuple:
+        import duckdb
+
+        return duckdb.ConstraintException, duckdb.ConversionException
+
+    def _open(self):
+        # DuckDB is an optional dependency, only needed for this backend
+        import duckdb
+
+        return duckdb.connect(self.path)
+
+
+_EMBEDDED_CONNECTORS = {
+    DatabaseConfig.SQLITE_BACKEND: SQLiteConnector,
+    DatabaseConfig.DUCKDB_BACKEND: DuckDBConnector,
+}
+
+
+def create_connector(backend: Optional[str] = None, **mysql_options):
+    """
+    Create the connector of the configured database backend.
+
+    :param backend: 'mysql', 'sqlite' or 'duckdb'; read from the DB_BACKEND
+        environment variable when not given
+    :param mysql_options: Passed to MySQLConnector and ignored by embedded backends
+    :return: A connector that is not yet connected
+    """
+    backend = backend or os.getenv(DatabaseConfig.ENV_DB_BACKEND, DatabaseConfig.DEFAULT_BACKEND)
+    if backend == DatabaseConfig.MYSQL_BACKEND:
+        return MySQLConnector(**mysql_options)
+    if backend not in _EMBEDDED_CONNECTORS:
+        raise ValueError(ErrorMessages.UNKNOWN_DB_BACKEND.format(backend))
+    return _EMBEDDED_CONNECTORS[backend](os.getenv(DatabaseConfig.ENV_DB_PATH, DatabaseConfig.DEFAULT_EMBEDDED_PATH))
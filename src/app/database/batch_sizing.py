@@ -0,0 +1,132 @@
+from typing import Iterator, NamedTuple, Optional
+from mysql.connector import errorcode
+from src.app.constants.application_config import ApplicationConfig
+
+PACKET_ERRORS = frozenset({errorcode.ER_NET_PACKET_TOO_LARGE, errorcode.CR_NET_PACKET_TOO_LARGE})
+# bytes the client escapes with a backslash when it quotes a string literal
+_ESCAPED_BYTES = b"\0\n\r\\'\"\x1a"
+# a bytes value may be sent as _binary'...'
+_BINARY_PREFIX_BYTES = len("_binary")
+
+
+def _literal_bytes(value) -> int:
+    """Size of a parameter once the client renders it as an SQL literal."""
+    if value is None:
+        return len("NULL")
+    if isinstance(value, (bool, int, float)):
+        return len(str(value))
+    if isinstance(value, (bytes, bytearray)):
+        encoded, extra = bytes(value), _BINARY_PREFIX_BYTES
+    else:
+        encoded, extra = str(value).encode(ApplicationConfig.DEFAULT_ENCODING), 0
+    escapes = len(encoded) - len(encoded.translate(None, _ESCAPED_BYTES))
+    # the quotes, plus a backslash before every escaped byte
+    return len(encoded) + escapes + 2 + extra
+
+
+class MultiRowTemplate(NamedTuple):
+    """Pieces of an INSERT statement that can repeat its VALUES row."""
+
+    prefix: str
+    row: str
+    suffix: str
+
+
+class MultiRowInsertBuilder:
+    """Builds multi-row INSERT statements that stay under max_allowed_packet."""
+
+    def __init__(self, template: MultiRowTemplate, max_packet_bytes: int):
+        """
+        Args:
+            template: Statement pieces of the table being inserted into
+            max_packet_bytes: max_allowed_packet negotiated with the server
+        """
+        self.template = template
+        fixed_bytes = len(template.prefix) + len(template.suffix)
+        self.max_values_bytes = max(
+            int(max_packet_bytes * ApplicationConfig.PACKET_SAFETY_RATIO) - fixed_bytes, 1
+        )
+        self._statements = {}
+
+    @staticmethod
+    def estimate_row_bytes(row: tuple) -> int:
+        """
+        Size of one row once its values are escaped, quoted and rendered into VALUES
+
+        Counts the encoded bytes of every literal, the backslashes escaping
+        added, the parentheses and the separators, so it is never below what
+        is sent.
+        """
+        # ", " between values, the parentheses, and ", " before the next row
+        return sum(map(_literal_bytes, row)) + 2 * len(row) + 2
+
+    def split(self, rows: list[tuple]) -> Iterator[list[tuple]]:
+        """Split rows into groups whose VALUES list fits the packet budget."""
+        group, group_bytes = [], 0
+        for row in rows:
+            row_bytes = self.estimate_row_bytes(row)
+            if group and group_bytes + row_bytes > self.max_values_bytes:
+                yield group
+                group, group_bytes = [], 0
+            group.append(row)
+            group_bytes += row_bytes
+        if group:
+            yield group
+
+    def build(self, rows: list[tuple]) -> tuple[str, list]:
+        """Return the statement for len(rows) rows and its flattened parameters."""
+        statement = self._statements.get(len(rows))
+        if statement is None:
+            statement = self.template.prefix + ", ".join([self.template.row] * len(rows)) + self.template.suffix
+            self._statements[len(rows)] = statement
+        return statement, [value for row in rows for value in row]
+
+    def record_packet_error(self, rows: list[tuple]) -> None:
+        """Shrink the packet budget below the size of a group the server rejected."""
+        rejected_bytes = sum(self.estimate_row_bytes(row) for row in rows)
+        self.max_values_bytes = max(min(self.max_values_bytes, rejected_bytes) // 2, 1)
+
+
+class AdaptiveBatchSizer:
+    """
+    Adjusts the number of rows per batch from measured insert throughput.
+
+    The size grows while rows per second keep up with the previous batch and
+    shrinks when throughput drops or the server rejects a packet.
+    """
+
+    def __init__(self, initial: int = ApplicationConfig.DEFAULT_BATCH_SIZE,
+                 minimum: int = ApplicationConfig.MIN_BATCH_SIZE,
+                 maximum: int = ApplicationConfig.MAX_BATCH_SIZE):
+        """Initialize with the starting batch size and its bounds."""
+        self.size = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self._last_throughput: Optional[float] = None
+
+    def record(self, rows: int, seconds: float) -> None:
+        """
+        Record one batch and move the batch size toward better throughput.
+
+        Batches smaller than the current size (the final batch, or groups cut
+        short by the packet limit) update the throughput baseline but never
+        grow the size, since a larger target could not have been sent anyway.
+        """
+        if rows <= 0 or seconds <= 0:
+            return
+
+        throughput = rows / seconds
+        previous = self._last_throughput
+        self._last_throughput = throughput
+
+        if previous is None:
+            return
+        if throughput < previous * (1 - ApplicationConfig.BATCH_THROUGHPUT_TOLERANCE):
+            self.size = max(self.minimum, int(self.size * ApplicationConfig.BATCH_SHRINK_FACTOR))
+        elif rows >= self.size:
+            self.size = min(self.maximum, int(self.size * ApplicationConfig.BATCH_GROWTH_FACTOR))
+
+    def record_packet_error(self) -> None:
+        """Halve the batch size after a packet size error."""
+        self.size = max(self.minimum, self.size // 2)
+        self._last_throughput = None
@@ -0,0 +1,126 @@
+import os
+import csv
+import logging
+import tempfile
+from itertools import islice
+from typing import Callable, Iterable, Iterator, NamedTuple
+from src.app.database.database_connector import MySQLConnector, MYSQLError
+from src.app.constants.application_config import ApplicationConfig
+from src.app.constants.messages import LogMessages
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+_TSV_ESCAPES = str.maketrans({
+    "\\": "\\\\",
+    "\t": "\\t",
+    "\n": "\\n",
+    "\r": "\\r",
+    "\0": "\\0",
+})
+
+
+class BulkLoadQueries(NamedTuple):
+    """Statements needed to bulk load one table through a staging table."""
+
+    create_staging: str
+    load_staging: str
+    merge_staging: str
+    clear_staging: str
+    drop_staging: str
+
+
+def format_tsv_field(value) -> str:
+    """Render a value the way LOAD DATA expects it with the default escape character."""
+    if value is None:
+        return "\\N"
+    return str(value).translate(_TSV_ESCAPES)
+
+
+def _tsv_row_writer(file) -> Callable[[tuple], None]:
+    """Write rows as LOAD DATA reads them with the default escape character."""
+    return lambda row: file.write("\t".join(format_tsv_field(value) for value in row) + "\n")
+
+
+def _csv_row_writer(file) -> Callable[[tuple], None]:
+    """Write rows as RFC 4180 CSV; None becomes an empty field, which CSV readers take as NULL."""
+    return csv.writer(file, lineterminator="\n").writerow
+
+
+_ROW_WRITERS = {
+    "tsv": _tsv_row_writer,
+    "csv": _csv_row_writer,
+}
+
+
+class BulkLoader:
+    """
+    Loads rows through a staging table instead of executemany.
+
+    Rows are streamed into temporary TSV files of bounded size, or CSV files
+    for engines reading CSV natively. Each file is loaded into a
+    session-local staging table, with LOAD DATA LOCAL INFILE on MySQL, and
+    merged into the target table with one INSERT ... SELECT upsert, so the
+    upsert semantics of the executemany path are kept.
+    """
+
+    def __init__(self, connector: MySQLConnector, queries: BulkLoadQueries,
+                 rows_per_file: int = ApplicationConfig.BULK_LOAD_ROWS_PER_FILE, file_format: str = "tsv"):
+        """Initialize with database connector, the table's bulk load statements and the staged file format."""
+        self.connector = connector
+        self.queries = queries
+        self.rows_per_file = rows_per_file
+        self.row_writer = _ROW_WRITERS[file_format]
+
+    def load(self, rows: Iterable[tuple]) -> int:
+        """
+        Bulk load rows into the target table.
+
+        :param rows: Insert-ready tuples in the column order of the load statement
+        :return: Number of rows handed to the server
+        """
+        cursor = self.connector.get_cursor()
+        rows = iter(rows)
+        total = 0
+
+        try:
+            cursor.execute(self.queries.create_staging)
+
+            while True:
+                path, written = self._write_chunk(rows)
+                try:
+                    if not written:
+                        break
+                    cursor.execute(self.queries.load_staging, (path,))
+                    cursor.execute(self.queries.merge_staging)
+                    cursor.execute(self.queries.clear_staging)
+                finally:
+                    os.remove(path)
+
+                total += written
+                logger.info(LogMessages.BULK_LOAD_CHUNK_MERGED.format(written))
+
+            return total
+        finally:
+            try:
+                cursor.execute(self.queries.drop_staging)
+            except MYSQLError as error:
+                logger.warning(LogMessages.BULK_LOAD_STAGING_DROP_FAILED.format(error))
+            cursor.close()
+
+    def _write_chunk(self, rows: Iterator[tuple]) -> tuple[str, int]:
+        """Write up to rows_per_file rows to a temporary TSV file."""
+        written = 0
+        with tempfile.NamedTemporaryFile(
+            mode=ApplicationConfig.FILE_MODE_WRITE,
+            encoding=ApplicationConfig.DEFAULT_ENCODING,
+            newline="",
+            suffix=ApplicationConfig.BULK_LOAD_FILE_SUFFIX,
+            dir=ApplicationConfig.BULK_LOAD_TMP_DIR,
+            delete=False,
+        ) as file:
+            write_row = self.row_writer(file)
+            for row in islice(rows, self.rows_per_file):
+                write_row(row)
+                written += 1
+        return file.name, written
@@ -0,0 +1,70 @@
+import uuid
+import logging
+from typing import Optional
+from src.app.database.database_connector import MySQLConnector
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def _new_token() -> str:
+    """A token no earlier state of any database could have had."""
+    return uuid.uuid4().hex
+
+
+def create_data_version(cursor, queries) -> None:
+    """Create the DataVersion table with a first token; an existing token is kept."""
+    cursor.execute(queries.CREATE_DATA_VERSION_TABLE)
+    cursor.execute(queries.SEED_DATA_VERSION, (_new_token(),))
+
+
+def bump_data_version(connector: MySQLConnector) -> None:
+    """
+    Replace the data version token after an insert committed.
+
+    Tokens are random rather than counted, so a dropped and recreated schema
+    never repeats the token of data it no longer holds.
+
+    :param connector: Connector the insert ran on
+    """
+    cursor = connector.get_cursor(prepared=True)
+    try:
+        cursor.execute(connector.queries.BUMP_DATA_VERSION, (_new_token(),))
+    finally:
+        cursor.close()
+
+
+def read_data_version(connector: MySQLConnector) -> Optional[str]:
+    """
+    Read the current data version token.
+
+    :param connector: Connected database connector
+    :return: The token, or None when the schema has no version yet
+    """
+    cursor = connector.get_cursor(prepared=True)
+    try:
+        cursor.execute(connector.queries.SELECT_DATA_VERSION)
+        row = cursor.fetchone()
+        return row[0] if row else None
+    finally:
+        cursor.close()
+
+
+async def bump_data_version_async(connector) -> None:
+    """bump_data_version() on an AsyncMySQLConnector."""
+    cursor = await connector.get_cursor()
+    try:
+        await cursor.execute(connector.queries.BUMP_DATA_VERSION, (_new_token(),))
+    finally:
+        await cursor.close()
+
+
+async def read_data_version_async(connector) -> Optional[str]:
+    """read_data_version() on an AsyncMySQLConnector."""
+    cursor = await connector.get_cursor()
+    try:
+        await cursor.execute(connector.queries.SELECT_DATA_VERSION)
+        row = await cursor.fetchone()
+        return row[0] if row else None
+    finally:
+        await cursor.close()
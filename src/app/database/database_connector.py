@@ -1,60 +1,239 @@
 import mysql.connector
-from mysql.connector import Error as MYSQLError
+from mysql.connector import Error as MYSQLError, DataError, IntegrityError
+from contextlib import contextmanager
 import os
+import queue
 import logging
+from typing import Iterator, Optional
+from src.app.database.load_session import LoadSession
+from src.app.database.statement_cache import StatementCache, PreparedCursor
 from src.app.constants.database_config import DatabaseConfig
+from src.app.constants.sql_queries import SQLQueries
+from src.app.constants.application_config import ApplicationConfig
 from src.app.constants.messages import LogMessages, ErrorMessages
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
+def connection_parameters(local_infile_dir: Optional[str] = None) -> dict:
+    """
+    Connection arguments read from the environment.
+
+    :param local_infile_dir: Directory LOAD DATA LOCAL INFILE may read from;
+        local infile stays disabled when not given
+    """
+    parameters = {
+        'host': os.getenv(DatabaseConfig.ENV_DB_HOST, DatabaseConfig.DEFAULT_HOST),
+        'port': int(os.getenv(DatabaseConfig.ENV_DB_PORT, DatabaseConfig.DEFAULT_PORT)),
+        'database': os.getenv(DatabaseConfig.ENV_DB_NAME, DatabaseConfig.DEFAULT_DATABASE),
+        'user': os.getenv(DatabaseConfig.ENV_DB_USER, DatabaseConfig.DEFAULT_USER),
+        'password': os.getenv(DatabaseConfig.ENV_DB_PASSWORD, DatabaseConfig.DEFAULT_PASSWORD)
+    }
+    if local_infile_dir is not None:
+        parameters['allow_local_infile_in_path'] = local_infile_dir
+    return parameters
+
+
 class MySQLConnector:
     """Manages MySQL database connections."""
 
-    def __init__(self):
-        """Initialize database connector with configuration parameters."""
+    queries = SQLQueries
+    insert_strategies = (
+        ApplicationConfig.EXECUTEMANY_STRATEGY,
+        ApplicationConfig.BULK_LOAD_STRATEGY,
+        ApplicationConfig.MULTI_ROW_STRATEGY,
+    )
+    # errors caused by the rows of a statement rather than the connection
+    row_errors = (IntegrityError, DataError)
+
+    def __init__(self, local_infile_dir: Optional[str] = None, pool_size: Optional[int] = None,
+                 prepared: bool = False):
+        """
+        Initialize database connector with configuration parameters.
+
+        :param local_infile_dir: Directory LOAD DATA LOCAL INFILE may read from;
+            local infile stays disabled when not given
+        :param pool_size: Open this many connections on connect, at most
+            DatabaseConfig.MAX_POOL_SIZE; the connector keeps one and lease()
+            hands out the rest
+        :param prepared: Run the queries of cursors asked for with prepared=True
+            as server-side prepared statements, cached per connection
+        """
+        if pool_size is not None and pool_size > DatabaseConfig.MAX_POOL_SIZE:
+            raise ValueError(ErrorMessages.DB_POOL_TOO_LARGE.format(pool_size, DatabaseConfig.MAX_POOL_SIZE))
+
         self.connection = None
-        self.connection_parameters = {
-            'host': os.getenv(DatabaseConfig.ENV_DB_HOST, DatabaseConfig.DEFAULT_HOST),
-            'port': int(os.getenv(DatabaseConfig.ENV_DB_PORT, DatabaseConfig.DEFAULT_PORT)),
-            'database': os.getenv(DatabaseConfig.ENV_DB_NAME, DatabaseConfig.DEFAULT_DATABASE),
-            'user': os.getenv(DatabaseConfig.ENV_DB_USER, DatabaseConfig.DEFAULT_USER),
-            'password': os.getenv(DatabaseConfig.ENV_DB_PASSWORD, DatabaseConfig.DEFAULT_PASSWORD)
-        }
+        self.pool: Optional[queue.Queue] = None
+        self.pool_size = pool_size
+        self.prepared = prepared
+        self._max_allowed_packet = None
+        self._load_session: Optional[LoadSession] = None
+        self._statements: Optional[StatementCache] = None
+        self.connection_parameters = connection_parameters(local_infile_dir)
+
+    def _open(self):
+        """Open one autocommitting connection."""
+        connection = mysql.connector.connect(**self.connection_parameters)
+        connection.autocommit = True
+        return connection
 
     def connect(self) -> None:
-        """Establish connection to MySQL database."""
+        """Establish connection to MySQL database, opening the pool first when sized."""
         if self.connection is not None and self.db_is_connected():
             logger.warning(LogMessages.DB_ALREADY_CONNECTED)
             return
 
         try:
-            self.connection = mysql.connector.connect(**self.connection_parameters)
-            self.connection.autocommit = True
+            if self.pool_size and self.pool is None:
+                self.pool = queue.Queue()
+                for _ in range(self.pool_size - 1):
+                    self.pool.put_nowait(self._open())
+                logger.info(LogMessages.DB_POOL_CREATED.format(self.pool_size))
+            self.connection = self._open()
             logger.info(LogMessages.DB_CONNECTED)
         except MYSQLError as error:
             logger.error(LogMessages.DB_CONNECTION_FAILED.format(error))
+            self.disconnect()
             raise
         except Exception as error:
             logger.error(LogMessages.DB_UNEXPECTED_CONNECTION_ERROR.format(error))
+            self.disconnect()
             raise
 
     def disconnect(self) -> None:
-        """Close database connection."""
-        if self.connection is None:
+        """Close the connection and the pool's idle connections; leased ones close when returned."""
+        if self.connection is None and self.pool is None:
             return
 
+        pool, self.pool = self.pool, None
         try:
-            if self.connection.is_connected():
+            if self.connection is not None and self.connection.is_connected():
+                self._close_statements()
                 self.connection.close()
                 logger.info(LogMessages.DB_CONNECTION_CLOSED)
+            while pool is not None and not pool.empty():
+                pool.get_nowait().close()
         except MYSQLError as e:
             logger.error(LogMessages.DB_DISCONNECT_FAILED.format(e))
         except Exception as e:
             logger.error(LogMessages.DB_UNEXPECTED_DISCONNECT_ERROR.format(e))
         finally:
             self.connection = None
+            self._max_allowed_packet = None
+            self._statements = None
+
+    @contextmanager
+    def lease(self) -> Iterator["MySQLConnector"]:
+        """
+        Borrow a pooled connection wrapped in its own connector.
+
+        Waits for a connection when every one is leased. The borrowed
+        connector can be handed to repositories like the main one; its
+        connection goes back to the pool when the block exits.
+        """
+        if self.pool is None:
+            raise ConnectionError(ErrorMessages.DB_POOL_NOT_CONFIGURED)
+
+        pool = self.pool
+        leased = MySQLConnector(prepared=self.prepared)
+        leased.connection_parameters = self.connection_parameters
+        leased.connection = pool.get()
+        try:
+            if not leased.db_is_connected():
+                try:
+                    leased.connection.reconnect()
+                except MYSQLError as error:
+                    logger.error(LogMessages.DB_CONNECTION_FAILED.format(error))
+                    raise
+                leased.connection.autocommit = True
+            yield leased
+        finally:
+            leased._close_statements()
+            if self.pool is pool:
+                pool.put_nowait(leased.connection)
+            else:
+                # the connector was disconnected while this connection was out
+                leased.connection.close()
+
+    @contextmanager
+    def load_session(self, commit_batches: int = ApplicationConfig.LOAD_SESSION_COMMIT_BATCHES,
+                     commit_seconds: float = ApplicationConfig.LOAD_SESSION_COMMIT_SECONDS) -> Iterator[LoadSession]:
+        """
+        Group the batches sent on this connection into transactions for a load.
+
+        Autocommit is turned off and the session settings of
+        DatabaseConfig.LOAD_SESSION_SETTINGS applied; a commit follows every
+        commit_batches batches or commit_seconds of work and the end of the
+        block. If the block fails, the open transaction is rolled back, while
+        groups committed before stay. Autocommit and the session's previous
+        settings are restored either way. A nested call joins the open session.
+
+        :param commit_batches: Batches grouped into one transaction at most
+        :param commit_seconds: Seconds of work grouped into one transaction at most
+        """
+        if self._load_session is not None:
+            yield self._load_session
+            return
+
+        cursor = self.get_cursor()
+        try:
+            cursor.execute(SQLQueries.SELECT_LOAD_SESSION)
+            saved_settings = cursor.fetchone()
+            # the isolation level only changes between transactions
+            cursor.execute(SQLQueries.SET_LOAD_SESSION, DatabaseConfig.LOAD_SESSION_SETTINGS)
+            self.connection.autocommit = False
+            self._load_session = LoadSession(self.connection.commit, commit_batches, commit_seconds)
+            try:
+                yield self._load_session
+                self._load_session.commit()
+                # statements sent after the last batch, such as the data version bump
+                self.connection.commit()
+                logger.info(LogMessages.LOAD_SESSION_FINISHED.format(self._load_session.commits))
+            except BaseException as error:
+                logger.error(LogMessages.LOAD_SESSION_ROLLED_BACK.format(error))
+                self.connection.rollback()
+                raise
+            finally:
+                self._load_session = None
+                self.connection.autocommit = True
+                cursor.execute(SQLQueries.SET_LOAD_SESSION, saved_settings)
+        finally:
+            cursor.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Run the statements of the block as one transaction.
+
+        Inside a load session the block joins the session's open transaction
+        and the session holds its commits until the block is done; otherwise
+        autocommit is turned off for the block, which commits at its end and
+        rolls back if it fails.
+        """
+        if self._load_session is not None:
+            with self._load_session.hold():
+                yield
+            return
+
+        self.connection.autocommit = False
+        try:
+            yield
+            self.connection.commit()
+        except BaseException:
+            self.connection.rollback()
+            raise
+        finally:
+            self.connection.autocommit = True
+
+    def in_load_session(self) -> bool:
+        """Whether batches on this connection are grouped into transactions."""
+        return self._load_session is not None
+
+    def batch_sent(self) -> None:
+        """Tell the load session, when one is open, that an insert batch was sent."""
+        if self._load_session is not None:
+            self._load_session.batch_sent()
 
     def db_is_connected(self) -> bool:
         """Check if database is connected."""
@@ -63,17 +242,56 @@ class MySQLConnector:
         except (MYSQLError, Exception):
             return False
 
-    def get_cursor(self, dictionary: bool = False):
-        """Get database cursor for executing queries."""
+    def get_cursor(self, dictionary: bool = False, buffered: Optional[bool] = None, prepared: bool = False):
+        """
+        Get database cursor for executing queries.
+
+        :param dictionary: Return rows as dictionaries
+        :param buffered: False streams rows from the server as they are fetched;
+            None keeps the connection's default
+        :param prepared: The caller runs repeated single statements with execute
+            and fetches; in prepared mode they go through the connection's
+            statement cache, and buffered is ignored as prepared results are
+            always read from the server as they are fetched
+        """
         if not self.db_is_connected():
             logger.warning(LogMessages.DB_NOT_CONNECTED)
             raise ConnectionError(ErrorMessages.DB_NOT_CONNECTED)
 
+        if prepared and self.prepared:
+            return PreparedCursor(self._statement_cache(), dictionary)
+
         try:
-            return self.connection.cursor(dictionary=dictionary)
+            if buffered is None:
+                return self.connection.cursor(dictionary=dictionary)
+            return self.connection.cursor(dictionary=dictionary, buffered=buffered)
         except MYSQLError as error:
             logger.error(LogMessages.DB_CURSOR_MYSQL_ERROR.format(error))
             raise
         except Exception as e:
             logger.error(LogMessages.DB_CURSOR_UNEXPECTED_ERROR.format(e))
-            raise
\ No newline at end of file
+            raise
+
+    def _statement_cache(self) -> StatementCache:
+        """The statement cache of the current connection, started on first use."""
+        if self._statements is None or self._statements.connection is not self.connection:
+            self._statements = StatementCache(self.connection)
+        return self._statements
+
+    def _close_statements(self) -> None:
+        """Deallocate the connection's prepared statements before it closes or goes back to the pool."""
+        if self._statements is not None:
+            self._statements.close()
+            self._statements = None
+
+    def get_max_allowed_packet(self) -> int:
+        """Get the session's max_allowed_packet in bytes, queried once per connection."""
+        if self._max_allowed_packet is None:
+            cursor = self.get_cursor()
+            try:
+                cursor.execute(SQLQueries.SELECT_MAX_ALLOWED_PACKET)
+                (value,) = cursor.fetchone()
+                self._max_allowed_packet = int(value)
+            finally:
+                cursor.close()
+        return self._max_allowed_packet
@@ -1,22 +1,86 @@
 from abc import ABC, abstractmethod
 from src.app.database.database_connector import MySQLConnector, MYSQLError
-from typing import Generator
+from src.app.database.bulk_loader import BulkLoader, BulkLoadQueries
+from src.app.database.room_stats import RoomStatsMaintainer
+from src.app.database.data_version import bump_data_version
+from src.app.database.room_ids import RoomIdSet
+from src.app.database.batch_sizing import (
+    AdaptiveBatchSizer, MultiRowInsertBuilder, MultiRowTemplate, PACKET_ERRORS
+)
+from src.app.services.metrics import (
+    ROWS_INSERTED, INSERT_SECONDS, INSERT_ROWS_PER_SECOND, INSERT_STATEMENT_SECONDS, ROWS_REJECTED,
+    ROWS_SERVER_REJECTED
+)
+from src.app.services.data_validator import ORPHAN_ROOM_RULE
+from itertools import islice
+from operator import itemgetter
+from typing import Callable, Generator, Iterable, Optional
 from src.app.constants.sql_queries import SQLQueries
 from src.app.constants.application_config import ApplicationConfig
 from src.app.constants.messages import LogMessages, ErrorMessages
+import json
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# shard workers append to the same quarantine and reject files
+_append_lock = threading.Lock()
+
+
+def _append_json_lines(path: str, records: list[dict]) -> None:
+    """Append records to a file as JSON lines, dates and other values in their string form."""
+    lines = "".join(json.dumps(record, default=str) + "\n" for record in records)
+    with _append_lock:
+        with open(path, ApplicationConfig.FILE_MODE_APPEND, encoding=ApplicationConfig.DEFAULT_ENCODING) as file:
+            file.write(lines)
+
 
 class EntityRepository(ABC):
     """Base class for database operations on entities."""
 
-    def __init__(self, connector: MySQLConnector):
-        """Initialize with database connector."""
+    # table name used to label metrics
+    table_name = ""
+    # item fields in the order get_item_value() returns them; rows for insert_rows() are laid out alike
+    row_fields: tuple[str, ...] = ()
+
+    _insert_strategies = (
+        ApplicationConfig.EXECUTEMANY_STRATEGY,
+        ApplicationConfig.BULK_LOAD_STRATEGY,
+        ApplicationConfig.MULTI_ROW_STRATEGY,
+    )
+
+    def __init__(self, connector: MySQLConnector,
+                 insert_strategy: str = ApplicationConfig.EXECUTEMANY_STRATEGY,
+                 reject_path: Optional[str] = None, on_unstored: Optional[Callable[[list], None]] = None):
+        """
+        Initialize with database connector.
+
+        :param connector: Connected database connector
+        :param insert_strategy: 'executemany' for fixed-size batched upserts,
+            'multi_row' for packet-sized multi-row upserts with adaptive batch
+            size, or 'bulk_load' for LOAD DATA LOCAL INFILE through a staging table
+        :param reject_path: Recover from batches the server refuses for their
+            rows, writing the rows it refuses to this file; bulk loads do not recover
+        :param on_unstored: Called with the ids of items that were held back or
+            refused and so are not stored, e.g. IngestManifest.forget
+        """
+        if insert_strategy not in self._insert_strategies:
+            raise ValueError(ErrorMessages.UNKNOWN_INSERT_STRATEGY.format(insert_strategy))
+
         self.connector = connector
         self.batch_size = ApplicationConfig.DEFAULT_BATCH_SIZE
+        self.insert_strategy = insert_strategy
+        self.batch_sizer = AdaptiveBatchSizer()
+        self.reject_path = reject_path
+        self.on_unstored = on_unstored
+
+    @property
+    def queries(self):
+        """Query set of the connector's SQL dialect."""
+        return self.connector.queries
 
     @abstractmethod
     def insert_batch(self, items: Generator[dict, None, None]) -> None:
@@ -48,29 +112,246 @@ class EntityRepository(ABC):
         """
         pass
 
+    @abstractmethod
+    def get_has_rows_query(self) -> str:
+        """
+        Returns query that selects whether the table holds any row
+
+        :return: String
+        """
+        pass
+
+    @abstractmethod
+    def get_multi_row_template(self) -> MultiRowTemplate:
+        """
+        Returns the statement pieces used to build multi-row inserts
+
+        :return: MultiRowTemplate
+        """
+        pass
+
+    @abstractmethod
+    def get_bulk_load_queries(self) -> BulkLoadQueries:
+        """
+        Returns the staging table statements used by the bulk load strategy
+
+        :return: BulkLoadQueries
+        """
+        pass
+
+    def prepare_items(self, items: Iterable[dict]) -> Iterable[dict]:
+        """
+        Pass items on their way to the server, checking or recording them
+
+        :param items: Validated items about to be inserted
+        :return: The items to insert; all of them unless overridden
+        """
+        return items
+
+    def prepare_rows(self, rows: Iterable[tuple]) -> Iterable[tuple]:
+        """
+        prepare_items() for rows laid out as row_fields
+
+        :param rows: Validated rows about to be inserted
+        :return: The rows to insert; all of them unless overridden
+        """
+        return rows
+
+    def insert_rows(self, rows: Iterable[tuple]) -> None:
+        """
+        Insert rows laid out as row_fields, skipping the dictionary step of insert_batch()
+
+        :param rows: Validated row tuples, for example from RowLoader
+        :return: None
+        """
+        self.execute_row_insertion(self.prepare_rows(rows))
+
+    def _as_item(self, row: tuple) -> dict:
+        """The item a row was built from."""
+        return dict(zip(self.row_fields, row))
+
+    def has_rows(self) -> bool:
+        """Check whether the table holds any row."""
+        cursor = self.connector.get_cursor(prepared=True)
+        try:
+            cursor.execute(self.get_has_rows_query())
+            (has_rows,) = cursor.fetchone()
+            return bool(has_rows)
+        finally:
+            cursor.close()
+
     def execute_batch_insertion(self, items: Generator[dict, None, None]) -> None:
         """Execute batch insertion of items into database."""
+        self.execute_row_insertion(map(self.get_item_value, items))
+
+    def execute_row_insertion(self, rows: Iterable[tuple]) -> None:
+        """Execute batch insertion of row values into database."""
         if not self.connector.db_is_connected():
             raise ConnectionError(ErrorMessages.DB_NOT_CONNECTED)
 
+        started = time.perf_counter()
+        if self.insert_strategy == ApplicationConfig.BULK_LOAD_STRATEGY:
+            inserted = self._execute_bulk_load(rows)
+        elif self.insert_strategy == ApplicationConfig.MULTI_ROW_STRATEGY:
+            inserted = self._execute_multi_row(rows)
+        else:
+            inserted = self._execute_many(rows)
+
+        elapsed = time.perf_counter() - started
+        if inserted:
+            # outside a load session the rows are committed by now; inside one the
+            # token is written in the open transaction and commits together with them
+            bump_data_version(self.connector)
+        ROWS_INSERTED.inc(inserted, table=self.table_name)
+        INSERT_SECONDS.inc(elapsed, table=self.table_name)
+        if elapsed > 0:
+            INSERT_ROWS_PER_SECOND.set(inserted / elapsed, table=self.table_name)
+
+    def _execute_multi_row(self, rows: Iterable[tuple]) -> int:
+        """Insert rows with packet-sized multi-row statements and adaptive batch size."""
+        cursor = self.connector.get_cursor()
+
+        try:
+            builder = MultiRowInsertBuilder(self.get_multi_row_template(), self.connector.get_max_allowed_packet())
+            batch = []
+            inserted = 0
+
+            for row in rows:
+                batch.append(row)
+
+                if len(batch) >= self.batch_sizer.size:
+                    inserted += self._send(lambda group: self._insert_sized(cursor, builder, group), batch)
+                    batch = []
+
+            if batch:
+                inserted += self._send(lambda group: self._insert_sized(cursor, builder, group), batch)
+            return inserted
+
+        except MYSQLError as error:
+            logger.error(LogMessages.MYSQL_INSERTION_ERROR.format(error))
+            raise
+        except Exception as error:
+            logger.error(LogMessages.UNEXPECTED_INSERTION_ERROR.format(error))
+            raise
+        finally:
+            cursor.close()
+
+    def _send(self, send: Callable[[list[tuple]], None], rows: list[tuple]) -> int:
+        """
+        Send a batch, isolating the rows the server refuses when recovery is on,
+        and count it towards the connector's load session
+
+        A refused batch is split in halves that are sent again, recursively,
+        so k bad rows among n cost O(k log n) extra statements and the rest of
+        the load keeps its full batch size. Inserts are upserts, so resending
+        rows a backend committed before failing is harmless.
+
+        :param send: Sends rows in one or more statements
+        :param rows: Row values of the batch
+        :return: Number of rows inserted
+        """
+        if self.reject_path is None:
+            send(rows)
+            self.connector.batch_sent()
+            return len(rows)
+
+        rejects = []
+        inserted = self._bisect(send, rows, rejects)
+        self.connector.batch_sent()
+        if rejects:
+            self._unstored([reject["row"][self.row_fields.index('id')] for reject in rejects])
+            _append_json_lines(self.reject_path, rejects)
+            ROWS_SERVER_REJECTED.inc(len(rejects), table=self.table_name)
+            logger.warning(LogMessages.ROWS_REJECTED_BY_SERVER.format(len(rejects), self.table_name, self.reject_path))
+        return inserted
+
+    def _bisect(self, send: Callable[[list[tuple]], None], rows: list[tuple], rejects: list[dict]) -> int:
+        try:
+            send(rows)
+            return len(rows)
+        except self.connector.row_errors as error:
+            if len(rows) == 1:
+                rejects.append({
+                    "table": self.table_name, "row": list(rows[0]),
+                    "errno": getattr(error, "errno", None), "error": str(error),
+                })
+                return 0
+            logger.warning(LogMessages.BATCH_REFUSED_SPLITTING.format(len(rows), error))
+
+        middle = len(rows) // 2
+        return self._bisect(send, rows[:middle], rejects) + self._bisect(send, rows[middle:], rejects)
+
+    def _unstored(self, ids: list) -> None:
+        """Report the ids of items that are not stored."""
+        if self.on_unstored is not None:
+            self.on_unstored(ids)
+
+    def _insert_sized(self, cursor, builder: MultiRowInsertBuilder, rows: list[tuple]) -> None:
+        """Send rows as packet-sized statements, feeding latencies to the batch sizer."""
+        for group in builder.split(rows):
+            statement, params = builder.build(group)
+            started = time.perf_counter()
+            try:
+                cursor.execute(statement, params)
+                INSERT_STATEMENT_SECONDS.observe(
+                    time.perf_counter() - started, table=self.table_name, strategy=self.insert_strategy
+                )
+            except MYSQLError as error:
+                if error.errno not in PACKET_ERRORS or len(group) == 1:
+                    raise
+                # a packet the server refuses costs the connection and its open
+                # transaction, so only a refusal that left it standing is retried
+                if not self.connector.db_is_connected():
+                    logger.error(LogMessages.PACKET_TOO_LARGE_CONNECTION_LOST.format(len(group)))
+                    raise
+                logger.warning(LogMessages.PACKET_TOO_LARGE_RETRY.format(len(group)))
+                builder.record_packet_error(group)
+                self.batch_sizer.record_packet_error()
+                self._insert_sized(cursor, builder, group)
+                continue
+
+            self.batch_sizer.record(len(group), time.perf_counter() - started)
+            logger.info(LogMessages.ITEMS_INSERTED.format(len(group)))
+
+    def _execute_bulk_load(self, rows: Iterable[tuple]) -> int:
+        """Load rows with LOAD DATA LOCAL INFILE through a staging table."""
+        try:
+            loader = BulkLoader(
+                self.connector, self.get_bulk_load_queries(), file_format=self.queries.BULK_LOAD_FILE_FORMAT
+            )
+            loaded = loader.load(rows)
+            logger.info(LogMessages.ITEMS_INSERTED.format(loaded))
+            return loaded
+        except MYSQLError as error:
+            logger.error(LogMessages.MYSQL_INSERTION_ERROR.format(error))
+            raise
+        except Exception as error:
+            logger.error(LogMessages.UNEXPECTED_INSERTION_ERROR.format(error))
+            raise
+
+    def _execute_many(self, rows: Iterable[tuple]) -> int:
+        """Insert rows in batches of batch_size with executemany."""
         cursor = self.connector.get_cursor()
 
         try:
             query = self.get_insert_query()
             batch = []
+            inserted = 0
 
-            for item in items:
-                unpack_item = self.get_item_value(item)
-                batch.append(unpack_item)
+            for row in rows:
+                batch.append(row)
 
                 if len(batch) >= self.batch_size:
-                    cursor.executemany(query, batch)
-                    logger.info(LogMessages.ITEMS_INSERTED.format(len(batch)))
+                    sent = self._send(lambda group: self._execute_many_timed(cursor, query, group), batch)
+                    inserted += sent
+                    logger.info(LogMessages.ITEMS_INSERTED.format(sent))
                     batch = []
 
             if batch:
-                cursor.executemany(query, batch)
-                logger.info(LogMessages.FINAL_BATCH_INSERTED.format(len(batch)))
+                sent = self._send(lambda group: self._execute_many_timed(cursor, query, group), batch)
+                inserted += sent
+                logger.info(LogMessages.FINAL_BATCH_INSERTED.format(sent))
+            return inserted
 
         except MYSQLError as error:
             logger.error(LogMessages.MYSQL_INSERTION_ERROR.format(error))
@@ -81,33 +362,138 @@ class EntityRepository(ABC):
         finally:
             cursor.close()
 
+    def _execute_many_timed(self, cursor, query: str, batch: list[tuple]) -> None:
+        """Run one executemany call, recording its latency."""
+        with INSERT_STATEMENT_SECONDS.time(table=self.table_name, strategy=self.insert_strategy):
+            cursor.executemany(query, batch)
+
 
 class RoomRepository(EntityRepository):
     """Repository for room data operations."""
 
+    table_name = SQLQueries.ROOMS_TABLE
+    row_fields = ("id", "name")
+
+    def __init__(self, connector: MySQLConnector,
+                 insert_strategy: str = ApplicationConfig.EXECUTEMANY_STRATEGY,
+                 room_ids: Optional[RoomIdSet] = None, reject_path: Optional[str] = None,
+                 on_unstored: Optional[Callable[[list], None]] = None):
+        """
+        Initialize with database connector.
+
+        :param connector: Connected database connector
+        :param insert_strategy: See EntityRepository
+        :param room_ids: Filled with the id of every room inserted, for students to be checked against
+        :param reject_path: See EntityRepository
+        :param on_unstored: See EntityRepository
+        """
+        super().__init__(connector, insert_strategy, reject_path, on_unstored)
+        self.room_ids = room_ids
+
     def get_insert_query(self) -> str:
         """Get SQL query for room insertion."""
         return (
-            SQLQueries.INSERT_ROOM_QUERY
+            self.queries.INSERT_ROOM_QUERY
         )
 
     def get_item_value(self, item: dict) -> tuple:
         """Extract room values from dictionary."""
         return item['id'], item['name']
 
+    def get_has_rows_query(self) -> str:
+        """Get SQL query checking for any room."""
+        return self.queries.ROOMS_HAS_ROWS
+
+    def get_multi_row_template(self) -> MultiRowTemplate:
+        """Get multi-row insert pieces for rooms."""
+        return MultiRowTemplate(
+            SQLQueries.INSERT_ROOMS_PREFIX, SQLQueries.ROOM_VALUES_ROW, SQLQueries.UPSERT_ROOMS_SUFFIX
+        )
+
+    def get_bulk_load_queries(self) -> BulkLoadQueries:
+        """Get staging table statements for room bulk loads."""
+        return BulkLoadQueries(
+            self.queries.CREATE_ROOMS_STAGING_TABLE,
+            self.queries.LOAD_ROOMS_STAGING,
+            self.queries.MERGE_ROOMS_STAGING,
+            self.queries.CLEAR_ROOMS_STAGING,
+            self.queries.DROP_ROOMS_STAGING_TABLE,
+        )
+
+    def prepare_items(self, rooms: Iterable[dict]) -> Iterable[dict]:
+        """Record the id of each room as it streams to the server."""
+        if self.room_ids is None:
+            return rooms
+        return self._recorded(rooms, itemgetter('id'))
+
+    def prepare_rows(self, rows: Iterable[tuple]) -> Iterable[tuple]:
+        """Record the id of each room row as it streams to the server."""
+        if self.room_ids is None:
+            return rows
+        return self._recorded(rows, itemgetter(self.row_fields.index('id')))
+
+    def _recorded(self, rooms: Iterable, id_of: Callable) -> Generator:
+        for room in rooms:
+            self.room_ids.add(id_of(room))
+            yield room
+
+    def load_room_ids(self) -> None:
+        """Add the ids of the rooms already stored, which students may reference too."""
+        cursor = self.connector.get_cursor()
+        try:
+            cursor.execute(self.queries.SELECT_ROOM_IDS)
+            while rows := cursor.fetchmany(self.batch_size):
+                self.room_ids.update(room_id for (room_id,) in rows)
+        finally:
+            cursor.close()
+
     def insert_batch(self, rooms: Generator[dict, None, None]) -> None:
         """Insert batch of rooms into database."""
-        self.execute_batch_insertion(rooms)
+        self.execute_batch_insertion(self.prepare_items(rooms))
+        logger.info(LogMessages.ROOM_INSERTION_COMPLETED)
+
+    def insert_rows(self, rows: Iterable[tuple]) -> None:
+        """Insert room rows into database."""
+        super().insert_rows(rows)
         logger.info(LogMessages.ROOM_INSERTION_COMPLETED)
 
 
 class StudentRepository(EntityRepository):
     """Repository for student data operations."""
 
+    table_name = SQLQueries.STUDENTS_TABLE
+    row_fields = ("id", "name", "birthday", "sex", "room")
+
+    def __init__(self, connector: MySQLConnector,
+                 insert_strategy: str = ApplicationConfig.EXECUTEMANY_STRATEGY,
+                 maintain_room_stats: bool = False, room_ids: Optional[RoomIdSet] = None,
+                 quarantine_path: Optional[str] = None, reject_path: Optional[str] = None,
+                 on_unstored: Optional[Callable[[list], None]] = None):
+        """
+        Initialize with database connector.
+
+        :param connector: Connected database connector
+        :param insert_strategy: See EntityRepository
+        :param maintain_room_stats: Update the RoomStats table as students are upserted
+        :param room_ids: Ids of every existing room; students referencing another
+            room are kept from the server instead of failing their whole batch
+        :param quarantine_path: File those students are appended to as JSON lines;
+            they are only counted when not given
+        :param reject_path: See EntityRepository; RoomStats assume every row of a
+            chunk is stored, so it cannot be combined with maintain_room_stats
+        :param on_unstored: See EntityRepository; held back students are reported too
+        """
+        if maintain_room_stats and reject_path is not None:
+            raise ValueError(ErrorMessages.REJECTS_WITH_ROOM_STATS)
+        super().__init__(connector, insert_strategy, reject_path, on_unstored)
+        self.room_stats = RoomStatsMaintainer(connector) if maintain_room_stats else None
+        self.room_ids = room_ids
+        self.quarantine_path = quarantine_path
+
     def get_insert_query(self) -> str:
         """Get SQL query for student insertion."""
         return (
-            SQLQueries.INSERT_STUDENT_QUERY
+            self.queries.INSERT_STUDENT_QUERY
         )
 
     def get_item_value(self, item: dict) -> tuple:
@@ -120,7 +506,95 @@ class StudentRepository(EntityRepository):
             item['room']
         )
 
+    def get_has_rows_query(self) -> str:
+        """Get SQL query checking for any student."""
+        return self.queries.STUDENTS_HAS_ROWS
+
+    def get_multi_row_template(self) -> MultiRowTemplate:
+        """Get multi-row insert pieces for students."""
+        return MultiRowTemplate(
+            SQLQueries.INSERT_STUDENTS_PREFIX, SQLQueries.STUDENT_VALUES_ROW, SQLQueries.UPSERT_STUDENTS_SUFFIX
+        )
+
+    def get_bulk_load_queries(self) -> BulkLoadQueries:
+        """Get staging table statements for student bulk loads."""
+        return BulkLoadQueries(
+            self.queries.CREATE_STUDENTS_STAGING_TABLE,
+            self.queries.LOAD_STUDENTS_STAGING,
+            self.queries.MERGE_STUDENTS_STAGING,
+            self.queries.CLEAR_STUDENTS_STAGING,
+            self.queries.DROP_STUDENTS_STAGING_TABLE,
+        )
+
+    def prepare_items(self, students: Iterable[dict]) -> Iterable[dict]:
+        """Hold back students whose room is not in room_ids."""
+        if self.room_ids is None:
+            return students
+        return self._referenced(students, itemgetter('room'), dict)
+
+    def prepare_rows(self, rows: Iterable[tuple]) -> Iterable[tuple]:
+        """Hold back student rows whose room is not in room_ids."""
+        if self.room_ids is None:
+            return rows
+        return self._referenced(rows, itemgetter(self.row_fields.index('room')), self._as_item)
+
+    def _referenced(self, students: Iterable, room_of: Callable, as_item: Callable[..., dict]) -> Generator:
+        orphans = []
+        orphan_ids = []
+        skipped = 0
+        for student in students:
+            if room_of(student) in self.room_ids:
+                yield student
+                continue
+
+            skipped += 1
+            if self.on_unstored is not None:
+                orphan_ids.append(as_item(student)['id'])
+            if self.quarantine_path is not None:
+                orphans.append(as_item(student))
+                if len(orphans) >= self.batch_size:
+                    self._quarantine(orphans)
+                    orphans = []
+
+        if orphans:
+            self._quarantine(orphans)
+        if orphan_ids:
+            self._unstored(orphan_ids)
+        if skipped:
+            ROWS_REJECTED.inc(skipped, type=ApplicationConfig.STUDENT_STRATEGY, reason=ORPHAN_ROOM_RULE)
+            if self.quarantine_path is None:
+                logger.warning(LogMessages.ORPHAN_STUDENTS_SKIPPED.format(skipped))
+            else:
+                logger.warning(LogMessages.ORPHAN_STUDENTS_QUARANTINED.format(skipped, self.quarantine_path))
+
+    def _quarantine(self, students: list[dict]) -> None:
+        """Append students to the quarantine file."""
+        _append_json_lines(self.quarantine_path, students)
+
     def insert_batch(self, students: Generator[dict, None, None]) -> None:
-        """Insert batch of students into database."""
-        self.execute_batch_insertion(students)
+        """
+        Insert batch of students into database, keeping RoomStats in step when enabled.
+
+        With RoomStats maintenance each chunk is captured, upserted and applied
+        in one transaction, the captured students locked until it commits. This
+        repository must be the only writer of Students while it runs; see
+        RoomStatsMaintainer.
+        """
+        students = self.prepare_items(students)
+        if self.room_stats is None:
+            self.execute_batch_insertion(students)
+        else:
+            while chunk := list(islice(students, ApplicationConfig.ROOM_STATS_CHUNK_SIZE)):
+                with self.connector.transaction():
+                    previous = self.room_stats.capture(chunk)
+                    self.execute_batch_insertion(iter(chunk))
+                    self.room_stats.apply(chunk, previous)
+        logger.info(LogMessages.STUDENT_INSERTION_COMPLETED)
+
+    def insert_rows(self, rows: Iterable[tuple]) -> None:
+        """Insert student rows into database; RoomStats maintenance works on items, so rows become items for it."""
+        if self.room_stats is not None:
+            self.insert_batch(map(self._as_item, rows))
+            return
+        super().insert_rows(rows)
         logger.info(LogMessages.STUDENT_INSERTION_COMPLETED)
\ No newline at end of file
@@ -0,0 +1,66 @@
+import time
+import logging
+from contextlib import contextmanager
+from typing import Callable, Iterator
+from src.app.constants.application_config import ApplicationConfig
+from src.app.constants.messages import LogMessages
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class LoadSession:
+    """
+    Groups insert batches into transactions.
+
+    Repositories report each batch they sent through their connector's
+    batch_sent(); the session commits once commit_batches batches or
+    commit_seconds of work have accumulated, so a commit and its log flush
+    are paid per group instead of per batch.
+    """
+
+    def __init__(self, commit: Callable[[], None],
+                 commit_batches: int = ApplicationConfig.LOAD_SESSION_COMMIT_BATCHES,
+                 commit_seconds: float = ApplicationConfig.LOAD_SESSION_COMMIT_SECONDS):
+        """
+        Args:
+            commit: Commits the connection's open transaction
+            commit_batches: Batches grouped into one transaction at most
+            commit_seconds: Seconds of work grouped into one transaction at most
+        """
+        self._commit = commit
+        self.commit_batches = commit_batches
+        self.commit_seconds = commit_seconds
+        self.commits = 0
+        self.pending = 0
+        self._held = 0
+        self._started = time.monotonic()
+
+    def batch_sent(self) -> None:
+        """Count a batch, committing when the group is full or old enough."""
+        self.pending += 1
+        if not self._held and self._due():
+            self.commit()
+
+    @contextmanager
+    def hold(self) -> Iterator[None]:
+        """Keep batches sent inside the block in one transaction, deferring a due commit to its end."""
+        self._held += 1
+        try:
+            yield
+        finally:
+            self._held -= 1
+        if not self._held and self._due():
+            self.commit()
+
+    def _due(self) -> bool:
+        return self.pending >= self.commit_batches or time.monotonic() - self._started >= self.commit_seconds
+
+    def commit(self) -> None:
+        """Commit the batches sent so far."""
+        if self.pending:
+            self._commit()
+            self.commits += 1
+            logger.debug(LogMessages.LOAD_SESSION_COMMITTED.format(self.pending))
+        self.pending = 0
+        self._started = time.monotonic()
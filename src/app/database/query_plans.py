@@ -0,0 +1,268 @@
+import re
+import json
+import uuid
+import logging
+from datetime import date
+from typing import NamedTuple, Optional
+from src.app.database.database_connector import MySQLConnector
+from src.app.services.reporting_service import report_params
+from src.app.constants.sql_queries import SQLQueries
+from src.app.constants.sqlite_queries import SQLiteQueries
+from src.app.constants.duckdb_queries import DuckDBQueries
+from src.app.constants.application_config import ApplicationConfig
+from src.app.constants.messages import LogMessages, ErrorMessages
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# read queries whose plans are tracked; they run against the base schema alone
+PLANNED_QUERIES = (
+    "ROOMS_WITH_STUDENTS_COUNT",
+    "TOP_5_LEAST_AVERAGE_AGE_ROOMS",
+    "TOP_5_LARGEST_AGE_DIFF_ROOMS",
+    "ROOMS_WITH_DIFFERENT_SEX",
+    "ROOM_AGE_SUMMARY",
+    "COUNT_ORPHAN_STUDENTS",
+)
+
+PLAN_CAPTURE_COMMENT = "/* plan capture {} */ "
+FULL_SCAN = "ALL"
+FULL_SCAN_REGRESSION = "full_scan"
+LOST_INDEX_REGRESSION = "lost_index"
+FILESORT_REGRESSION = "filesort"
+TEMPORARY_REGRESSION = "temporary"
+ROWS_REGRESSION = "rows"
+
+_SQLITE_INDEX = re.compile(r"USING (?:COVERING )?INDEX (\w+)")
+_SQLITE_RANGE = re.compile(r"\([^)]*[<>][^)]*\)")
+
+
+class PlanRegression(NamedTuple):
+    """One way a query plan got worse than its baseline."""
+    query: str
+    table: str
+    kind: str
+    baseline: object
+    current: object
+
+    def __str__(self) -> str:
+        return LogMessages.QUERY_PLAN_REGRESSION.format(
+            self.query, self.table, self.kind, self.baseline, self.current
+        )
+
+
+def _plan(tables: list[dict], filesort: bool = False, temporary: bool = False) -> dict:
+    """Plan in the dialect-neutral form baselines store."""
+    return {"tables": tables, "filesort": filesort, "temporary": temporary}
+
+
+def _table_access(table: str, access: str, key: Optional[str], rows: Optional[int]) -> dict:
+    return {"table": table, "access": access, "key": key, "rows": rows}
+
+
+def _mysql_plan(explained: str) -> dict:
+    """
+    Normalize EXPLAIN FORMAT=JSON output.
+
+    :param explained: JSON document MySQL returns
+    :return: Table accesses in join order, plus filesort and temporary table use anywhere in the plan
+    """
+    tables = []
+    flags = {"filesort": False, "temporary": False}
+
+    def walk(node):
+        if isinstance(node, dict):
+            if "table_name" in node:
+                rows = node.get("rows_examined_per_scan")
+                tables.append(_table_access(
+                    node["table_name"], node.get("access_type"), node.get("key"),
+                    None if rows is None else int(rows)
+                ))
+            flags["filesort"] |= node.get("using_filesort") is True
+            flags["temporary"] |= node.get("using_temporary_table") is True
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(json.loads(explained))
+    return _plan(tables, **flags)
+
+
+def _sqlite_plan(rows: list[tuple]) -> dict:
+    """
+    Normalize EXPLAIN QUERY PLAN rows into MySQL's access types.
+
+    SCAN without an index is a full scan (ALL) and with one a full index scan
+    (index); SEARCH is a primary key lookup (eq_ref), an index range (range)
+    or an index lookup (ref). Temporary B-trees for ORDER BY count as a
+    filesort, others as a temporary table. SQLite gives no row estimates.
+    """
+    tables = []
+    filesort = temporary = False
+    for row in rows:
+        detail = row[-1]
+        words = detail.split()
+        if words[0] in ("SCAN", "SEARCH") and len(words) > 1:
+            if "PRIMARY KEY" in detail:
+                key = "PRIMARY"
+            else:
+                match = _SQLITE_INDEX.search(detail)
+                key = match.group(1) if match else None
+
+            if words[0] == "SCAN":
+                access = FULL_SCAN if key is None else "index"
+            elif _SQLITE_RANGE.search(detail):
+                access = "range"
+            else:
+                access = "eq_ref" if key == "PRIMARY" else "ref"
+            tables.append(_table_access(words[1], access, key, None))
+        elif detail.startswith("USE TEMP B-TREE"):
+            if detail.endswith("ORDER BY"):
+                filesort = True
+            else:
+                temporary = True
+    return _plan(tables, filesort, temporary)
+
+
+def _duckdb_plan(rows: list[tuple]) -> dict:
+    """
+    Normalize DuckDB's JSON physical plan.
+
+    Sequential scans are full scans and index scans lookups (ref); an ORDER_BY
+    operator counts as a filesort. Row counts are the optimizer's estimated
+    cardinalities.
+    """
+    tables = []
+    flags = {"filesort": False, "temporary": False}
+
+    def walk(node):
+        name = node.get("name", "").strip()
+        info = node.get("extra_info", {})
+        if name in ("SEQ_SCAN", "INDEX_SCAN") and "Table" in info:
+            estimate = info.get("Estimated Cardinality")
+            tables.append(_table_access(
+                info["Table"].rsplit(".", 1)[-1],
+                FULL_SCAN if name == "SEQ_SCAN" else "ref",
+                None if name == "SEQ_SCAN" else info.get("Index"),
+                int(estimate.lstrip("~")) if estimate is not None else None
+            ))
+        flags["filesort"] |= name == "ORDER_BY"
+        for child in node.get("children", []):
+            walk(child)
+
+    for node in json.loads(rows[0][1]):
+        walk(node)
+    return _plan(tables, **flags)
+
+
+_NORMALIZERS = {
+    SQLQueries.DIALECT: lambda rows: _mysql_plan(rows[0][0]),
+    SQLiteQueries.DIALECT: _sqlite_plan,
+    DuckDBQueries.DIALECT: _duckdb_plan,
+}
+
+
+def capture_plans(connector: MySQLConnector, as_of: Optional[date] = None) -> dict:
+    """
+    Explain every tracked query on the connector's backend.
+
+    :param connector: Connected connector whose schema exists
+    :param as_of: Date passed to the queries computing ages, today when not given
+    :return: Baseline document with the dialect, as-of date and one plan per query
+    """
+    queries = connector.queries
+    as_of = as_of or date.today()
+    # SQLite plans EXPLAIN statements when they are prepared and the driver caches
+    # prepared statements, so unique text keeps a capture from seeing an old schema
+    capture = PLAN_CAPTURE_COMMENT.format(uuid.uuid4().hex)
+    plans = {}
+    cursor = connector.get_cursor()
+    try:
+        for attribute in PLANNED_QUERIES:
+            params = report_params(attribute, as_of)
+            cursor.execute(capture + queries.EXPLAIN_QUERY.format(getattr(queries, attribute)), params)
+            plans[attribute] = _NORMALIZERS[queries.DIALECT](cursor.fetchall())
+    finally:
+        cursor.close()
+
+    logger.info(LogMessages.QUERY_PLANS_CAPTURED.format(len(plans), queries.DIALECT))
+    return {"dialect": queries.DIALECT, "as_of": as_of.isoformat(), "plans": plans}
+
+
+def save_baseline(path: str, captured: dict) -> None:
+    """Write captured plans as a baseline file."""
+    with open(path, ApplicationConfig.FILE_MODE_WRITE, encoding=ApplicationConfig.DEFAULT_ENCODING) as file:
+        json.dump(captured, file, indent=2, sort_keys=True)
+        file.write("\n")
+
+
+def load_baseline(path: str) -> dict:
+    """Read a baseline file written by save_baseline()."""
+    with open(path, ApplicationConfig.FILE_MODE_READ, encoding=ApplicationConfig.DEFAULT_ENCODING) as file:
+        return json.load(file)
+
+
+def _compare_query(query: str, baseline: dict, current: dict, row_growth: float) -> list[PlanRegression]:
+    """Regressions of one query's plan; tables the baseline does not know are skipped."""
+    regressions = []
+    known = {access["table"]: access for access in baseline["tables"]}
+    for access in current["tables"]:
+        table = access["table"]
+        before = known.get(table)
+        if before is None:
+            continue
+        if access["access"] == FULL_SCAN and before["access"] != FULL_SCAN:
+            regressions.append(PlanRegression(query, table, FULL_SCAN_REGRESSION, before["access"], access["access"]))
+        if before["key"] is not None and access["key"] is None:
+            regressions.append(PlanRegression(query, table, LOST_INDEX_REGRESSION, before["key"], access["key"]))
+        if before["rows"] and access["rows"] is not None and access["rows"] > before["rows"] * row_growth:
+            regressions.append(PlanRegression(query, table, ROWS_REGRESSION, before["rows"], access["rows"]))
+
+    tables = ", ".join(access["table"] for access in current["tables"])
+    if current["filesort"] and not baseline["filesort"]:
+        regressions.append(PlanRegression(query, tables, FILESORT_REGRESSION, False, True))
+    if current["temporary"] and not baseline["temporary"]:
+        regressions.append(PlanRegression(query, tables, TEMPORARY_REGRESSION, False, True))
+    return regressions
+
+
+def compare_plans(baseline: dict, current: dict,
+                  row_growth: float = ApplicationConfig.QUERY_PLAN_ROW_GROWTH) -> list[PlanRegression]:
+    """
+    Find plans that got worse than their baseline.
+
+    A table newly read by a full scan, a table no longer read through an
+    index, a filesort or temporary table that was not there before and an
+    estimated row count grown by more than row_growth all count. Queries
+    missing from the baseline are not checked.
+
+    :param baseline: Document from capture_plans() or load_baseline()
+    :param current: Document from capture_plans()
+    :param row_growth: Factor estimated rows may grow by
+    :return: Every regression found, in query order
+    """
+    if baseline["dialect"] != current["dialect"]:
+        raise ValueError(ErrorMessages.PLAN_DIALECT_MISMATCH.format(baseline["dialect"], current["dialect"]))
+
+    regressions = []
+    for query, plan in current["plans"].items():
+        if query in baseline["plans"]:
+            regressions.extend(_compare_query(query, baseline["plans"][query], plan, row_growth))
+
+    for regression in regressions:
+        logger.warning(str(regression))
+    return regressions
+
+
+def check_plans(connector: MySQLConnector, baseline_path: str) -> list[PlanRegression]:
+    """
+    Capture current plans at the baseline's as-of date and compare them with it.
+
+    :param connector: Connected connector whose schema exists
+    :param baseline_path: Baseline file written by save_baseline()
+    :return: Every regression found
+    """
+    baseline = load_baseline(baseline_path)
+    return compare_plans(baseline, capture_plans(connector, date.fromisoformat(baseline["as_of"])))
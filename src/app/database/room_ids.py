@@ -0,0 +1,55 @@
+from typing import Iterable
+from src.app.constants.application_config import ApplicationConfig
+
+
+class RoomIdSet:
+    """
+    Set of room ids held as a bitmap.
+
+    Ids below bitmap_limit take one bit each, so a million rooms fit in
+    125 KiB instead of the tens of megabytes a set of ints needs; the rare
+    larger id falls back to a regular set. Ids are added by the thread
+    inserting rooms and only read once students are inserted, so lookups
+    from several insert threads need no lock.
+    """
+
+    def __init__(self, bitmap_limit: int = ApplicationConfig.ROOM_ID_BITMAP_LIMIT):
+        """
+        Args:
+            bitmap_limit: Ids from 0 up to this value are kept in the bitmap
+        """
+        self.bitmap_limit = bitmap_limit
+        self._bits = bytearray()
+        self._overflow = set()
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, room_id) -> bool:
+        if isinstance(room_id, int) and 0 <= room_id < self.bitmap_limit:
+            index = room_id >> 3
+            return index < len(self._bits) and bool(self._bits[index] >> (room_id & 7) & 1)
+        return room_id in self._overflow
+
+    def add(self, room_id: int) -> None:
+        """Record a room id."""
+        if not 0 <= room_id < self.bitmap_limit:
+            if room_id not in self._overflow:
+                self._overflow.add(room_id)
+                self._count += 1
+            return
+
+        index = room_id >> 3
+        if index >= len(self._bits):
+            # grow geometrically so streaming ascending ids costs amortized constant time
+            self._bits.extend(bytes(max(index + 1 - len(self._bits), len(self._bits))))
+        mask = 1 << (room_id & 7)
+        if not self._bits[index] & mask:
+            self._bits[index] |= mask
+            self._count += 1
+
+    def update(self, room_ids: Iterable[int]) -> None:
+        """Record every id of an iterable."""
+        for room_id in room_ids:
+            self.add(room_id)
@@ -0,0 +1,144 @@
+import logging
+from datetime import date, datetime
+from typing import Optional
+from src.app.database.database_connector import MySQLConnector
+from src.app.constants.sql_queries import SQLQueries
+from src.app.constants.messages import LogMessages
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# MySQL TO_DAYS() counts from year 0, Python ordinals from 0001-01-01
+_TO_DAYS_OFFSET = 365
+
+
+def to_birthday(value) -> date:
+    """Normalize a birthday from the JSON input or the database to a date."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(value[:10])
+
+
+def to_days(birthday: date) -> int:
+    """Day number of a date as MySQL's TO_DAYS() computes it."""
+    return birthday.toordinal() + _TO_DAYS_OFFSET
+
+
+class _RoomDelta:
+    """Accumulated change to one room's statistics."""
+
+    __slots__ = ("count", "sum_days", "male", "female", "min_added", "max_added", "lost_student")
+
+    def __init__(self):
+        self.count = 0
+        self.sum_days = 0
+        self.male = 0
+        self.female = 0
+        self.min_added: Optional[date] = None
+        self.max_added: Optional[date] = None
+        self.lost_student = False
+
+    def add(self, birthday: date, sex: str) -> None:
+        """Account for a student entering the room."""
+        self._shift(birthday, sex, 1)
+        self.min_added = birthday if self.min_added is None else min(self.min_added, birthday)
+        self.max_added = birthday if self.max_added is None else max(self.max_added, birthday)
+
+    def remove(self, birthday: date, sex: str) -> None:
+        """Account for a student leaving the room."""
+        self._shift(birthday, sex, -1)
+        self.lost_student = True
+
+    def _shift(self, birthday: date, sex: str, sign: int) -> None:
+        self.count += sign
+        self.sum_days += sign * to_days(birthday)
+        if sex == "M":
+            self.male += sign
+        elif sex == "F":
+            self.female += sign
+
+
+class RoomStatsMaintainer:
+    """
+    Keeps the RoomStats summary table in step with student upserts.
+
+    capture() reads the stored state of a chunk of students before it is
+    upserted and apply() turns old/new differences into per-room deltas, so
+    a student moving rooms is subtracted from the old room and added to the
+    new one. Unchanged students produce no work.
+
+    capture() locks the stored rows it reads, so it has to run in the same
+    transaction as the upsert and apply() that follow it. The table is
+    assumed to have a single writer of Students while it is maintained:
+    students that do not exist yet are not locked by capture(), so two
+    writers inserting the same new student would both count it.
+    """
+
+    def __init__(self, connector: MySQLConnector):
+        """Initialize with database connector."""
+        self.connector = connector
+
+    def capture(self, students: list[dict]) -> dict[int, tuple]:
+        """
+        Read and lock the stored state of the given students.
+
+        :param students: Validated student items about to be upserted
+        :return: (birthday, sex, room_id) keyed by student id, for students already stored
+        """
+        student_ids = list({student["id"] for student in students})
+        if not student_ids:
+            return {}
+
+        cursor = self.connector.get_cursor()
+        try:
+            cursor.execute(
+                SQLQueries.SELECT_STUDENTS_BY_ID.format(", ".join(["%s"] * len(student_ids))),
+                student_ids
+            )
+            return {
+                student_id: (to_birthday(birthday), sex, room_id)
+                for student_id, birthday, sex, room_id in cursor.fetchall()
+            }
+        finally:
+            cursor.close()
+
+    def apply(self, students: list[dict], previous: dict[int, tuple]) -> None:
+        """
+        Apply the statistics change caused by upserting the given students.
+
+        :param students: Student items that were upserted, later duplicates winning
+        :param previous: Output of capture() taken before the upsert
+        """
+        latest = {student["id"]: student for student in students}
+        deltas: dict[int, _RoomDelta] = {}
+
+        for student_id, student in latest.items():
+            current = (to_birthday(student["birthday"]), student["sex"], student["room"])
+            stored = previous.get(student_id)
+            if stored == current:
+                continue
+            if stored is not None and stored[2] is not None:
+                deltas.setdefault(stored[2], _RoomDelta()).remove(stored[0], stored[1])
+            deltas.setdefault(current[2], _RoomDelta()).add(current[0], current[1])
+
+        if not deltas:
+            return
+
+        cursor = self.connector.get_cursor()
+        try:
+            cursor.executemany(SQLQueries.APPLY_ROOM_STATS_DELTA, [
+                (room_id, delta.count, delta.min_added, delta.max_added, delta.sum_days, delta.male, delta.female)
+                for room_id, delta in deltas.items()
+            ])
+
+            left_rooms = [room_id for room_id, delta in deltas.items() if delta.lost_student]
+            if left_rooms:
+                cursor.execute(
+                    SQLQueries.REFRESH_ROOM_STATS_BOUNDS.format(", ".join(["%s"] * len(left_rooms))),
+                    left_rooms
+                )
+            logger.info(LogMessages.ROOM_STATS_UPDATED.format(len(deltas)))
+        finally:
+            cursor.close()
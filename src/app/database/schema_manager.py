@@ -1,5 +1,9 @@
 from src.app.database.database_connector import MySQLConnector
+from src.app.database.data_version import create_data_version
 from mysql.connector import Error as MYSQLError
+from mysql.connector.errors import IntegrityError
+from contextlib import contextmanager
+from typing import Iterator
 from src.app.constants.sql_queries import SQLQueries
 from src.app.constants.messages import LogMessages, ErrorMessages
 import logging
@@ -8,34 +12,113 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
-def _drop_rooms_table(cursor):
+def _drop_rooms_table(cursor, queries=SQLQueries):
     """Drop the rooms table from database."""
-    cursor.execute(SQLQueries.DROP_ROOMS_TABLE)
+    cursor.execute(queries.DROP_ROOMS_TABLE)
     logger.info(LogMessages.ROOMS_TABLE_DROPPED)
 
 
-def _drop_students_table(cursor):
+def _drop_students_table(cursor, queries=SQLQueries):
     """Drop the students table from database."""
-    cursor.execute(SQLQueries.DROP_STUDENTS_TABLE)
+    cursor.execute(queries.DROP_STUDENTS_TABLE)
     logger.info(LogMessages.STUDENTS_TABLE_DROPPED)
 
 
-def _create_students_schema(cursor):
+def _drop_data_version_table(cursor, queries=SQLQueries):
+    """Drop the data version table from database."""
+    cursor.execute(queries.DROP_DATA_VERSION_TABLE)
+
+
+def _drop_room_stats_table(cursor, queries=SQLQueries):
+    """Drop the room statistics table from database."""
+    cursor.execute(queries.DROP_ROOM_STATS_TABLE)
+    logger.info(LogMessages.ROOM_STATS_TABLE_DROPPED)
+
+
+def _create_room_stats_schema(cursor):
+    """Create the room statistics table in database."""
+    cursor.execute(
+        SQLQueries.CREATE_ROOM_STATS_TABLE
+    )
+    logger.info(LogMessages.ROOM_STATS_TABLE_CREATED)
+
+
+def _rebuild_room_stats(cursor):
+    """Recompute every room's statistics from the Students table."""
+    cursor.execute(SQLQueries.CLEAR_ROOM_STATS)
+    cursor.execute(SQLQueries.REBUILD_ROOM_STATS)
+    logger.info(LogMessages.ROOM_STATS_REBUILT)
+
+
+def _create_students_schema(cursor, queries=SQLQueries):
     """Create the students table in database."""
     cursor.execute(
-        SQLQueries.CREATE_STUDENTS_TABLE
+        queries.CREATE_STUDENTS_TABLE
     )
     logger.info(LogMessages.STUDENTS_TABLE_CREATED)
 
 
-def _create_rooms_schema(cursor):
+def _create_rooms_schema(cursor, queries=SQLQueries):
     """Create the rooms table in database."""
     cursor.execute(
-        SQLQueries.CREATE_ROOMS_TABLE
+        queries.CREATE_ROOMS_TABLE
     )
     logger.info(LogMessages.ROOMS_TABLE_CREATED)
 
 
+def _secondary_indexes(cursor, table: str) -> list[str]:
+    """Names of every non-primary index on a table."""
+    cursor.execute(SQLQueries.SELECT_SECONDARY_INDEXES, (table,))
+    return [name for (name,) in cursor.fetchall()]
+
+
+def _foreign_keys(cursor, table: str) -> list[str]:
+    """Names of every foreign key declared on a table."""
+    cursor.execute(SQLQueries.SELECT_FOREIGN_KEYS, (table,))
+    return [name for (name,) in cursor.fetchall()]
+
+
+def _build_student_indexes(cursor):
+    """Add missing declared indexes and the room foreign key in a single ALTER TABLE."""
+    existing = set(_secondary_indexes(cursor, SQLQueries.STUDENTS_TABLE))
+    clauses = [
+        SQLQueries.ADD_INDEX.format(name, columns)
+        for name, columns in SQLQueries.STUDENT_INDEXES.items()
+        if name not in existing
+    ]
+    if not _foreign_keys(cursor, SQLQueries.STUDENTS_TABLE):
+        clauses.append(SQLQueries.ADD_STUDENTS_ROOM_FOREIGN_KEY)
+
+    if clauses:
+        cursor.execute(SQLQueries.ALTER_TABLE.format(SQLQueries.STUDENTS_TABLE, ", ".join(clauses)))
+        logger.info(LogMessages.STUDENT_INDEXES_BUILT.format(len(clauses)))
+
+
+def _create_declared_indexes(cursor, queries):
+    """Create the declared Students indexes on a dialect without ALTER TABLE ... ADD INDEX."""
+    for name, columns in queries.STUDENT_INDEXES.items():
+        cursor.execute(queries.CREATE_INDEX.format(name, columns))
+    if queries.STUDENT_INDEXES:
+        logger.info(LogMessages.STUDENT_INDEXES_BUILT.format(len(queries.STUDENT_INDEXES)))
+
+
+def _drop_student_indexes(cursor):
+    """Drop the room foreign key and every secondary index on Students."""
+    table = SQLQueries.STUDENTS_TABLE
+    foreign_keys = _foreign_keys(cursor, table)
+    if foreign_keys:
+        cursor.execute(SQLQueries.ALTER_TABLE.format(
+            table, ", ".join(SQLQueries.DROP_FOREIGN_KEY.format(name) for name in foreign_keys)
+        ))
+
+    indexes = _secondary_indexes(cursor, table)
+    if indexes:
+        cursor.execute(SQLQueries.ALTER_TABLE.format(
+            table, ", ".join(SQLQueries.DROP_INDEX.format(name) for name in indexes)
+        ))
+    logger.info(LogMessages.STUDENT_INDEXES_DROPPED.format(len(foreign_keys) + len(indexes)))
+
+
 class SchemaManager:
     """Manages database schema operations for rooms and students tables."""
 
@@ -51,9 +134,15 @@ class SchemaManager:
 
         cursor = None
         try:
+            queries = self.connector.queries
             cursor = self.connector.get_cursor()
-            _create_rooms_schema(cursor)
-            _create_students_schema(cursor)
+            _create_rooms_schema(cursor, queries)
+            _create_students_schema(cursor, queries)
+            create_data_version(cursor, queries)
+            if queries.DIALECT == SQLQueries.DIALECT:
+                _build_student_indexes(cursor)
+            else:
+                _create_declared_indexes(cursor, queries)
             logger.info(LogMessages.SCHEMA_CREATED_SUCCESS)
 
         except MYSQLError as e:
@@ -74,9 +163,12 @@ class SchemaManager:
 
         cursor = None
         try:
+            queries = self.connector.queries
             cursor = self.connector.get_cursor()
-            _drop_students_table(cursor)
-            _drop_rooms_table(cursor)
+            _drop_room_stats_table(cursor, queries)
+            _drop_students_table(cursor, queries)
+            _drop_rooms_table(cursor, queries)
+            _drop_data_version_table(cursor, queries)
             logger.info(LogMessages.SCHEMA_DROPPED_SUCCESS)
 
         except MYSQLError as e:
@@ -87,4 +179,109 @@ class SchemaManager:
             raise
         finally:
             if cursor:
-                cursor.close()
\ No newline at end of file
+                cursor.close()
+
+    def create_room_stats_schema(self):
+        """
+        Create the RoomStats table.
+
+        A newly created table is filled from Students, so statistics are
+        complete before the first incremental update.
+        """
+        if not self.connector.db_is_connected():
+            logger.error(LogMessages.DB_NOT_CONNECTED)
+            raise ConnectionError(ErrorMessages.DB_NOT_CONNECTED)
+
+        cursor = None
+        try:
+            cursor = self.connector.get_cursor()
+            cursor.execute(SQLQueries.ROOM_STATS_TABLE_EXISTS)
+            (exists,) = cursor.fetchone()
+            _create_room_stats_schema(cursor)
+            if not exists:
+                _rebuild_room_stats(cursor)
+
+        except MYSQLError as e:
+            logger.error(LogMessages.SCHEMA_MYSQL_ERROR_CREATE.format(e))
+            raise
+        except Exception as e:
+            logger.error(LogMessages.SCHEMA_UNEXPECTED_ERROR_CREATE.format(e))
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+
+    def drop_room_stats_schema(self):
+        """Drop the RoomStats table, e.g. before loading without maintaining it."""
+        if not self.connector.db_is_connected():
+            logger.error(LogMessages.DB_NOT_CONNECTED)
+            raise ConnectionError(ErrorMessages.DB_NOT_CONNECTED)
+
+        cursor = None
+        try:
+            cursor = self.connector.get_cursor()
+            _drop_room_stats_table(cursor, self.connector.queries)
+
+        except MYSQLError as e:
+            logger.error(LogMessages.SCHEMA_MYSQL_ERROR_DROP.format(e))
+            raise
+        except Exception as e:
+            logger.error(LogMessages.SCHEMA_UNEXPECTED_ERROR_DROP.format(e))
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+
+    @contextmanager
+    def bulk_load_mode(self) -> Iterator[None]:
+        """
+        Defer index and constraint maintenance around a bulk load.
+
+        On entry the room foreign key and every secondary index on Students are
+        dropped, and foreign key and unique checks are disabled for the session.
+        On exit the declared indexes and the foreign key are rebuilt in one
+        ALTER TABLE, so InnoDB sorts each index once instead of maintaining it
+        row by row, and the session checks are restored. After a successful
+        load referential integrity is verified with one set-based query.
+        """
+        if not self.connector.db_is_connected():
+            logger.error(LogMessages.DB_NOT_CONNECTED)
+            raise ConnectionError(ErrorMessages.DB_NOT_CONNECTED)
+
+        cursor = self.connector.get_cursor()
+        try:
+            cursor.execute(SQLQueries.SELECT_BULK_CHECKS)
+            saved_checks = cursor.fetchone()
+            cursor.execute(SQLQueries.SET_BULK_CHECKS, (0, 0))
+            try:
+                _drop_student_indexes(cursor)
+                yield
+            finally:
+                _build_student_indexes(cursor)
+                cursor.execute(SQLQueries.SET_BULK_CHECKS, saved_checks)
+
+        except MYSQLError as e:
+            logger.error(LogMessages.BULK_LOAD_MODE_MYSQL_ERROR.format(e))
+            raise
+        finally:
+            cursor.close()
+
+        self.verify_referential_integrity()
+
+    def verify_referential_integrity(self):
+        """Check that every student references an existing room."""
+        if not self.connector.db_is_connected():
+            logger.error(LogMessages.DB_NOT_CONNECTED)
+            raise ConnectionError(ErrorMessages.DB_NOT_CONNECTED)
+
+        cursor = self.connector.get_cursor()
+        try:
+            cursor.execute(SQLQueries.COUNT_ORPHAN_STUDENTS)
+            (orphans,) = cursor.fetchone()
+        finally:
+            cursor.close()
+
+        if orphans:
+            logger.error(ErrorMessages.ORPHAN_STUDENTS.format(orphans))
+            raise IntegrityError(msg=ErrorMessages.ORPHAN_STUDENTS.format(orphans))
+        logger.info(LogMessages.REFERENTIAL_INTEGRITY_VERIFIED)
@@ -0,0 +1,157 @@
+import logging
+import queue
+import threading
+from contextlib import nullcontext
+from operator import itemgetter
+from typing import Callable, Generator, Iterable, Optional
+from src.app.database.database_connector import MySQLConnector
+from src.app.database.database_operations import EntityRepository
+from src.app.constants.application_config import ApplicationConfig
+from src.app.constants.messages import LogMessages
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+_END_OF_SHARD = object()
+
+
+class _ShardAborted(Exception):
+    """Ends a shard's insert after another shard or the dispatcher failed."""
+
+
+class _ShardWorker(threading.Thread):
+    """Inserts one shard of the stream over its own pooled connection."""
+
+    def __init__(self, index: int, connector: MySQLConnector,
+                 repository_factory: Callable[[MySQLConnector], EntityRepository],
+                 stop_event: threading.Event, load_session: bool = False, rows: bool = False):
+        """Initialize the worker with an empty bounded inbox; with rows, it receives row tuples instead of items."""
+        super().__init__(name=f"insert-shard-{index}", daemon=True)
+        self.connector = connector
+        self.repository_factory = repository_factory
+        self.stop_event = stop_event
+        self.load_session = load_session
+        self.rows = rows
+        self.inbox = queue.Queue(maxsize=ApplicationConfig.SHARD_QUEUE_SIZE)
+        self.error: Optional[BaseException] = None
+
+    def run(self) -> None:
+        """Lease a connection and insert everything sent to this shard."""
+        try:
+            with self.connector.lease() as leased, leased.load_session() if self.load_session else nullcontext():
+                repository = self.repository_factory(leased)
+                if self.rows:
+                    repository.insert_rows(self._items())
+                else:
+                    repository.insert_batch(self._items())
+        except _ShardAborted:
+            logger.warning(LogMessages.SHARD_WORKER_ABORTED.format(self.name))
+        except BaseException as error:
+            logger.error(LogMessages.SHARD_WORKER_FAILED.format(self.name, error))
+            self.error = error
+            self.stop_event.set()
+
+    def _items(self) -> Generator[dict, None, None]:
+        """Yield items from the inbox until the dispatcher closes the shard; raise _ShardAborted when stopped."""
+        while not self.stop_event.is_set():
+            try:
+                chunk = self.inbox.get(timeout=ApplicationConfig.PIPELINE_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            if chunk is _END_OF_SHARD:
+                return
+            yield from chunk
+        # failing the insert, instead of ending the stream, keeps the open transaction from committing
+        raise _ShardAborted()
+
+    def send(self, value) -> bool:
+        """Block until the inbox accepts the value; False if the insert was aborted."""
+        while not self.stop_event.is_set():
+            try:
+                self.inbox.put(value, timeout=ApplicationConfig.PIPELINE_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+
+class ShardedInserter:
+    """
+    Splits an item stream across parallel insert workers by primary key.
+
+    Keys are cut into contiguous blocks of SHARD_KEY_BLOCK ids that are dealt to
+    the workers round-robin, so each worker appends mostly ordered key ranges
+    instead of interleaving single rows with its neighbours. Every worker leases
+    its own connection from the connector's pool. It exposes insert_batch, so it
+    can stand in for a repository wherever one is expected.
+
+    When a worker or the dispatcher fails, the other workers stop at their next
+    item and fail too, rolling back their open load session transaction. Batches
+    they committed before stay: every batch outside a load session, and the
+    groups a load session committed already. The inserts are upserts, so
+    running the load again completes it.
+    """
+
+    def __init__(self, connector: MySQLConnector,
+                 repository_factory: Callable[[MySQLConnector], EntityRepository],
+                 workers: int, key_field: str = "id", load_session: bool = False):
+        """
+        Args:
+            connector: Connector created with a pool of at least `workers` spare connections
+            repository_factory: Builds the repository each worker inserts with
+            workers: Number of parallel insert workers
+            key_field: Item field holding the primary key
+            load_session: Each worker groups its batches into transactions
+                with a load session on its leased connection
+        """
+        self.connector = connector
+        self.repository_factory = repository_factory
+        self.workers = workers
+        self.key_field = key_field
+        self.load_session = load_session
+        self.chunk_size = ApplicationConfig.PIPELINE_CHUNK_SIZE
+
+    def insert_batch(self, items: Generator[dict, None, None]) -> None:
+        """Dispatch items to the shard workers and wait for every shard to finish."""
+        self._dispatch(items, itemgetter(self.key_field), rows=False)
+
+    def insert_rows(self, rows: Iterable[tuple]) -> None:
+        """Dispatch row tuples, whose first value is the key, to the shard workers' insert_rows."""
+        self._dispatch(rows, itemgetter(0), rows=True)
+
+    def _dispatch(self, items: Iterable, key_of: Callable, rows: bool) -> None:
+        stop_event = threading.Event()
+        shards = [
+            _ShardWorker(index, self.connector, self.repository_factory, stop_event, self.load_session, rows)
+            for index in range(self.workers)
+        ]
+        chunks = [[] for _ in shards]
+
+        for shard in shards:
+            shard.start()
+
+        try:
+            for item in items:
+                index = (key_of(item) // ApplicationConfig.SHARD_KEY_BLOCK) % self.workers
+                chunk = chunks[index]
+                chunk.append(item)
+                if len(chunk) >= self.chunk_size:
+                    if not shards[index].send(chunk):
+                        break
+                    chunks[index] = []
+
+            for shard, chunk in zip(shards, chunks):
+                if chunk:
+                    shard.send(chunk)
+                shard.send(_END_OF_SHARD)
+        except BaseException:
+            stop_event.set()
+            raise
+        finally:
+            for shard in shards:
+                shard.join()
+
+        for shard in shards:
+            if shard.error is not None:
+                raise shard.error
+        logger.info(LogMessages.SHARDED_INSERTION_COMPLETED.format(self.workers))
@@ -0,0 +1,168 @@
+import re
+import logging
+from collections import OrderedDict
+from typing import Optional
+from mysql.connector import Error as MYSQLError
+from src.app.services.metrics import STATEMENT_CACHE_LOOKUPS
+from src.app.constants.application_config import ApplicationConfig
+from src.app.constants.messages import LogMessages
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+_NAMED_PARAMETER = re.compile(r"%\((\w+)\)s")
+
+
+class PreparedStatement:
+    """
+    A query prepared once on a connection and executed any number of times.
+
+    mysql-connector prepares again whenever a prepared cursor is handed a
+    different string object than the one it last ran, and it rewrites
+    %(name)s placeholders into a new string on every call. Named parameters
+    are therefore bound here, and the cursor always sees the same operation.
+    """
+
+    def __init__(self, cursor, query: str):
+        """
+        :param cursor: Prepared cursor of the connection, owned by this statement
+        :param query: SQL with %s or %(name)s placeholders
+        """
+        self.cursor = cursor
+        self.names = tuple(_NAMED_PARAMETER.findall(query))
+        self.operation = _NAMED_PARAMETER.sub("?", query)
+
+    def execute(self, params=None) -> None:
+        """Run the statement with positional or named parameters, sent in the binary protocol."""
+        if isinstance(params, dict):
+            params = tuple(params[name] for name in self.names)
+        self.cursor.execute(self.operation, params)
+
+    def close(self) -> None:
+        """Deallocate the statement on the server."""
+        self.cursor.close()
+
+
+class StatementCache:
+    """
+    Prepared statements of one connection, keyed by query text.
+
+    The least recently used statement is deallocated once more than
+    max_statements are held, so one-off queries cannot pile up handles on
+    the server. The server drops every handle when the connection closes,
+    and a leased connector closes its cache before the connection goes back
+    to the pool, so a cache lives no longer than the connection's lease.
+    """
+
+    def __init__(self, connection, max_statements: int = ApplicationConfig.STATEMENT_CACHE_SIZE):
+        """
+        :param connection: Open mysql-connector connection
+        :param max_statements: Most statements kept prepared at once
+        """
+        self.connection = connection
+        self.max_statements = max_statements
+        self._statements: OrderedDict[tuple[str, bool], PreparedStatement] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._statements)
+
+    def get(self, query: str, dictionary: bool = False) -> PreparedStatement:
+        """The statement prepared for a query, preparing it on first use."""
+        key = (query, dictionary)
+        statement = self._statements.get(key)
+        if statement is not None:
+            self._statements.move_to_end(key)
+            STATEMENT_CACHE_LOOKUPS.inc(result="hit")
+            return statement
+
+        STATEMENT_CACHE_LOOKUPS.inc(result="miss")
+        statement = PreparedStatement(self.connection.cursor(prepared=True, dictionary=dictionary), query)
+        self._statements[key] = statement
+        if len(self._statements) > self.max_statements:
+            _, evicted = self._statements.popitem(last=False)
+            self._close(evicted)
+        return statement
+
+    def discard(self, query: str, dictionary: bool = False) -> None:
+        """Deallocate a query's statement, for one left in an unknown state by an error."""
+        statement = self._statements.pop((query, dictionary), None)
+        if statement is not None:
+            self._close(statement)
+
+    def close(self) -> None:
+        """Deallocate every statement."""
+        while self._statements:
+            _, statement = self._statements.popitem()
+            self._close(statement)
+
+    @staticmethod
+    def _close(statement: PreparedStatement) -> None:
+        try:
+            statement.close()
+        except MYSQLError as error:
+            # the handle goes away with the connection anyway
+            logger.warning(LogMessages.PREPARED_STATEMENT_CLOSE_FAILED.format(error))
+
+
+class PreparedCursor:
+    """
+    Cursor running each query through a connection's StatementCache.
+
+    It offers execute and the fetch methods. Closing it leaves the
+    statements prepared for the next cursor and reads whatever rows of the
+    last result were not fetched, as the connection cannot run another
+    statement before they are.
+    """
+
+    def __init__(self, cache: StatementCache, dictionary: bool = False):
+        """
+        :param cache: Statement cache of the connection
+        :param dictionary: Return rows as dictionaries
+        """
+        self.cache = cache
+        self.dictionary = dictionary
+        self._query: Optional[str] = None
+        self._statement: Optional[PreparedStatement] = None
+        self._drained = True
+
+    def execute(self, query: str, params=None) -> None:
+        self._finish()
+        self._query = query
+        self._statement = self.cache.get(query, self.dictionary)
+        self._drained = False
+        self._guarded(self._statement.execute, params)
+
+    def fetchone(self):
+        row = self._guarded(self._statement.cursor.fetchone)
+        self._drained = row is None
+        return row
+
+    def fetchmany(self, size: int = 1) -> list:
+        rows = self._guarded(self._statement.cursor.fetchmany, size)
+        self._drained = not rows
+        return rows
+
+    def fetchall(self) -> list:
+        rows = self._guarded(self._statement.cursor.fetchall)
+        self._drained = True
+        return rows
+
+    def close(self) -> None:
+        self._finish()
+        self._statement = None
+
+    def _guarded(self, method, *args):
+        """Call a method of the statement, dropping the statement from the cache if it fails."""
+        try:
+            return method(*args)
+        except BaseException:
+            self.cache.discard(self._query, self.dictionary)
+            self._statement = None
+            self._drained = True
+            raise
+
+    def _finish(self) -> None:
+        """Read the rest of the last result, if it has rows nobody fetched."""
+        if self._statement is not None and not self._drained and self._statement.cursor.with_rows:
+            self._guarded(self._statement.cursor.fetchall)
+        self._drained = True
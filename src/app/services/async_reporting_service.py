@@ -0,0 +1,181 @@
+import asyncio
+import time
+from typing import AsyncGenerator, Awaitable, Callable, Optional
+from src.app.database.async_connector import AsyncMySQLConnector
+from src.app.database.data_version import read_data_version_async
+from src.app.services.reporting_service import ReportingService
+from src.app.services.report_cache import cache_key
+from src.app.services.metrics import REPORT_SECONDS, REPORT_ROWS, REPORT_CACHE_LOOKUPS
+from src.app.constants.application_config import ApplicationConfig
+
+
+async def _fetch_all(connector: AsyncMySQLConnector, query: str, report: str,
+                     params: Optional[dict] = None) -> list[dict]:
+    """Run a report query and return its rows as dictionaries, recording its latency."""
+    cursor = await connector.get_cursor(dictionary=True)
+    try:
+        with REPORT_SECONDS.time(report=report):
+            await cursor.execute(query, params)
+            rows = await cursor.fetchall()
+        REPORT_ROWS.set(len(rows), report=report)
+        return rows
+    finally:
+        await cursor.close()
+
+
+class AsyncReportingService(ReportingService):
+    """
+    ReportingService on an AsyncMySQLConnector.
+
+    The report methods are coroutines. With a pooled connector run_all puts
+    every report query in flight at once, each on a leased connection,
+    without a thread per query.
+    """
+
+    async def _data_version(self) -> Optional[str]:
+        """Token of the current data state, read before any report query; None disables caching."""
+        return None if self.cache is None else await read_data_version_async(self.connector)
+
+    async def _cached(self, report: str, query: str, params: Optional[dict], data_version: Optional[str],
+                      fetch: Callable[[], Awaitable[list[dict]]]) -> list[dict]:
+        """Answer a report query from the cache, running it and storing the rows on a miss."""
+        if data_version is None:
+            return await fetch()
+
+        key = cache_key(self.connector.queries.DIALECT, query, params, self.as_of, data_version)
+        rows, result = self.cache.lookup(key)
+        REPORT_CACHE_LOOKUPS.inc(report=report, result=result)
+        if rows is None:
+            rows = await fetch()
+            self.cache.put(key, rows)
+        return rows
+
+    async def _run(self, attribute: str, report: str, data_version: Optional[str]) -> list[dict]:
+        """Run one query on the main connection, through the cache."""
+        query, params = self._query(attribute)
+        return await self._cached(
+            report, query, params, data_version, lambda: _fetch_all(self.connector, query, report, params)
+        )
+
+    async def _fetch(self, name: str) -> list[dict]:
+        """Run one report query on the main connection."""
+        return await self._run(self._report_queries[name], name, await self._data_version())
+
+    async def _fetch_leased(self, attribute: str, report: str, data_version: Optional[str]) -> list[dict]:
+        """Run a report query on a connection leased from the pool, unless the cache answers it."""
+        query, params = self._query(attribute)
+
+        async def fetch():
+            async with self.connector.lease() as leased:
+                return await _fetch_all(leased, query, report, params)
+
+        return await self._cached(report, query, params, data_version, fetch)
+
+    async def stream_report(self, name: str,
+                            fetch_size: int = ApplicationConfig.REPORT_FETCH_SIZE) -> AsyncGenerator[dict, None]:
+        """
+        Yield a report's rows as the server sends them, without buffering the result.
+
+        Like ReportingService.stream_report(), the rows must be consumed, or
+        the generator closed, before the connector runs another query.
+
+        Args:
+            name: Report name, as used for run_all results
+            fetch_size: Number of rows fetched from the server at a time
+        """
+        query, params = self._query(self._report_queries[name])
+        data_version = await self._data_version()
+        if data_version is not None:
+            key = cache_key(self.connector.queries.DIALECT, query, params, self.as_of, data_version)
+            rows, result = self.cache.lookup(key)
+            REPORT_CACHE_LOOKUPS.inc(report=name, result=result)
+            if rows is not None:
+                for row in rows:
+                    yield row
+                return
+
+        cursor = await self.connector.get_cursor(dictionary=True, buffered=False)
+        seconds = 0.0
+        count = 0
+        try:
+            started = time.perf_counter()
+            await cursor.execute(query, params)
+            try:
+                while rows := await cursor.fetchmany(fetch_size):
+                    seconds += time.perf_counter() - started
+                    count += len(rows)
+                    for row in rows:
+                        yield row
+                    started = time.perf_counter()
+                seconds += time.perf_counter() - started
+                REPORT_SECONDS.observe(seconds, report=name)
+                REPORT_ROWS.set(count, report=name)
+            except GeneratorExit:
+                # an unbuffered result must be read to the end before the connection is reused
+                await cursor.fetchall()
+                raise
+        finally:
+            await cursor.close()
+
+    async def report_pages(self, name: str,
+                           page_size: int = ApplicationConfig.REPORT_PAGE_SIZE) -> AsyncGenerator[list[dict], None]:
+        """Yield a listing report a page of rooms at a time, like ReportingService.report_pages()."""
+        after_room = self.first_room - 1
+        while True:
+            query, params = self._page_query(name, after_room, page_size)
+            page = await _fetch_all(self.connector, query, name, params)
+            if page:
+                yield page
+            if len(page) < page_size:
+                return
+            after_room = page[-1]["room_id"]
+
+    async def paged_report(self, name: str,
+                           page_size: int = ApplicationConfig.REPORT_PAGE_SIZE) -> AsyncGenerator[dict, None]:
+        """Rows of a report, reading listings through report_pages and top-N reports in one query."""
+        if name not in self._page_queries:
+            for row in await self._fetch(name):
+                yield row
+            return
+        async for page in self.report_pages(name, page_size):
+            for row in page:
+                yield row
+
+    async def run_all(self, concurrent: bool = True, single_scan: bool = False,
+                      from_room_stats: bool = False) -> dict[str, list[dict]]:
+        """
+        Run every report and return the results keyed by report name.
+
+        Args:
+            concurrent: Run the report queries at the same time, each on its own
+                leased connection; ignored when the connector has no pool
+            single_scan: See ReportingService.run_all
+            from_room_stats: See ReportingService.run_all
+
+        Returns:
+            Report rows keyed by report name
+        """
+        data_version = await self._data_version()
+        if from_room_stats:
+            return self.derive_reports(
+                await self._run("ROOM_STATS_SUMMARY", ApplicationConfig.ROOM_STATS_SUMMARY_REPORT, data_version),
+                self.top_n
+            )
+
+        if single_scan:
+            return self.derive_reports(
+                await self._run("ROOM_AGE_SUMMARY", ApplicationConfig.ROOM_AGE_SUMMARY_REPORT, data_version),
+                self.top_n
+            )
+
+        if not concurrent or self.connector.pool is None:
+            return {
+                name: await self._run(attribute, name, data_version)
+                for name, attribute in self._report_queries.items()
+            }
+
+        results = await asyncio.gather(*(
+            self._fetch_leased(attribute, name, data_version)
+            for name, attribute in self._report_queries.items()
+        ))
+        return dict(zip(self._report_queries, results))
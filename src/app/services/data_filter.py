@@ -1,6 +1,10 @@
 import logging
-from typing import Generator
+from collections import Counter
+from itertools import compress, islice
+from typing import Generator, Optional
 from src.app.services.data_validator import ValidatorContext
+from src.app.services.metrics import ROWS_VALID, ROWS_REJECTED
+from src.app.constants.application_config import ApplicationConfig
 from src.app.constants.messages import LogMessages
 
 logger = logging.getLogger(__name__)
@@ -12,21 +16,42 @@ class DataFilter:
 
     @staticmethod
     def filter_data(
-        data: Generator[dict, None, None], data_type: str
+        data: Generator[dict, None, None], data_type: str,
+        rejections: Optional[Counter] = None,
+        batch_size: int = ApplicationConfig.VALIDATION_BATCH_SIZE
     ) -> Generator[dict, None, None]:
         """
-        Takes data items one by one and only returns the valid ones.
+        Takes data items batch by batch and only returns the valid ones.
 
         Args:
             data: Stream of data items to check
             data_type: What kind of data we're checking ('student' or 'room')
+            rejections: When given, incremented with the rejected items per rule
+            batch_size: Number of items validated at once
 
         Returns:
             Only the valid data items
         """
         validation_context = ValidatorContext(data_type)
-        for item in data:
-            if validation_context.execute_validation(item):
-                yield item
-            else:
-                logger.warning(LogMessages.SKIPPING_INVALID_ITEM.format(item))
\ No newline at end of file
+        totals = Counter()
+        seen = 0
+        data = iter(data)
+        while batch := list(islice(data, batch_size)):
+            mask, batch_rejections = validation_context.execute_batch(batch)
+            totals.update(batch_rejections)
+            if rejections is not None:
+                rejections.update(batch_rejections)
+            ROWS_VALID.inc(sum(mask), type=data_type)
+            for reason, count in batch_rejections.items():
+                if count:
+                    ROWS_REJECTED.inc(count, type=data_type, reason=reason)
+            seen += len(batch)
+            if logger.isEnabledFor(logging.DEBUG):
+                for item, valid in zip(batch, mask):
+                    if not valid:
+                        logger.debug(LogMessages.SKIPPING_INVALID_ITEM.format(item))
+            yield from compress(batch, mask)
+
+        rejected = +totals
+        if rejected:
+            logger.warning(LogMessages.ITEMS_REJECTED.format(rejected.total(), seen, data_type, dict(rejected)))
@@ -1,25 +1,117 @@
+import re
 import logging
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from datetime import date
+from functools import lru_cache
+from typing import Any, Callable, Dict, NamedTuple, Optional
 from src.app.constants.messages import LogMessages, ErrorMessages
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# what MySQL accepts for a DATETIME column, as the JSON input writes it
+_BIRTHDAY_FORMAT = re.compile(r"\d{4}-\d{2}-\d{2}([T ]\d{2}:\d{2}:\d{2}(\.\d{1,6})?)?")
+_SEXES = ("M", "F")
+
+INCOMPLETE_RULE = "incomplete"
+# students dropped by StudentRepository because their room does not exist
+ORPHAN_ROOM_RULE = "orphan_room"
+
+
+class BatchValidation(NamedTuple):
+    """Outcome of validating a batch: one flag per item and rejected items per rule."""
+    mask: list[bool]
+    rejections: dict[str, int]
+
+
+def _is_id(value) -> bool:
+    return isinstance(value, int) and value >= 0
+
+
+def _is_name(value) -> bool:
+    return isinstance(value, str) and bool(value.strip())
+
+
+@lru_cache(maxsize=65536)
+def birthday_date(value: str) -> Optional[date]:
+    """
+    Date of a birthday string, None when its format or calendar date is invalid.
+
+    Birthdays repeat a lot, so results are cached; validating a birthday and
+    normalizing it afterwards parse the string once.
+    """
+    if not _BIRTHDAY_FORMAT.fullmatch(value):
+        return None
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        return None
+
+
+def _is_birthday(value) -> bool:
+    return isinstance(value, str) and birthday_date(value) is not None
+
+
+def _is_sex(value) -> bool:
+    return value in _SEXES
+
 
 class ValidationStrategy(ABC):
     """Base class for all validators.
     Each validator checks different types of data."""
 
+    required_fields: tuple[str, ...] = ()
+    # (rule name, field, check) applied in order; an item counts against the first rule it fails
+    rules: tuple[tuple[str, str, Callable[[Any], bool]], ...] = ()
+    # field -> conversion applied to valid values by the row fast path before they are inserted
+    normalizers: dict[str, Callable[[Any], Any]] = {}
+
     @abstractmethod
     def validate(self, item: Dict[str, Any]) -> bool:
         """Check if a data item is valid. Return True if good, False if bad."""
         pass
 
+    def tally_batch(self, items: list[dict]) -> BatchValidation:
+        """
+        Check a batch of items one rule at a time and count the first rule each item fails.
+
+        This is a plain Python pass per rule over the items still valid, not a
+        vectorized check. It raises and formats nothing per item, so its cost
+        stays flat however many items are invalid, while validate logs every
+        invalid item.
+
+        Args:
+            items: Data items to check
+
+        Returns:
+            A validity flag per item and the number of items rejected by each rule
+        """
+        required = set(self.required_fields)
+        survivors = [
+            index for index, item in enumerate(items) if isinstance(item, dict) and required <= item.keys()
+        ]
+        rejections = {INCOMPLETE_RULE: len(items) - len(survivors)}
+
+        for rule, field, check in self.rules:
+            kept = [index for index in survivors if check(items[index][field])]
+            rejections[rule] = len(survivors) - len(kept)
+            survivors = kept
+
+        mask = [False] * len(items)
+        for index in survivors:
+            mask[index] = True
+        return BatchValidation(mask, rejections)
+
 
 class RoomValidator(ValidationStrategy):
     """Checks if room data is correct and complete."""
 
+    required_fields = ("id", "name")
+    rules = (
+        ("invalid_id", "id", _is_id),
+        ("invalid_name", "name", _is_name),
+    )
+
     def validate(self, item: dict) -> bool:
         """
         Makes sure a room has valid ID and name.
@@ -49,6 +141,16 @@ class RoomValidator(ValidationStrategy):
 class StudentValidator(ValidationStrategy):
     """Checks if student data is correct and complete."""
 
+    required_fields = ("id", "name", "room", "birthday", "sex")
+    rules = (
+        ("invalid_id", "id", _is_id),
+        ("invalid_name", "name", _is_name),
+        ("invalid_room", "room", _is_id),
+        ("invalid_birthday", "birthday", _is_birthday),
+        ("invalid_sex", "sex", _is_sex),
+    )
+    normalizers = {"birthday": birthday_date}
+
     def validate(self, item: dict) -> bool:
         """
         Makes sure a student has valid ID, name, and room assignment.
@@ -57,6 +159,8 @@ class StudentValidator(ValidationStrategy):
         - An 'id' that's a positive number
         - A 'name' that's not empty
         - A 'room' that's a positive number
+        - A 'birthday' that's a date or datetime string MySQL accepts
+        - A 'sex' of 'M' or 'F'
         """
         try:
             if ("id" not in item
@@ -79,6 +183,12 @@ class StudentValidator(ValidationStrategy):
             if not isinstance(room_id, int) or room_id < 0:
                 raise ValueError(ErrorMessages.INVALID_STUDENT_ROOM_ID.format(room_id))
 
+            if not _is_birthday(student_birthday):
+                raise ValueError(ErrorMessages.INVALID_STUDENT_BIRTHDAY.format(student_birthday))
+
+            if not _is_sex(student_sex):
+                raise ValueError(ErrorMessages.INVALID_STUDENT_SEX.format(student_sex))
+
             return True
 
         except Exception as e:
@@ -104,4 +214,8 @@ class ValidatorContext:
 
     def execute_validation(self, item: dict) -> bool:
         """Check if the item is valid using the right validator."""
-        return self.strategy.validate(item)
\ No newline at end of file
+        return self.strategy.validate(item)
+
+    def execute_batch(self, items: list[dict]) -> BatchValidation:
+        """Check a batch of items using the right validator."""
+        return self.strategy.tally_batch(items)
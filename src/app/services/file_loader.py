@@ -1,19 +1,60 @@
+import os
+import json
+import logging
 from collections.abc import Generator
+from decimal import Decimal
+from functools import lru_cache
+from typing import Optional
 import ijson
+from src.app.services.metrics import ROWS_READ
 from src.app.constants.application_config import ApplicationConfig
-from src.app.constants.messages import ErrorMessages
+from src.app.constants.messages import LogMessages, ErrorMessages
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+@lru_cache(maxsize=None)
+def _json_backend(preferred: Optional[str]):
+    """Load the preferred ijson backend, or the fastest one available."""
+    names = (preferred,) if preferred else ApplicationConfig.JSON_BACKENDS
+    for name in names:
+        try:
+            backend = ijson.get_backend(name)
+        except ImportError:
+            continue
+        return backend
+    raise ImportError(ErrorMessages.JSON_BACKEND_UNAVAILABLE.format(", ".join(names)))
 
 
 class FileLoader:
     """Utility class for streaming JSON data from a file."""
 
     @staticmethod
-    def load_file_data(path: str) -> Generator[dict, None, None]:
+    def json_backend(backend: Optional[str] = None):
+        """The ijson backend module streamed files are parsed with."""
+        return _json_backend(backend or ApplicationConfig.JSON_BACKEND)
+
+    @staticmethod
+    def backend_name(backend: Optional[str] = None) -> str:
+        """Name of the ijson backend streamed files are parsed with."""
+        return FileLoader.json_backend(backend).backend_name
+
+    @staticmethod
+    def load_file_data(path: str,
+                       whole_file_threshold: int = ApplicationConfig.WHOLE_FILE_PARSE_THRESHOLD,
+                       backend: Optional[str] = None) -> Generator[dict, None, None]:
         """
         Stream JSON items from the given file one by one.
 
+        The file is read as bytes so the parser decodes UTF-8 itself. Files up
+        to whole_file_threshold bytes are parsed with a single json.loads call;
+        larger ones are streamed through ijson in large buffered reads.
+
         Args:
             path: Path to the JSON file.
+            whole_file_threshold: Largest file size in bytes parsed in one call, 0 to always stream.
+            backend: ijson backend to stream with, defaulting to ApplicationConfig.JSON_BACKEND.
         Yields:
             dict: A JSON object parsed from the file.
 
@@ -21,15 +62,44 @@ class FileLoader:
             FileNotFoundError: If the file does not exist.
             PermissionError: If access to the file is denied.
             ValueError: If the file contains invalid JSON.
+            ImportError: If the configured ijson backend is not installed.
             OSError: If an unexpected I/O error occurs.
         """
+        read = 0
         try:
-            with open(path, ApplicationConfig.FILE_MODE_READ, encoding=ApplicationConfig.DEFAULT_ENCODING) as file:
-                try:
-                    yield from ijson.items(file, ApplicationConfig.JSON_ITEMS_PATH)
-                except ijson.JSONError as e:
-                    raise ValueError(ErrorMessages.INVALID_JSON_FORMAT.format(path)) from e
+            with open(path, ApplicationConfig.FILE_MODE_READ_BINARY) as file:
+                if os.fstat(file.fileno()).st_size <= whole_file_threshold:
+                    logger.info(LogMessages.JSON_WHOLE_FILE_PARSE.format(path, whole_file_threshold))
+                    items = FileLoader._parse_whole(file, path)
+                else:
+                    items = FileLoader._parse_stream(file, path, backend)
+                for read, item in enumerate(items, 1):
+                    yield item
         except (FileNotFoundError, PermissionError):
             raise
         except OSError as e:
-            raise OSError(ErrorMessages.FILE_READ_ERROR.format(path)) from e
\ No newline at end of file
+            raise OSError(ErrorMessages.FILE_READ_ERROR.format(path)) from e
+        finally:
+            ROWS_READ.inc(read, file=os.path.basename(path))
+
+    @staticmethod
+    def _parse_whole(file, path: str) -> list:
+        """Parse the whole file at once, with ijson's types for numbers."""
+        try:
+            document = json.loads(file.read(), parse_float=Decimal)
+        except ValueError as e:
+            raise ValueError(ErrorMessages.INVALID_JSON_FORMAT.format(path)) from e
+        # like the streamed path, only members of a top-level array are items
+        return document if isinstance(document, list) else []
+
+    @staticmethod
+    def _parse_stream(file, path: str, backend: Optional[str]) -> Generator[dict, None, None]:
+        """Stream items from the file with the selected ijson backend."""
+        parser = _json_backend(backend or ApplicationConfig.JSON_BACKEND)
+        logger.info(LogMessages.JSON_BACKEND_SELECTED.format(path, parser.backend_name))
+        try:
+            yield from parser.items(
+                file, ApplicationConfig.JSON_ITEMS_PATH, buf_size=ApplicationConfig.JSON_READ_BUFFER_SIZE
+            )
+        except ijson.JSONError as e:
+            raise ValueError(ErrorMessages.INVALID_JSON_FORMAT.format(path)) from e
@@ -1,13 +1,45 @@
 import os
+import io
+import csv
+import gzip
+import json
 import logging
-from typing import List, Dict
+import time
+import tempfile
+from contextlib import nullcontext
+from itertools import chain, islice
+from typing import Iterable, List, Dict
+from src.app.services.metrics import WRITER_BYTES, WRITER_SECONDS, WRITER_BYTES_PER_SECOND, output_file_mode
 from src.app.constants.application_config import ApplicationConfig
-from src.app.constants.messages import LogMessages
+from src.app.constants.messages import LogMessages, ErrorMessages
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
+def output_path(file_path: str, output_format: str = ApplicationConfig.TXT_FORMAT,
+                compress: bool = False) -> str:
+    """Swap a report path's extension for the given format, adding .gz when compressed."""
+    path = f"{os.path.splitext(file_path)[0]}.{output_format}"
+    return path + ApplicationConfig.GZIP_SUFFIX if compress else path
+
+
+def _format_chunk(rows: List[Dict], output_format: str, header: bool) -> str:
+    """Render a chunk of rows as text in the given format."""
+    if output_format == ApplicationConfig.TXT_FORMAT:
+        return "".join(", ".join(f"{k}: {v}" for k, v in row.items()) + "\n" for row in rows)
+    if output_format == ApplicationConfig.JSONL_FORMAT:
+        # Decimal and date values are written as their string form
+        return "".join(json.dumps(row, default=str) + "\n" for row in rows)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(rows[0].keys())
+    writer.writerows(row.values() for row in rows)
+    return buffer.getvalue()
+
+
 class ResultWriter:
     """Writes query results to text files."""
 
@@ -16,18 +48,75 @@ class ResultWriter:
         """
         Write a list of dictionaries to a plain text file.
         """
-        if not data:
-            logger.warning(LogMessages.NO_DATA_TO_WRITE.format(file_path))
-            return
+        ResultWriter.write(file_path, data)
+
+    @staticmethod
+    def write(file_path: str, rows: Iterable[Dict],
+              output_format: str = ApplicationConfig.TXT_FORMAT, compress: bool = False,
+              chunk_rows: int = ApplicationConfig.WRITE_CHUNK_ROWS) -> int:
+        """
+        Stream rows to a file in the given format.
+
+        Rows are rendered a chunk at a time and written through a large buffer,
+        so an iterator of rows is never materialized. The file is written under
+        a temporary name in the same directory and renamed over the target once
+        complete, so readers see either the old or the new file.
+
+        Args:
+            file_path: Path of the output file
+            rows: Rows as dictionaries, all with the same keys
+            output_format: 'txt' (key: value lines), 'csv' or 'jsonl'
+            compress: Write gzip-compressed output
+            chunk_rows: Number of rows rendered per write
+
+        Returns:
+            Number of rows written
+        """
+        if output_format not in ApplicationConfig.OUTPUT_FORMATS:
+            raise ValueError(ErrorMessages.UNKNOWN_OUTPUT_FORMAT.format(output_format))
 
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        rows = iter(rows)
+        first = next(rows, None)
+        if first is None:
+            logger.warning(LogMessages.NO_DATA_TO_WRITE.format(file_path))
+            return 0
+        rows = chain((first,), rows)
 
+        started = time.perf_counter()
+        directory = os.path.dirname(file_path) or "."
+        os.makedirs(directory, exist_ok=True)
+        descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(file_path) + ".")
+        written = 0
         try:
-            with open(file_path, mode=ApplicationConfig.FILE_MODE_WRITE, encoding=ApplicationConfig.DEFAULT_ENCODING) as f:
-                for row in data:
-                    line = ", ".join(f"{k}: {v}" for k, v in row.items())
-                    f.write(line + "\n")
-            logger.info(LogMessages.FILE_WRITE_SUCCESS.format(len(data), file_path))
+            with open(descriptor, "wb", buffering=ApplicationConfig.WRITE_BUFFER_SIZE) as raw:
+                # mtime=0 keeps compressed output reproducible
+                stream = gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) if compress else nullcontext(raw)
+                with stream as output:
+                    while chunk := list(islice(rows, chunk_rows)):
+                        text = _format_chunk(chunk, output_format, header=not written)
+                        output.write(text.encode(ApplicationConfig.DEFAULT_ENCODING))
+                        written += len(chunk)
+                raw.flush()
+                os.fsync(raw.fileno())
+            os.chmod(temp_path, output_file_mode())
+            os.replace(temp_path, file_path)
+            logger.info(LogMessages.FILE_WRITE_SUCCESS.format(written, file_path))
+            ResultWriter._record(file_path, time.perf_counter() - started)
+            return written
         except Exception as e:
             logger.error(LogMessages.FILE_WRITE_FAILED.format(file_path, e))
-            raise
\ No newline at end of file
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    @staticmethod
+    def _record(file_path: str, seconds: float) -> None:
+        """Record the size of a finished file and how long writing it took."""
+        size = os.path.getsize(file_path)
+        name = os.path.basename(file_path)
+        WRITER_BYTES.inc(size, file=name)
+        WRITER_SECONDS.inc(seconds, file=name)
+        if seconds > 0:
+            WRITER_BYTES_PER_SECOND.set(size / seconds, file=name)
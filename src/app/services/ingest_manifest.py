@@ -0,0 +1,156 @@
+import os
+import json
+import sqlite3
+import hashlib
+import logging
+from itertools import islice
+from typing import Generator, Iterable, Optional
+from src.app.constants.application_config import ApplicationConfig
+from src.app.constants.sql_queries import SQLQueries
+from src.app.constants.messages import LogMessages
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def _record_hash(item: dict) -> bytes:
+    """Short digest of a record's canonical JSON form."""
+    canonical = json.dumps(item, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(canonical.encode(ApplicationConfig.DEFAULT_ENCODING), digest_size=8).digest()
+
+
+def _file_hash(path: str) -> str:
+    """Digest of a file's content, read in large blocks."""
+    digest = hashlib.blake2b()
+    with open(path, "rb") as file:
+        while block := file.read(ApplicationConfig.MANIFEST_HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IngestManifest:
+    """
+    Remembers what was last loaded from one input file.
+
+    The manifest keeps the file's size, mtime and content hash plus a short
+    hash per record id in a SQLite file next to the other ingest state. An
+    unchanged file can be skipped outright; for a changed file only records
+    whose hash differs from the last successful load are passed on. Nothing
+    is persisted until commit(), which the caller runs once the database
+    insert succeeded. Records the repository held back or the server refused
+    are reported through forget() and get no hash, so a later load offers
+    them again.
+    """
+
+    def __init__(self, input_path: str, state_dir: str = ApplicationConfig.INGEST_STATE_DIR):
+        """
+        Args:
+            input_path: JSON file the manifest describes
+            state_dir: Directory holding the manifest databases
+        """
+        self.input_path = input_path
+        os.makedirs(state_dir, exist_ok=True)
+        manifest_path = os.path.join(state_dir, os.path.basename(input_path) + ApplicationConfig.MANIFEST_SUFFIX)
+        # filter stages may run on a worker thread; access is never concurrent
+        self.db = sqlite3.connect(manifest_path, check_same_thread=False)
+        self.db.execute(SQLQueries.MANIFEST_CREATE_FILE_TABLE)
+        self.db.execute(SQLQueries.MANIFEST_CREATE_RECORD_TABLE)
+        self.db.commit()
+        self._stat: Optional[os.stat_result] = None
+        self._unstored: list[int] = []
+
+    def is_unchanged(self) -> bool:
+        """
+        Check whether the file matches the last committed load.
+
+        Size and mtime decide when they match; when only the mtime moved, the
+        content hash decides.
+        """
+        self._stat = os.stat(self.input_path)
+        stored = self.db.execute(SQLQueries.MANIFEST_SELECT_FILE).fetchone()
+        if stored is None:
+            return False
+
+        size, mtime_ns, content_hash = stored
+        if size != self._stat.st_size:
+            return False
+        if mtime_ns == self._stat.st_mtime_ns:
+            return True
+        return content_hash == _file_hash(self.input_path)
+
+    def changed_records(self, items: Iterable[dict]) -> Generator[dict, None, None]:
+        """
+        Pass on only the records that are new or differ from the last load.
+
+        Args:
+            items: Validated records with an 'id' field
+
+        Yields:
+            Records whose hash is not the one stored for their id
+        """
+        items = iter(items)
+        seen = changed = 0
+        while chunk := list(islice(items, ApplicationConfig.MANIFEST_LOOKUP_CHUNK)):
+            hashes = {item["id"]: _record_hash(item) for item in chunk}
+            stored = dict(self.db.execute(
+                SQLQueries.MANIFEST_SELECT_RECORDS.format(", ".join("?" * len(hashes))), list(hashes)
+            ))
+            updates = {record_id: digest for record_id, digest in hashes.items() if stored.get(record_id) != digest}
+            self.db.executemany(SQLQueries.MANIFEST_UPSERT_RECORD, updates.items())
+
+            seen += len(chunk)
+            for item in chunk:
+                if item["id"] in updates:
+                    changed += 1
+                    yield item
+
+        logger.info(LogMessages.MANIFEST_CHANGED_RECORDS.format(self.input_path, changed, seen))
+
+    def forget(self, record_ids: Iterable[int]) -> None:
+        """
+        Drop the staged hashes of records that were not stored.
+
+        Repositories call this from their insert thread while records are
+        still being hashed, so the ids are only collected here and removed
+        in commit().
+
+        Args:
+            record_ids: Ids of records held back or refused by the server
+        """
+        self._unstored.extend(record_ids)
+
+    def commit(self) -> None:
+        """Persist record hashes and the file's fingerprint after a successful load."""
+        if self._unstored:
+            self.db.executemany(SQLQueries.MANIFEST_DELETE_RECORD, ((record_id,) for record_id in self._unstored))
+            logger.info(LogMessages.MANIFEST_UNSTORED_RECORDS.format(self.input_path, len(set(self._unstored))))
+
+        stat = os.stat(self.input_path)
+        unchanged = self._stat is not None and (stat.st_size, stat.st_mtime_ns) == (
+            self._stat.st_size, self._stat.st_mtime_ns
+        )
+        if unchanged and not self._unstored:
+            self.db.execute(
+                SQLQueries.MANIFEST_UPSERT_FILE, (stat.st_size, stat.st_mtime_ns, _file_hash(self.input_path))
+            )
+        else:
+            # the file changed while it was loaded or has records left out; it must not be skipped next time
+            self.db.execute(SQLQueries.MANIFEST_CLEAR_FILE)
+        self.db.commit()
+        self._unstored = []
+
+    def rollback(self) -> None:
+        """Forget record hashes staged by a load that failed."""
+        self.db.rollback()
+        self._unstored = []
+
+    def reset(self) -> None:
+        """Forget everything, e.g. after the target table was emptied."""
+        self.db.execute(SQLQueries.MANIFEST_CLEAR_FILE)
+        self.db.execute(SQLQueries.MANIFEST_CLEAR_RECORDS)
+        self.db.commit()
+        logger.info(LogMessages.MANIFEST_RESET.format(self.input_path))
+
+    def close(self) -> None:
+        """Close the manifest database."""
+        self.db.close()
@@ -0,0 +1,149 @@
+import logging
+import queue
+import threading
+from typing import Callable, Generator, Iterable, Optional
+from src.app.services.file_loader import FileLoader
+from src.app.services.data_filter import DataFilter
+from src.app.services.ingest_manifest import IngestManifest
+from src.app.services.ndjson_loader import NdjsonLoader, is_ndjson
+from src.app.database.database_operations import EntityRepository
+from src.app.constants.application_config import ApplicationConfig
+from src.app.constants.messages import LogMessages
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+_END_OF_STREAM = object()
+
+
+class _StageWorker(threading.Thread):
+    """Runs one pipeline stage and pushes its output to a bounded queue in chunks."""
+
+    def __init__(self, name: str, source: Callable[[], Iterable], output: queue.Queue,
+                 chunk_size: int, stop_event: threading.Event):
+        """Initialize the stage with its source and output queue."""
+        super().__init__(name=name, daemon=True)
+        self.source = source
+        self.output = output
+        self.chunk_size = chunk_size
+        self.stop_event = stop_event
+        self.error: Optional[BaseException] = None
+
+    def run(self) -> None:
+        """Drain the source into the output queue, recording any failure."""
+        try:
+            chunk = []
+            for item in self.source():
+                if self.stop_event.is_set():
+                    return
+                chunk.append(item)
+                if len(chunk) >= self.chunk_size:
+                    self._put(chunk)
+                    chunk = []
+            if chunk:
+                self._put(chunk)
+        except BaseException as error:
+            logger.error(LogMessages.PIPELINE_STAGE_FAILED.format(self.name, error))
+            self.error = error
+        finally:
+            self._put(_END_OF_STREAM)
+
+    def _put(self, value) -> None:
+        """Block while the queue is full (backpressure) unless the pipeline is stopping."""
+        while not self.stop_event.is_set():
+            try:
+                self.output.put(value, timeout=ApplicationConfig.PIPELINE_POLL_INTERVAL)
+                return
+            except queue.Full:
+                continue
+
+
+def _drain(source: queue.Queue, stage: _StageWorker,
+           stop_event: threading.Event) -> Generator[dict, None, None]:
+    """Yield items from a stage queue until the stage signals the end of its stream."""
+    while not stop_event.is_set():
+        try:
+            chunk = source.get(timeout=ApplicationConfig.PIPELINE_POLL_INTERVAL)
+        except queue.Empty:
+            continue
+
+        if chunk is _END_OF_STREAM:
+            if stage.error is not None:
+                raise stage.error
+            return
+        yield from chunk
+
+
+class IngestPipeline:
+    """
+    Runs load -> filter -> insert as separate stages linked by bounded queues.
+
+    Loading and filtering for every file start at once on worker threads, so
+    student parsing overlaps the room insert. Inserts run on the calling thread
+    in the order the files were added, which keeps rooms ahead of the students
+    that reference them.
+    """
+
+    def __init__(self, queue_size: int = ApplicationConfig.PIPELINE_QUEUE_SIZE,
+                 chunk_size: int = ApplicationConfig.PIPELINE_CHUNK_SIZE):
+        """
+        Args:
+            queue_size: Maximum number of chunks buffered between two stages
+            chunk_size: Number of items handed over between stages at once
+        """
+        self.queue_size = queue_size
+        self.chunk_size = chunk_size
+        self.stop_event = threading.Event()
+        self._streams = []
+        self._workers = []
+
+    def add_source(self, path: str, data_type: str, repository: EntityRepository,
+                   manifest: Optional[IngestManifest] = None) -> None:
+        """
+        Register a file to be loaded, validated and inserted with the given repository.
+
+        Args:
+            path: Path to the JSON array or NDJSON file
+            data_type: Validation strategy for the file ('student' or 'room')
+            repository: Repository that inserts the validated items
+            manifest: When given, only records changed since the last load are inserted
+        """
+        if manifest is not None and manifest.is_unchanged():
+            logger.info(LogMessages.MANIFEST_FILE_UNCHANGED.format(path))
+            return
+
+        parsed = queue.Queue(maxsize=self.queue_size)
+        filtered = queue.Queue(maxsize=self.queue_size)
+
+        # NDJSON files are validated by the parsing processes already
+        ndjson = is_ndjson(path)
+        loader = _StageWorker(
+            f"load-{data_type}",
+            lambda: NdjsonLoader.load_valid(path, data_type) if ndjson else FileLoader.load_file_data(path),
+            parsed, self.chunk_size, self.stop_event
+        )
+
+        def validated():
+            items = _drain(parsed, loader, self.stop_event)
+            if not ndjson:
+                items = DataFilter.filter_data(items, data_type)
+            return items if manifest is None else manifest.changed_records(items)
+
+        validator = _StageWorker(f"filter-{data_type}", validated, filtered, self.chunk_size, self.stop_event)
+
+        self._workers.extend((loader, validator))
+        self._streams.append((repository, filtered, validator))
+
+    def run(self) -> None:
+        """Start every load/filter stage and insert the streams in registration order."""
+        for worker in self._workers:
+            worker.start()
+
+        try:
+            for repository, filtered, validator in self._streams:
+                repository.insert_batch(_drain(filtered, validator, self.stop_event))
+            logger.info(LogMessages.PIPELINE_COMPLETED)
+        finally:
+            self.stop_event.set()
+            for worker in self._workers:
+                worker.join()
@@ -0,0 +1,302 @@
+import os
+import json
+import time
+import tempfile
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Iterator
+from src.app.constants.application_config import ApplicationConfig
+from src.app.constants.messages import ErrorMessages
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _sample(name: str, labels: dict, value) -> str:
+    """One line of the Prometheus text format."""
+    if labels:
+        rendered = ",".join(f'{key}="{_escape(str(label))}"' for key, label in labels.items())
+        name = f"{name}{{{rendered}}}"
+    return f"{name} {value}"
+
+
+def _umask() -> int:
+    """The process umask, read without changing it where Linux reports it."""
+    try:
+        with open("/proc/self/status", encoding=ApplicationConfig.DEFAULT_ENCODING) as status:
+            for line in status:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except OSError:
+        pass
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def output_file_mode() -> int:
+    """Mode for a finished output file: what open() would create it with under the current umask."""
+    return ApplicationConfig.OUTPUT_FILE_MODE & ~_umask()
+
+
+def _write_atomic(path: str, text: str) -> None:
+    """Write a file under a temporary name and rename it over the target, for scrapers."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".")
+    try:
+        with open(descriptor, ApplicationConfig.FILE_MODE_WRITE, encoding=ApplicationConfig.DEFAULT_ENCODING) as file:
+            file.write(text)
+        os.chmod(temp_path, output_file_mode())
+        os.replace(temp_path, path)
+    except Exception:
+        os.remove(temp_path)
+        raise
+
+
+class _Metric:
+    """A named family of samples, one per combination of label values."""
+
+    kind = ""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, description: str, label_names: tuple):
+        """
+        Args:
+            registry: Registry the metric belongs to, whose lock guards its samples
+            name: Metric name, prefixed with METRICS_NAMESPACE
+            description: Help text of the metric
+            label_names: Names of the labels every sample carries
+        """
+        self.name = f"{ApplicationConfig.METRICS_NAMESPACE}_{name}"
+        self.description = description
+        self.label_names = label_names
+        self._lock = registry.lock
+        self._values = {}
+
+    def _key(self, labels: dict) -> tuple:
+        """Sample key of the given label values, which must name exactly the metric's labels."""
+        if set(labels) != set(self.label_names):
+            raise ValueError(ErrorMessages.METRIC_LABELS_MISMATCH.format(self.name, self.label_names, tuple(labels)))
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def reset(self) -> None:
+        """Drop every recorded sample."""
+        with self._lock:
+            self._values.clear()
+
+    def samples(self) -> list[tuple[dict, object]]:
+        """Label values and value of every sample."""
+        with self._lock:
+            return [(dict(zip(self.label_names, key)), value) for key, value in self._values.items()]
+
+    def prometheus_lines(self) -> list[str]:
+        """Samples in the Prometheus text format, without the HELP and TYPE lines."""
+        return [_sample(self.name, labels, value) for labels, value in self.samples()]
+
+
+class Counter(_Metric):
+    """A value that only goes up."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """
+        Add to the sample of the given label values.
+
+        Args:
+            amount: Non-negative amount to add
+            **labels: Value of every label of the metric
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """A value that is set to the latest measurement."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        """
+        Replace the sample of the given label values.
+
+        Args:
+            value: Latest measurement
+            **labels: Value of every label of the metric
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, with their count and sum."""
+
+    kind = "histogram"
+
+    def __init__(self, registry: "MetricsRegistry", name: str, description: str, label_names: tuple,
+                 buckets: tuple = ApplicationConfig.METRICS_LATENCY_BUCKETS):
+        """
+        Args:
+            registry: See _Metric
+            name: See _Metric
+            description: See _Metric
+            label_names: See _Metric
+            buckets: Upper bounds of the buckets; +Inf is added on export
+        """
+        super().__init__(registry, name, description, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        """
+        Count an observation into its bucket of the sample of the given label values.
+
+        Args:
+            value: Observed value, for example a latency in seconds
+            **labels: Value of every label of the metric
+        """
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"buckets": [0] * (len(self.buckets) + 1), "count": 0, "sum": 0.0}
+            state["buckets"][bisect_left(self.buckets, value)] += 1
+            state["count"] += 1
+            state["sum"] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the duration of the block in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> list[tuple[dict, object]]:
+        """Label values and bucket counts, count and sum of every sample."""
+        with self._lock:
+            return [
+                (dict(zip(self.label_names, key)), {**state, "buckets": list(state["buckets"])})
+                for key, state in self._values.items()
+            ]
+
+    def prometheus_lines(self) -> list[str]:
+        """Cumulative bucket, sum and count lines of every sample in the Prometheus text format."""
+        lines = []
+        for labels, state in self.samples():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state["buckets"]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(_sample(f"{self.name}_bucket", {**labels, "le": le}, cumulative))
+            lines.append(_sample(f"{self.name}_sum", labels, state["sum"]))
+            lines.append(_sample(f"{self.name}_count", labels, state["count"]))
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Collects the counters, gauges and histograms of one run.
+
+    Metrics are declared once and recorded from any thread. At the end of a
+    run the registry is dumped as JSON and in the Prometheus text format,
+    the latter suitable for the node exporter's textfile collector.
+    """
+
+    def __init__(self):
+        """Start an empty registry."""
+        self.lock = threading.Lock()
+        self._metrics: list[_Metric] = []
+
+    def counter(self, name: str, description: str, label_names: tuple = ()) -> Counter:
+        """Declare a counter; see _Metric for the arguments."""
+        return self._register(Counter(self, name, description, label_names))
+
+    def gauge(self, name: str, description: str, label_names: tuple = ()) -> Gauge:
+        """Declare a gauge; see _Metric for the arguments."""
+        return self._register(Gauge(self, name, description, label_names))
+
+    def histogram(self, name: str, description: str, label_names: tuple = (),
+                  buckets: tuple = ApplicationConfig.METRICS_LATENCY_BUCKETS) -> Histogram:
+        """Declare a histogram; see Histogram for the arguments."""
+        return self._register(Histogram(self, name, description, label_names, buckets))
+
+    def _register(self, metric: _Metric):
+        """Add a declared metric to the exports."""
+        self._metrics.append(metric)
+        return metric
+
+    def reset(self) -> None:
+        """Drop every recorded sample, keeping the declarations."""
+        for metric in self._metrics:
+            metric.reset()
+
+    def to_dict(self) -> dict:
+        """Every metric with its type, description and samples."""
+        return {
+            metric.name: {
+                "type": metric.kind,
+                "help": metric.description,
+                "samples": [{"labels": labels, "value": value} for labels, value in metric.samples()],
+            }
+            for metric in self._metrics
+        }
+
+    def to_prometheus(self) -> str:
+        """Every metric with samples, in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            samples = metric.prometheus_lines()
+            if samples:
+                lines.append(f"# HELP {metric.name} {metric.description}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+    def dump_json(self, path: str) -> None:
+        """Write to_dict() to a JSON file, replacing it atomically."""
+        _write_atomic(path, json.dumps(self.to_dict(), indent=2) + "\n")
+
+    def dump_prometheus(self, path: str) -> None:
+        """Write to_prometheus() to a file, replacing it atomically."""
+        _write_atomic(path, self.to_prometheus())
+
+
+registry = MetricsRegistry()
+
+ROWS_READ = registry.counter("rows_read_total", "Items parsed from input files", ("file",))
+ROWS_VALID = registry.counter("rows_valid_total", "Items that passed validation", ("type",))
+ROWS_REJECTED = registry.counter("rows_rejected_total", "Items rejected by validation", ("type", "reason"))
+ROWS_INSERTED = registry.counter("rows_inserted_total", "Rows sent to the database", ("table",))
+ROWS_SERVER_REJECTED = registry.counter(
+    "rows_server_rejected_total", "Rows the server refused, isolated by batch recovery", ("table",)
+)
+INSERT_SECONDS = registry.counter(
+    "insert_seconds_total", "Time spent inserting, including waiting for input", ("table",)
+)
+INSERT_ROWS_PER_SECOND = registry.gauge(
+    "insert_rows_per_second", "Insert throughput of the latest batch insertion", ("table",)
+)
+INSERT_STATEMENT_SECONDS = registry.histogram(
+    "insert_statement_seconds", "Latency of insert statements and executemany calls", ("table", "strategy")
+)
+REPORT_SECONDS = registry.histogram("report_query_seconds", "Latency of report queries", ("report",))
+REPORT_ROWS = registry.gauge("report_rows", "Rows returned by the latest run of a report", ("report",))
+REPORT_CACHE_LOOKUPS = registry.counter(
+    "report_cache_lookups_total", "Report cache lookups by the layer that answered", ("report", "result")
+)
+STATEMENT_CACHE_LOOKUPS = registry.counter(
+    "statement_cache_lookups_total", "Prepared statement lookups, hit when the handle was reused", ("result",)
+)
+WRITER_BYTES = registry.counter("writer_bytes_total", "Bytes written to output files", ("file",))
+WRITER_SECONDS = registry.counter("writer_seconds_total", "Time spent writing output files", ("file",))
+WRITER_BYTES_PER_SECOND = registry.gauge(
+    "writer_bytes_per_second", "Write throughput of the latest write of a file", ("file",)
+)
+RUN_SECONDS = registry.gauge("run_seconds", "Duration of the application run")
+RUN_SUCCEEDED = registry.gauge("run_succeeded", "1 when the application run succeeded, else 0")
@@ -0,0 +1,275 @@
+import os
+import io
+import json
+import mmap
+import logging
+import multiprocessing
+import tempfile
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from itertools import compress, islice
+from typing import Generator, Iterable, Optional
+from src.app.services.file_loader import FileLoader
+from src.app.services.data_filter import DataFilter
+from src.app.services.data_validator import ValidatorContext
+from src.app.services.metrics import ROWS_READ, ROWS_VALID, ROWS_REJECTED, output_file_mode
+from src.app.constants.application_config import ApplicationConfig
+from src.app.constants.messages import LogMessages, ErrorMessages
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+_NEWLINE = b"\n"
+
+
+def is_ndjson(path: str) -> bool:
+    """Whether an input file holds one JSON object per line."""
+    return path.endswith(ApplicationConfig.NDJSON_SUFFIXES)
+
+
+def split_ranges(path: str, range_size: int) -> list[tuple[int, int]]:
+    """
+    Cut a file into byte ranges that each end just after a newline.
+
+    Only the bytes around each boundary are read; the rest of the file is
+    never touched, so splitting costs the same for any file size.
+
+    Args:
+        path: Path to the NDJSON file
+        range_size: Bytes per range before it is extended to the next newline
+
+    Returns:
+        (start, end) offsets covering the whole file, in file order
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+
+    ranges = []
+    with open(path, ApplicationConfig.FILE_MODE_READ_BINARY) as file, \
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        start = 0
+        while start < size:
+            # starting one byte early keeps a range that already ends on a newline as it is
+            newline = mapped.find(_NEWLINE, start + range_size - 1)
+            end = size if newline == -1 else newline + 1
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _parse_range(path: str, start: int, end: int, data_type: str,
+                 batch_size: int) -> tuple[list[tuple], int, Counter]:
+    """
+    Parse and validate the lines of one byte range; runs in a worker process.
+
+    Valid items come back as tuples of the validator's required fields,
+    which pickle far smaller than dictionaries repeating every key.
+
+    Returns:
+        Valid rows, the number of items read and the rejections per rule
+    """
+    validator = ValidatorContext(data_type)
+    fields = validator.strategy.required_fields
+    rows = []
+    rejections = Counter()
+    read = 0
+
+    def flush(batch: list) -> None:
+        mask, batch_rejections = validator.execute_batch(batch)
+        rejections.update(batch_rejections)
+        rows.extend(tuple(item[field] for field in fields) for item in compress(batch, mask))
+
+    with open(path, ApplicationConfig.FILE_MODE_READ_BINARY) as file, \
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        batch = []
+        position = start
+        while position < end:
+            newline = mapped.find(_NEWLINE, position, end)
+            stop = end if newline == -1 else newline
+            line = mapped[position:stop]
+            if line.strip():
+                try:
+                    batch.append(json.loads(line, parse_float=Decimal))
+                except ValueError as e:
+                    raise ValueError(ErrorMessages.INVALID_NDJSON_LINE.format(position, path)) from e
+                if len(batch) >= batch_size:
+                    read += len(batch)
+                    flush(batch)
+                    batch = []
+            position = stop + 1
+        if batch:
+            read += len(batch)
+            flush(batch)
+
+    return rows, read, rejections
+
+
+def _process_context():
+    """
+    Start method for the parsing processes.
+
+    The loader runs on a pipeline thread while other threads may hold locks,
+    and a forked child would inherit those locks held, so workers are never
+    forked from this process.
+    """
+    if ApplicationConfig.NDJSON_START_METHOD in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context(ApplicationConfig.NDJSON_START_METHOD)
+    return multiprocessing.get_context("spawn")
+
+
+def _range_results(path: str, ranges: list[tuple[int, int]], data_type: str, workers: int,
+                   batch_size: int) -> Generator[tuple[list[tuple], int, Counter], None, None]:
+    """Parse ranges in a process pool, yielding results in file order with a bounded number in flight."""
+    if workers == 1 or len(ranges) == 1:
+        for start, end in ranges:
+            yield _parse_range(path, start, end, data_type, batch_size)
+        return
+
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=_process_context())
+    try:
+        pending = deque()
+        remaining = iter(ranges)
+        for start, end in islice(remaining, workers * ApplicationConfig.NDJSON_PENDING_PER_WORKER):
+            pending.append(executor.submit(_parse_range, path, start, end, data_type, batch_size))
+
+        while pending:
+            result = pending.popleft().result()
+            for start, end in islice(remaining, 1):
+                pending.append(executor.submit(_parse_range, path, start, end, data_type, batch_size))
+            yield result
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def load_valid_items(path: str, data_type: str) -> Iterable[dict]:
+    """Valid items of an input file, parsed in parallel for NDJSON and streamed for a JSON array."""
+    if is_ndjson(path):
+        return NdjsonLoader.load_valid(path, data_type)
+    return DataFilter.filter_data(FileLoader.load_file_data(path), data_type)
+
+
+class NdjsonLoader:
+    """Loads and validates newline-delimited JSON files on several processes."""
+
+    @staticmethod
+    def load_valid(path: str, data_type: str, workers: Optional[int] = ApplicationConfig.NDJSON_WORKERS,
+                   range_size: int = ApplicationConfig.NDJSON_RANGE_SIZE,
+                   batch_size: int = ApplicationConfig.VALIDATION_BATCH_SIZE) -> Generator[dict, None, None]:
+        """
+        Stream the valid items of an NDJSON file.
+
+        The file is split at newlines into byte ranges, at least one per
+        worker, and each range is memory-mapped, parsed and validated in its
+        own process. This does the work of FileLoader.load_file_data and
+        DataFilter.filter_data together, with the same metrics, and yields
+        items in file order ready for a repository's insert_batch.
+
+        Args:
+            path: Path to the NDJSON file
+            data_type: Validation strategy for the file ('student' or 'room')
+            workers: Number of processes, every CPU when not given
+            range_size: Largest number of bytes parsed by one task, lowered further
+                so the ranges in flight stay within NDJSON_PENDING_BYTES
+            batch_size: Number of items validated at once
+
+        Yields:
+            Valid items holding the validator's required fields
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            ValueError: If a line is not valid JSON.
+        """
+        fields = ValidatorContext(data_type).strategy.required_fields
+        for row in NdjsonLoader.load_valid_rows(path, data_type, fields, workers, range_size, batch_size):
+            yield dict(zip(fields, row))
+
+    @staticmethod
+    def load_valid_rows(path: str, data_type: str, fields: tuple[str, ...],
+                        workers: Optional[int] = ApplicationConfig.NDJSON_WORKERS,
+                        range_size: int = ApplicationConfig.NDJSON_RANGE_SIZE,
+                        batch_size: int = ApplicationConfig.VALIDATION_BATCH_SIZE) -> Generator[tuple, None, None]:
+        """
+        Stream the valid items of an NDJSON file as tuples, like load_valid().
+
+        Args:
+            path: Path to the NDJSON file
+            data_type: Validation strategy for the file ('student' or 'room')
+            fields: Required fields of the validator, in the order of the tuples yielded
+            workers: See load_valid
+            range_size: See load_valid
+            batch_size: See load_valid
+
+        Yields:
+            Tuples of the fields' values
+        """
+        workers = workers or os.cpu_count() or 1
+        size = os.path.getsize(path)
+        # a finished range's rows wait in the parent until they are consumed
+        in_flight = workers * ApplicationConfig.NDJSON_PENDING_PER_WORKER
+        range_size = min(range_size, -(-size // workers), ApplicationConfig.NDJSON_PENDING_BYTES // in_flight)
+        ranges = split_ranges(path, max(1, range_size))
+        logger.info(LogMessages.NDJSON_PARSING.format(path, len(ranges), min(workers, max(len(ranges), 1))))
+
+        required = ValidatorContext(data_type).strategy.required_fields
+        layout = tuple(required.index(field) for field in fields)
+        reordered = layout != tuple(range(len(required)))
+        totals = Counter()
+        seen = 0
+        for rows, read, rejections in _range_results(path, ranges, data_type, workers, batch_size):
+            ROWS_READ.inc(read, file=os.path.basename(path))
+            ROWS_VALID.inc(len(rows), type=data_type)
+            for reason, count in rejections.items():
+                if count:
+                    ROWS_REJECTED.inc(count, type=data_type, reason=reason)
+            totals.update(rejections)
+            seen += read
+            if reordered:
+                yield from (tuple(row[index] for index in layout) for row in rows)
+            else:
+                yield from rows
+
+        rejected = +totals
+        if rejected:
+            logger.warning(LogMessages.ITEMS_REJECTED.format(rejected.total(), seen, data_type, dict(rejected)))
+
+    @staticmethod
+    def convert(source: str, target: str) -> int:
+        """
+        Rewrite a JSON array file as NDJSON, one compact object per line.
+
+        Items are streamed, so the array is never held in memory, and the
+        target is written under a temporary name and renamed into place.
+
+        Args:
+            source: Path to the JSON array file
+            target: Path of the NDJSON file to write
+
+        Returns:
+            Number of items written
+        """
+        def number(value):
+            # ijson reads non-integer numbers as Decimal; they are written back as floats
+            if isinstance(value, Decimal):
+                return float(value)
+            raise TypeError(value)
+
+        directory = os.path.dirname(os.path.abspath(target))
+        descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(target) + ".")
+        written = 0
+        try:
+            with io.open(descriptor, ApplicationConfig.FILE_MODE_WRITE, encoding=ApplicationConfig.DEFAULT_ENCODING,
+                         newline="", buffering=ApplicationConfig.JSON_READ_BUFFER_SIZE) as file:
+                for item in FileLoader.load_file_data(source):
+                    file.write(json.dumps(item, ensure_ascii=False, separators=(",", ":"), default=number))
+                    file.write("\n")
+                    written += 1
+            os.chmod(temp_path, output_file_mode())
+            os.replace(temp_path, target)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+        logger.info(LogMessages.NDJSON_CONVERTED.format(written, source, target))
+        return written
@@ -0,0 +1,219 @@
+import logging
+from datetime import date, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from itertools import islice
+from typing import Iterable, Optional
+import numpy as np
+from src.app.services.reporting_service import ReportingService
+from src.app.constants.application_config import ApplicationConfig
+from src.app.constants.messages import LogMessages
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+_EPOCH = date(1970, 1, 1)
+_SEX_CODES = {"M": 0, "F": 1}
+_UNKNOWN_SEX = 255
+_AVG_SCALE = Decimal("0.0001")
+
+
+def _years_between(born: date, as_of: date) -> int:
+    """Whole years from born to as_of, as TIMESTAMPDIFF(YEAR, born, as_of) counts them."""
+    return as_of.year - born.year - ((as_of.month, as_of.day) < (born.month, born.day))
+
+
+class OfflineReportEngine:
+    """
+    Computes the four reports in-process, without a database.
+
+    Validated items are consumed in chunks that are turned into NumPy columns
+    and folded into per-room accumulators (student count, age sum, youngest
+    and oldest birthday, males and females) as they arrive, then discarded.
+
+    A repeated student id keeps its last row, as the upserts do. To take the
+    earlier row back, every folded student is kept in a ledger of id-sorted
+    runs (student id as int64, room index as int32, birthday as days since
+    1970, sex as uint8), 17 bytes per student, merged like a binary counter
+    so each row is copied a logarithmic number of times. When the input is
+    known to hold every id once, unique_ids skips the ledger and memory is
+    proportional to the rooms plus one chunk.
+
+    Results match the SQL reports: average age is the mean of
+    FLOOR(DATEDIFF(as_of, birthday) / 365.25) rounded to four places, and the
+    age difference uses TIMESTAMPDIFF(YEAR, ...) semantics. Students whose room
+    was not loaded are dropped, as the foreign key would reject them.
+    """
+
+    def __init__(self, as_of: Optional[date] = None,
+                 chunk_size: int = ApplicationConfig.OFFLINE_CHUNK_SIZE,
+                 unique_ids: bool = ApplicationConfig.OFFLINE_UNIQUE_STUDENT_IDS):
+        """
+        Args:
+            as_of: Date ages are computed at, the as_of parameter of the SQL reports
+            chunk_size: Number of students converted to columns at once
+            unique_ids: Whether every student id appears once, so no earlier row ever needs replacing
+        """
+        self.as_of = as_of or date.today()
+        self.chunk_size = chunk_size
+        self.unique_ids = unique_ids
+        self._as_of_days = (self.as_of - _EPOCH).days
+        self._room_names: dict[int, str] = {}
+        self._room_ids = np.empty(0, dtype=np.int64)
+        # id-sorted runs of ids, room indexes, birthdays and sex codes of the students folded so far
+        self._runs: list[tuple[np.ndarray, ...]] = []
+        self._allocate(0)
+
+    def _allocate(self, rooms: int) -> None:
+        """Reset the per-room accumulators for the given number of rooms."""
+        self._counts = np.zeros(rooms, dtype=np.int64)
+        self._age_sums = np.zeros(rooms, dtype=np.int64)
+        self._min_birthday = np.full(rooms, np.iinfo(np.int32).max, dtype=np.int32)
+        self._max_birthday = np.full(rooms, np.iinfo(np.int32).min, dtype=np.int32)
+        self._males = np.zeros(rooms, dtype=np.int64)
+        self._females = np.zeros(rooms, dtype=np.int64)
+
+    def load_rooms(self, rooms: Iterable[dict]) -> None:
+        """Register validated rooms; a repeated id keeps its last name like the upsert does."""
+        for room in rooms:
+            self._room_names[room["id"]] = room["name"]
+
+        self._room_ids = np.array(sorted(self._room_names), dtype=np.int64)
+        self._runs = []
+        self._allocate(len(self._room_ids))
+
+    def load_students(self, students: Iterable[dict]) -> None:
+        """Fold validated students into the accumulators one chunk at a time."""
+        students = iter(students)
+        dropped = 0
+        while chunk := list(islice(students, self.chunk_size)):
+            dropped += self._add_chunk(chunk)
+
+        if dropped:
+            logger.warning(LogMessages.OFFLINE_STUDENTS_DROPPED.format(dropped))
+
+    def _add_chunk(self, chunk: list[dict]) -> int:
+        """Fold one chunk of students into the accumulators and return how many were dropped."""
+        size = len(chunk)
+        student_ids = np.fromiter((student["id"] for student in chunk), dtype=np.int64, count=size)
+        room_ids = np.fromiter((student["room"] for student in chunk), dtype=np.int64, count=size)
+        sex = np.fromiter(
+            (_SEX_CODES.get(student["sex"], _UNKNOWN_SEX) for student in chunk), dtype=np.uint8, count=size
+        )
+        birthday = np.array(
+            [student["birthday"][:10] for student in chunk], dtype="datetime64[D]"
+        ).astype(np.int32)
+
+        positions = np.searchsorted(self._room_ids, room_ids)
+        known = positions < len(self._room_ids)
+        known[known] = self._room_ids[positions[known]] == room_ids[known]
+        # students the server would never store cannot replace an earlier row of their id either
+        keep = known & (sex != _UNKNOWN_SEX)
+        columns = (student_ids[keep], positions[keep].astype(np.int32), birthday[keep], sex[keep])
+
+        if self.unique_ids:
+            self._fold(*columns[1:])
+        else:
+            self._fold_replacing(columns)
+        return size - int(keep.sum())
+
+    def _fold(self, rooms: np.ndarray, birthday: np.ndarray, sex: np.ndarray, sign: int = 1) -> None:
+        """Add students to the accumulators, or take them out of the counts and sums with sign -1."""
+        days_lived = self._as_of_days - birthday.astype(np.int64)
+        # FLOOR(days / 365.25) in exact integer arithmetic
+        ages = (days_lived * 4) // 1461
+
+        room_count = len(self._room_ids)
+        self._counts += sign * np.bincount(rooms, minlength=room_count)
+        self._age_sums += sign * np.bincount(rooms, weights=ages, minlength=room_count).astype(np.int64)
+        self._males += sign * np.bincount(rooms[sex == 0], minlength=room_count)
+        self._females += sign * np.bincount(rooms[sex == 1], minlength=room_count)
+        if sign > 0:
+            np.minimum.at(self._min_birthday, rooms, birthday)
+            np.maximum.at(self._max_birthday, rooms, birthday)
+
+    def _fold_replacing(self, columns: tuple[np.ndarray, ...]) -> None:
+        """Fold a chunk so that the last row of every id wins, within the chunk and over earlier ones."""
+        student_ids = columns[0]
+        # np.unique indexes the first occurrence of each id, which is the last one in reversed order
+        _, first_reversed = np.unique(student_ids[::-1], return_index=True)
+        if len(first_reversed) < len(student_ids):
+            last = len(student_ids) - 1 - first_reversed
+            columns = tuple(column[last] for column in columns)
+
+        earlier = self._take_back(columns[0])
+        stale = np.empty(0, dtype=np.int32)
+        if earlier is not None:
+            _, rooms, birthday, sex = earlier
+            self._fold(rooms, birthday, sex, sign=-1)
+            # a room whose youngest or oldest student was taken back needs its extremes found again
+            extreme = (birthday == self._min_birthday[rooms]) | (birthday == self._max_birthday[rooms])
+            stale = np.unique(rooms[extreme])
+
+        self._record(columns)
+        self._fold(*columns[1:])
+        if len(stale):
+            self._refresh_extremes(stale)
+
+    def _take_back(self, student_ids: np.ndarray) -> Optional[tuple[np.ndarray, ...]]:
+        """Remove the ledger rows of the given ids and return them as columns, or None if none was there."""
+        taken = []
+        for index, run in enumerate(self._runs):
+            run_ids = run[0]
+            positions = np.searchsorted(run_ids, student_ids)
+            found = positions < len(run_ids)
+            found[found] = run_ids[positions[found]] == student_ids[found]
+            if not found.any():
+                continue
+            hits = positions[found]
+            taken.append(tuple(column[hits] for column in run))
+            remaining = np.ones(len(run_ids), dtype=bool)
+            remaining[hits] = False
+            self._runs[index] = tuple(column[remaining] for column in run)
+
+        if not taken:
+            return None
+        return tuple(np.concatenate(column) for column in zip(*taken))
+
+    def _record(self, columns: tuple[np.ndarray, ...]) -> None:
+        """Add a chunk to the ledger, merging runs of similar size so each row is copied O(log n) times."""
+        run = columns
+        while self._runs and len(self._runs[-1][0]) <= len(run[0]):
+            run = tuple(np.concatenate(pair) for pair in zip(self._runs.pop(), run))
+        order = np.argsort(run[0], kind="stable")
+        self._runs.append(tuple(column[order] for column in run))
+
+    def _refresh_extremes(self, rooms: np.ndarray) -> None:
+        """Recompute the youngest and oldest birthday of the given rooms from the ledger."""
+        self._min_birthday[rooms] = np.iinfo(np.int32).max
+        self._max_birthday[rooms] = np.iinfo(np.int32).min
+        for _, run_rooms, run_birthday, _ in self._runs:
+            hit = np.isin(run_rooms, rooms)
+            np.minimum.at(self._min_birthday, run_rooms[hit], run_birthday[hit])
+            np.maximum.at(self._max_birthday, run_rooms[hit], run_birthday[hit])
+
+    def summary(self) -> list[dict]:
+        """Per-room rows shaped like SQLQueries.ROOM_AGE_SUMMARY, ordered by room_id."""
+        rows = []
+        for index, room_id in enumerate(self._room_ids.tolist()):
+            count = int(self._counts[index])
+            row = {
+                "room_id": room_id,
+                "name": self._room_names[room_id],
+                "students_count": count,
+                "avg_age": None,
+                "min_age": None,
+                "max_age": None,
+                "sex_count": int(self._males[index] > 0) + int(self._females[index] > 0),
+            }
+            if count:
+                youngest = _EPOCH + timedelta(days=int(self._max_birthday[index]))
+                oldest = _EPOCH + timedelta(days=int(self._min_birthday[index]))
+                row["avg_age"] = (Decimal(int(self._age_sums[index])) / count).quantize(_AVG_SCALE, ROUND_HALF_UP)
+                row["min_age"] = _years_between(youngest, self.as_of)
+                row["max_age"] = _years_between(oldest, self.as_of)
+            rows.append(row)
+        return rows
+
+    def run_all(self, top_n: int = ApplicationConfig.REPORT_TOP_N) -> dict[str, list[dict]]:
+        """Build every report, keyed by report name like ReportingService.run_all."""
+        return ReportingService.derive_reports(self.summary(), top_n)
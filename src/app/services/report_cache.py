@@ -0,0 +1,197 @@
+import os
+import pickle
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Optional
+from src.app.constants.application_config import ApplicationConfig
+from src.app.constants.messages import LogMessages
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+MEMORY_HIT = "memory"
+DISK_HIT = "disk"
+MISS = "miss"
+
+
+def cache_key(dialect: str, query: str, params: Optional[dict], as_of: date, data_version: str) -> str:
+    """
+    Digest identifying one report result.
+
+    Args:
+        dialect: SQL dialect the query runs on
+        query: Report query text
+        params: Query parameters
+        as_of: Date the report's ages are computed at
+        data_version: Token of the data state the result was read from
+
+    Returns:
+        Hex digest usable as a file name
+    """
+    parts = (dialect, query, sorted((params or {}).items()), as_of.isoformat(), data_version)
+    return hashlib.blake2b(repr(parts).encode(ApplicationConfig.DEFAULT_ENCODING), digest_size=16).hexdigest()
+
+
+class ReportCache:
+    """
+    Two-level cache of report rows keyed on the state of the data.
+
+    Results are held pickled, in memory under an LRU bound on entries and
+    bytes, and optionally in a directory that outlives the process, bounded
+    by total size with the least recently used files evicted first. Keys
+    include the data version token the repositories replace after every
+    insert, so an entry never outlives the data it was computed from and no
+    invalidation is needed; stale entries simply age out. The cache directory
+    is trusted local state, like the ingest manifests.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None,
+                 max_entries: int = ApplicationConfig.REPORT_CACHE_MAX_ENTRIES,
+                 max_bytes: int = ApplicationConfig.REPORT_CACHE_MAX_BYTES,
+                 max_disk_bytes: int = ApplicationConfig.REPORT_CACHE_MAX_DISK_BYTES):
+        """
+        Args:
+            cache_dir: Directory for the disk layer; memory only when not given
+            max_entries: Most results kept in memory
+            max_bytes: Most pickled bytes kept in memory
+            max_disk_bytes: Most bytes kept in cache_dir
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._bytes = 0
+        # concurrent reports look up and store from several threads
+        self._lock = threading.Lock()
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, key: str) -> tuple[Optional[list], str]:
+        """
+        Find a result.
+
+        Args:
+            key: Output of cache_key()
+
+        Returns:
+            The rows, or None, and the layer that answered: 'memory', 'disk' or 'miss'
+        """
+        with self._lock:
+            blob = self._entries.get(key)
+            if blob is not None:
+                self._entries.move_to_end(key)
+                return pickle.loads(blob), MEMORY_HIT
+
+        blob = self._read_file(key)
+        if blob is None:
+            return None, MISS
+        with self._lock:
+            self._remember(key, blob)
+        return pickle.loads(blob), DISK_HIT
+
+    def put(self, key: str, rows: list) -> None:
+        """
+        Store a result in memory and, when configured, on disk.
+
+        Args:
+            key: Output of cache_key()
+            rows: Report rows; later changes to them do not reach the cache
+        """
+        blob = pickle.dumps(rows, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._remember(key, blob)
+        if self.cache_dir is not None:
+            self._write_file(key, blob)
+            self._evict_files()
+
+    def clear(self) -> None:
+        """Drop every entry from memory and disk."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.cache_dir is not None:
+            for entry in self._files():
+                os.remove(entry.path)
+
+    def _remember(self, key: str, blob: bytes) -> None:
+        """Add an entry to the memory layer, evicting least recently used ones. Caller holds the lock."""
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous)
+        if len(blob) > self.max_bytes:
+            return
+
+        self._entries[key] = blob
+        self._bytes += len(blob)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ApplicationConfig.REPORT_CACHE_SUFFIX)
+
+    def _files(self) -> list[os.DirEntry]:
+        return [
+            entry for entry in os.scandir(self.cache_dir)
+            if entry.name.endswith(ApplicationConfig.REPORT_CACHE_SUFFIX)
+        ]
+
+    def _read_file(self, key: str) -> Optional[bytes]:
+        """Read a stored result and mark it recently used."""
+        if self.cache_dir is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                blob = file.read()
+            os.utime(path)
+            return blob
+        except FileNotFoundError:
+            return None
+        except OSError as error:
+            logger.warning(LogMessages.REPORT_CACHE_UNREADABLE.format(path, error))
+            return None
+
+    def _write_file(self, key: str, blob: bytes) -> None:
+        """Write a result under a temporary name and rename it into place."""
+        descriptor, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=key + ".")
+        try:
+            with open(descriptor, "wb") as file:
+                file.write(blob)
+            os.replace(temp_path, self._path(key))
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+    def _evict_files(self) -> None:
+        """Remove least recently used files until the directory fits max_disk_bytes."""
+        files = []
+        for entry in self._files():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in files)
+        evicted = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted += 1
+
+        if evicted:
+            logger.info(LogMessages.REPORT_CACHE_EVICTED.format(evicted, self.max_disk_bytes))
@@ -1,46 +1,309 @@
+import heapq
+import time
+from datetime import date
+from itertools import chain
+from typing import Callable, Generator, Iterator, Optional
+from concurrent.futures import ThreadPoolExecutor
 from src.app.database.database_connector import MySQLConnector
+from src.app.database.data_version import read_data_version
+from src.app.services.report_cache import ReportCache, cache_key
+from src.app.services.metrics import REPORT_SECONDS, REPORT_ROWS, REPORT_CACHE_LOOKUPS
 from src.app.constants.sql_queries import SQLQueries
+from src.app.constants.application_config import ApplicationConfig
+from src.app.constants.messages import ErrorMessages
+
+
+def report_params(attribute: str, as_of: date, top_n: int = ApplicationConfig.REPORT_TOP_N,
+                  first_room: int = ApplicationConfig.REPORT_FIRST_ROOM_ID,
+                  last_room: int = ApplicationConfig.REPORT_LAST_ROOM_ID) -> Optional[dict]:
+    """Parameters a report query takes, None for a query that takes none."""
+    params = {}
+    if attribute in SQLQueries.DATED_QUERIES:
+        params["as_of"] = as_of.isoformat()
+    if attribute in SQLQueries.TOP_N_QUERIES:
+        params["top_n"] = top_n
+    if attribute in SQLQueries.ROOM_RANGE_QUERIES:
+        params["first_room"] = first_room
+        params["last_room"] = last_room
+    return params or None
+
+
+def _fetch_all(connector: MySQLConnector, query: str, report: str, params: Optional[dict] = None) -> list[dict]:
+    """Run a report query and return its rows as dictionaries, recording its latency."""
+    cursor = connector.get_cursor(dictionary=True, prepared=True)
+    try:
+        with REPORT_SECONDS.time(report=report):
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+        REPORT_ROWS.set(len(rows), report=report)
+        return rows
+    finally:
+        cursor.close()
+
+
+def _stream_rows(connector: MySQLConnector, query: str, report: str, params: Optional[dict],
+                 fetch_size: int) -> Generator[dict, None, None]:
+    """Run a report query on an unbuffered cursor and yield its rows as they arrive."""
+    cursor = connector.get_cursor(dictionary=True, buffered=False)
+    # only time spent in the driver counts, not time the consumer holds a row
+    seconds = 0.0
+    count = 0
+    try:
+        started = time.perf_counter()
+        cursor.execute(query, params)
+        try:
+            while rows := cursor.fetchmany(fetch_size):
+                seconds += time.perf_counter() - started
+                count += len(rows)
+                yield from rows
+                started = time.perf_counter()
+            seconds += time.perf_counter() - started
+            REPORT_SECONDS.observe(seconds, report=report)
+            REPORT_ROWS.set(count, report=report)
+        except GeneratorExit:
+            # an unbuffered result must be read to the end before the connection is reused
+            cursor.fetchall()
+            raise
+    finally:
+        cursor.close()
 
 
 class ReportingService:
     """Service for generating reports from database queries."""
 
-    def __init__(self, db_connection: MySQLConnector):
-        """Initialize with database connection."""
+    # report name -> query attribute, looked up on the connector's dialect
+    _report_queries = {
+        ApplicationConfig.TOP_5_LEAST_AVG_AGE_REPORT: "TOP_5_LEAST_AVERAGE_AGE_ROOMS",
+        ApplicationConfig.ROOMS_WITH_DIFFERENT_SEX_REPORT: "ROOMS_WITH_DIFFERENT_SEX",
+        ApplicationConfig.ROOMS_WITH_STUDENTS_COUNT_REPORT: "ROOMS_WITH_STUDENTS_COUNT",
+        ApplicationConfig.TOP_5_LARGEST_AGE_DIFF_REPORT: "TOP_5_LARGEST_AGE_DIFF_ROOMS",
+    }
+    # listing report name -> query reading one keyset page of it
+    _page_queries = {
+        ApplicationConfig.ROOMS_WITH_STUDENTS_COUNT_REPORT: "ROOMS_WITH_STUDENTS_COUNT_PAGE",
+        ApplicationConfig.ROOMS_WITH_DIFFERENT_SEX_REPORT: "ROOMS_WITH_DIFFERENT_SEX_PAGE",
+    }
+
+    def __init__(self, db_connection: MySQLConnector, as_of: Optional[date] = None,
+                 cache: Optional[ReportCache] = None, top_n: int = ApplicationConfig.REPORT_TOP_N,
+                 first_room: int = ApplicationConfig.REPORT_FIRST_ROOM_ID,
+                 last_room: int = ApplicationConfig.REPORT_LAST_ROOM_ID):
+        """
+        Initialize with database connection.
+
+        Args:
+            db_connection: Connected database connector
+            as_of: Date ages are computed at, today when not given; it stays
+                fixed for the service, so repeated runs are reproducible
+            cache: Result cache consulted before a report query runs
+            top_n: Number of rooms the top-N reports list
+            first_room: Lowest room id the reports cover
+            last_room: Highest room id the reports cover
+        """
         self.connector = db_connection
+        self.as_of = as_of or date.today()
+        self.cache = cache
+        self.top_n = top_n
+        self.first_room = first_room
+        self.last_room = last_room
 
-    def rooms_with_students_count(self):
-        """Get count of students in each room."""
-        cursor = self.connector.get_cursor(dictionary=True)
-        cursor.execute(
-            SQLQueries.ROOMS_WITH_STUDENTS_COUNT
-        )
+    def _query(self, attribute: str) -> tuple[str, Optional[dict]]:
+        """SQL of a query in the connector's dialect and its parameters."""
+        params = report_params(attribute, self.as_of, self.top_n, self.first_room, self.last_room)
+        return getattr(self.connector.queries, attribute), params
 
-        return cursor.fetchall()
+    def _page_query(self, name: str, after_room: int, page_size: int) -> tuple[str, dict]:
+        """SQL and parameters of the page of a listing report following after_room."""
+        if name not in self._page_queries:
+            raise ValueError(ErrorMessages.REPORT_NOT_PAGED.format(name))
+        params = {"after_room": after_room, "last_room": self.last_room, "page_size": page_size}
+        return getattr(self.connector.queries, self._page_queries[name]), params
 
-    def top_5_least_average_age_room(self):
-        """Get top 5 rooms with lowest average age."""
-        cursor = self.connector.get_cursor(dictionary=True)
-        cursor.execute(
-            SQLQueries.TOP_5_LEAST_AVERAGE_AGE_ROOMS
-        )
+    def _data_version(self) -> Optional[str]:
+        """Token of the current data state, read before any report query; None disables caching."""
+        return None if self.cache is None else read_data_version(self.connector)
 
-        return cursor.fetchall()
+    def _cached(self, report: str, query: str, params: Optional[dict], data_version: Optional[str],
+                fetch: Callable[[], list[dict]]) -> list[dict]:
+        """Answer a report query from the cache, running it and storing the rows on a miss."""
+        if data_version is None:
+            return fetch()
 
-    def top_5_rooms_with_largest_age_diff(self):
-        """Get top 5 rooms with largest age difference between students."""
-        cursor = self.connector.get_cursor(dictionary=True)
-        cursor.execute(
-            SQLQueries.TOP_5_LARGEST_AGE_DIFF_ROOMS
+        key = cache_key(self.connector.queries.DIALECT, query, params, self.as_of, data_version)
+        rows, result = self.cache.lookup(key)
+        REPORT_CACHE_LOOKUPS.inc(report=report, result=result)
+        if rows is None:
+            rows = fetch()
+            self.cache.put(key, rows)
+        return rows
+
+    def _run(self, attribute: str, report: str, data_version: Optional[str]) -> list[dict]:
+        """Run one query on the main connection, through the cache."""
+        query, params = self._query(attribute)
+        return self._cached(
+            report, query, params, data_version, lambda: _fetch_all(self.connector, query, report, params)
         )
 
-        return cursor.fetchall()
+    def _fetch(self, name: str) -> list[dict]:
+        """Run one report query on the main connection."""
+        return self._run(self._report_queries[name], name, self._data_version())
+
+    def rooms_with_students_count(self):
+        """Get count of students in each room."""
+        return self._fetch(ApplicationConfig.ROOMS_WITH_STUDENTS_COUNT_REPORT)
+
+    def top_5_least_average_age_room(self):
+        """Get the top_n rooms with lowest average age."""
+        return self._fetch(ApplicationConfig.TOP_5_LEAST_AVG_AGE_REPORT)
+
+    def top_5_rooms_with_largest_age_diff(self):
+        """Get the top_n rooms with largest age difference between students."""
+        return self._fetch(ApplicationConfig.TOP_5_LARGEST_AGE_DIFF_REPORT)
 
     def rooms_with_different_sex(self):
         """Get rooms that have both male and female students."""
-        cursor = self.connector.get_cursor(dictionary=True)
-        cursor.execute(
-            SQLQueries.ROOMS_WITH_DIFFERENT_SEX
-        )
+        return self._fetch(ApplicationConfig.ROOMS_WITH_DIFFERENT_SEX_REPORT)
+
+    def stream_report(self, name: str,
+                      fetch_size: int = ApplicationConfig.REPORT_FETCH_SIZE) -> Generator[dict, None, None]:
+        """
+        Yield a report's rows as the server sends them, without buffering the result.
+
+        The rows must be consumed, or the generator closed, before the
+        connector runs another query. A cached result is replayed instead;
+        streamed rows are never stored in the cache.
+
+        Args:
+            name: Report name, as used for run_all results
+            fetch_size: Number of rows fetched from the server at a time
+        """
+        query, params = self._query(self._report_queries[name])
+        data_version = self._data_version()
+        if data_version is not None:
+            key = cache_key(self.connector.queries.DIALECT, query, params, self.as_of, data_version)
+            rows, result = self.cache.lookup(key)
+            REPORT_CACHE_LOOKUPS.inc(report=name, result=result)
+            if rows is not None:
+                return iter(rows)
+        return _stream_rows(self.connector, query, name, params, fetch_size)
+
+    def report_pages(self, name: str,
+                     page_size: int = ApplicationConfig.REPORT_PAGE_SIZE) -> Generator[list[dict], None, None]:
+        """
+        Yield a listing report a page of rooms at a time, in room_id order.
+
+        Each page is one query seeking past the last room_id of the page
+        before it, so a page costs the same however far into the listing it
+        is and only one page is held at a time. Pages are read as the data
+        stands when each is fetched and are never cached.
+
+        Args:
+            name: Name of a listing report, rooms_with_students_count or rooms_with_different_sex
+            page_size: Most rooms in a page
+
+        Raises:
+            ValueError: If the report is a top-N report, which is no longer than top_n
+        """
+        after_room = self.first_room - 1
+        while True:
+            query, params = self._page_query(name, after_room, page_size)
+            page = _fetch_all(self.connector, query, name, params)
+            if page:
+                yield page
+            if len(page) < page_size:
+                return
+            after_room = page[-1]["room_id"]
+
+    def paged_report(self, name: str, page_size: int = ApplicationConfig.REPORT_PAGE_SIZE) -> Iterator[dict]:
+        """Rows of a report, reading listings through report_pages and top-N reports in one query."""
+        if name not in self._page_queries:
+            return iter(self._fetch(name))
+        return chain.from_iterable(self.report_pages(name, page_size))
+
+    def run_all(self, concurrent: bool = True, single_scan: bool = False,
+                from_room_stats: bool = False) -> dict[str, list[dict]]:
+        """
+        Run every report and return the results keyed by report name.
+
+        Args:
+            concurrent: Run the report queries at the same time, each on its own
+                pooled connection; ignored when the connector has no pool
+            single_scan: Run one summary query over Students and derive all
+                reports from it instead of running each report query
+            from_room_stats: Derive all reports from the RoomStats table, reading
+                one row per room; avg_age is then the mean exact age rather
+                than the mean of whole-year ages
+
+        Returns:
+            Report rows keyed by report name
+        """
+        data_version = self._data_version()
+        if from_room_stats:
+            return self.derive_reports(
+                self._run("ROOM_STATS_SUMMARY", ApplicationConfig.ROOM_STATS_SUMMARY_REPORT, data_version),
+                self.top_n
+            )
+
+        if single_scan:
+            return self.derive_reports(
+                self._run("ROOM_AGE_SUMMARY", ApplicationConfig.ROOM_AGE_SUMMARY_REPORT, data_version), self.top_n
+            )
+
+        if not concurrent or self.connector.pool is None:
+            return {
+                name: self._run(attribute, name, data_version)
+                for name, attribute in self._report_queries.items()
+            }
+
+        with ThreadPoolExecutor(max_workers=len(self._report_queries)) as executor:
+            futures = {
+                name: executor.submit(self._fetch_leased, attribute, name, data_version)
+                for name, attribute in self._report_queries.items()
+            }
+            return {name: future.result() for name, future in futures.items()}
+
+    def _fetch_leased(self, attribute: str, report: str, data_version: Optional[str]) -> list[dict]:
+        """Run a report query on a connection leased from the pool, unless the cache answers it."""
+        query, params = self._query(attribute)
+
+        def fetch():
+            with self.connector.lease() as leased:
+                return _fetch_all(leased, query, report, params)
+
+        return self._cached(report, query, params, data_version, fetch)
+
+    @staticmethod
+    def derive_reports(summary: list[dict], top_n: int = ApplicationConfig.REPORT_TOP_N) -> dict[str, list[dict]]:
+        """
+        Build every report from per-room summary rows.
+
+        Args:
+            summary: Rows shaped like ROOM_AGE_SUMMARY, ordered by room_id
+            top_n: Number of rooms the top-N reports list
+
+        Returns:
+            Report rows keyed by report name, matching the per-report queries
+        """
+        occupied = [row for row in summary if row["students_count"]]
+
+        least_avg_age = heapq.nsmallest(top_n, occupied, key=lambda row: row["avg_age"])
+        largest_age_diff = heapq.nsmallest(top_n, occupied, key=lambda row: row["min_age"] - row["max_age"])
 
-        return cursor.fetchall()
\ No newline at end of file
+        return {
+            ApplicationConfig.TOP_5_LEAST_AVG_AGE_REPORT: [
+                {"room_id": row["room_id"], "name": row["name"], "avg_age": row["avg_age"]}
+                for row in least_avg_age
+            ],
+            ApplicationConfig.ROOMS_WITH_DIFFERENT_SEX_REPORT: [
+                {"room_id": row["room_id"], "name": row["name"]}
+                for row in occupied if row["sex_count"] > 1
+            ],
+            ApplicationConfig.ROOMS_WITH_STUDENTS_COUNT_REPORT: [
+                {"room_id": row["room_id"], "name": row["name"], "students_count": row["students_count"]}
+                for row in summary
+            ],
+            ApplicationConfig.TOP_5_LARGEST_AGE_DIFF_REPORT: [
+                {"room_id": row["room_id"], "name": row["name"], "age_diff": row["max_age"] - row["min_age"]}
+                for row in largest_age_diff
+            ],
+        }
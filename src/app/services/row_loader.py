@@ -0,0 +1,163 @@
+import os
+import logging
+from collections import Counter
+from typing import Generator, Iterable, Optional
+import ijson
+from src.app.services.file_loader import FileLoader
+from src.app.services.ndjson_loader import NdjsonLoader, is_ndjson
+from src.app.services.data_validator import ValidatorContext, INCOMPLETE_RULE
+from src.app.services.metrics import ROWS_READ, ROWS_VALID, ROWS_REJECTED
+from src.app.constants.application_config import ApplicationConfig
+from src.app.constants.messages import LogMessages, ErrorMessages
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# value of a field an item does not have
+_MISSING = object()
+# value of a field holding an object or array, which no check accepts
+_NESTED = object()
+
+_START_EVENTS = ("start_map", "start_array")
+_END_EVENTS = ("end_map", "end_array")
+
+
+def load_valid_rows(path: str, data_type: str, fields: tuple[str, ...]) -> Iterable[tuple]:
+    """Valid items of an input file as normalized row tuples, for a repository's insert_rows."""
+    if is_ndjson(path):
+        return RowLoader.normalized(
+            NdjsonLoader.load_valid_rows(path, data_type, fields), data_type, fields
+        )
+    return RowLoader.load_valid_rows(path, data_type, fields)
+
+
+class RowLoader:
+    """
+    Streams valid items of a JSON array file as insert-ready tuples.
+
+    This is the dictionary-free counterpart of FileLoader.load_file_data
+    followed by DataFilter.filter_data: field values are picked straight from
+    the parser's events into one small list per item, checked with the
+    validator's rules and packed into a tuple laid out as the repository
+    inserts it. No dictionary, and no batch of them, is ever built, and the
+    validator's normalizers, such as birthday strings to dates, run once per
+    row on the client.
+    """
+
+    @staticmethod
+    def load_valid_rows(path: str, data_type: str, fields: tuple[str, ...],
+                        backend: Optional[str] = None) -> Generator[tuple, None, None]:
+        """
+        Stream the valid items of a JSON array file as tuples.
+
+        Items are checked like DataFilter.filter_data checks them, with the
+        same metrics: a missing required field counts as incomplete and an
+        item counts against the first rule it fails.
+
+        Args:
+            path: Path to the JSON file
+            data_type: Validation strategy for the file ('student' or 'room')
+            fields: Item fields, in the order of the tuples yielded
+            backend: ijson backend to parse with, defaulting to ApplicationConfig.JSON_BACKEND
+
+        Yields:
+            Tuples of the fields' values, normalized
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            ValueError: If the file contains invalid JSON.
+        """
+        strategy = ValidatorContext(data_type).strategy
+        # the required fields the rows leave out are still collected to be checked
+        columns = tuple(fields) + tuple(field for field in strategy.required_fields if field not in fields)
+        positions = {field: position for position, field in enumerate(columns)}
+        required = [positions[field] for field in strategy.required_fields]
+        checks = [(rule, positions[field], check) for rule, field, check in strategy.rules]
+        normalizers = [
+            (positions[field], normalize) for field, normalize in strategy.normalizers.items() if field in fields
+        ]
+        width = len(fields)
+
+        rejections = Counter()
+        read = valid = 0
+        try:
+            with open(path, ApplicationConfig.FILE_MODE_READ_BINARY) as file:
+                parser = FileLoader.json_backend(backend)
+                logger.info(LogMessages.JSON_BACKEND_SELECTED.format(path, parser.backend_name))
+                events = parser.basic_parse(file, buf_size=ApplicationConfig.ROW_READ_BUFFER_SIZE)
+                # depth 1 is the top-level array, depth 2 an item and anything deeper a nested value
+                depth = 0
+                in_array = in_item = False
+                values = None
+                for event, value in events:
+                    if event == "map_key":
+                        if not in_item or depth != 2:
+                            continue
+                        # a member's value follows its key, so both are taken in one step
+                        position = positions.get(value)
+                        event, value = next(events)
+                        if event in _START_EVENTS:
+                            depth += 1
+                            if position is not None:
+                                values[position] = _NESTED
+                        elif position is not None:
+                            values[position] = value
+                    elif event in _START_EVENTS:
+                        depth += 1
+                        if depth == 1:
+                            in_array = event == "start_array"
+                        elif depth == 2 and in_array:
+                            read += 1
+                            in_item = event == "start_map"
+                            if in_item:
+                                values = [_MISSING] * len(columns)
+                            else:
+                                rejections[INCOMPLETE_RULE] += 1
+                    elif event in _END_EVENTS:
+                        depth -= 1
+                        if depth == 1 and in_item:
+                            in_item = False
+                            if any(values[index] is _MISSING for index in required):
+                                rejections[INCOMPLETE_RULE] += 1
+                                continue
+                            for rule, index, check in checks:
+                                if not check(values[index]):
+                                    rejections[rule] += 1
+                                    break
+                            else:
+                                for index, normalize in normalizers:
+                                    values[index] = normalize(values[index])
+                                valid += 1
+                                yield tuple(values[:width])
+                    elif depth == 1 and in_array:
+                        # a scalar member of the array is no item
+                        read += 1
+                        rejections[INCOMPLETE_RULE] += 1
+        except ijson.JSONError as e:
+            raise ValueError(ErrorMessages.INVALID_JSON_FORMAT.format(path)) from e
+        finally:
+            ROWS_READ.inc(read, file=os.path.basename(path))
+            ROWS_VALID.inc(valid, type=data_type)
+            for reason, count in rejections.items():
+                ROWS_REJECTED.inc(count, type=data_type, reason=reason)
+
+        if rejections:
+            logger.warning(LogMessages.ITEMS_REJECTED.format(rejections.total(), read, data_type, dict(rejections)))
+
+    @staticmethod
+    def normalized(rows: Iterable[tuple], data_type: str,
+                   fields: tuple[str, ...]) -> Generator[tuple, None, None]:
+        """Apply the validator's normalizers to rows of valid values laid out as fields."""
+        strategy = ValidatorContext(data_type).strategy
+        normalizers = [
+            (fields.index(field), normalize) for field, normalize in strategy.normalizers.items() if field in fields
+        ]
+        if not normalizers:
+            yield from rows
+            return
+
+        for row in rows:
+            values = list(row)
+            for index, normalize in normalizers:
+                values[index] = normalize(values[index])
+            yield tuple(values)
@@ -1,9 +1,53 @@
 # test_basic.py
 import unittest
-from unittest.mock import Mock, patch
-from src.app.services.data_validator import RoomValidator, StudentValidator, ValidatorContext
+from unittest.mock import AsyncMock, Mock, patch
+from src.app.services.data_validator import RoomValidator, StudentValidator, ValidatorContext, BatchValidation
 from src.app.services.data_filter import DataFilter
 from src.app.database.database_operations import RoomRepository, StudentRepository
+from src.app.services.ingest_pipeline import IngestPipeline
+from src.app.services.ingest_manifest import IngestManifest
+from src.app.database.bulk_loader import BulkLoader, format_tsv_field
+from src.app.database.batch_sizing import AdaptiveBatchSizer, MultiRowInsertBuilder
+from mysql.connector import Error as MYSQLError, errorcode
+from src.app.database.database_connector import MySQLConnector
+from src.app.database.sharded_insert import ShardedInserter
+from src.app.database.room_ids import RoomIdSet
+from src.app.database.data_version import read_data_version
+from src.app.database.async_connector import AsyncMySQLConnector
+from src.app.database.async_operations import AsyncRepository
+from src.app.services.async_reporting_service import AsyncReportingService
+from src.app.services.reporting_service import ReportingService
+from src.app.database.room_stats import RoomStatsMaintainer, to_days
+from src.app.services.offline_reports import OfflineReportEngine
+from src.app.services.file_loader import FileLoader
+from src.app.services.ndjson_loader import NdjsonLoader, split_ranges
+from src.app.services.row_loader import RowLoader, load_valid_rows
+from src.app.services.file_writter import ResultWriter, output_path
+from src.app.services.report_cache import ReportCache, cache_key
+from src.app.services.metrics import MetricsRegistry, registry, ROWS_REJECTED
+from src.app.constants.application_config import ApplicationConfig
+from src.app import application
+from benchmarks.data_generator import generate
+from benchmarks import stages
+from src.app.database.schema_manager import SchemaManager
+from src.app.database import query_plans
+from src.app.database.backends import SQLiteConnector, DuckDBConnector, create_connector
+from src.app.constants.sql_queries import SQLQueries
+from mysql.connector.errors import IntegrityError
+from mysql.connector.conversion import MySQLConverter
+from contextlib import contextmanager
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
+import importlib.util
+import asyncio
+import threading
+import sqlite3
+import gzip
+import json
+import os
+import tempfile
 
 
 class TestValidators(unittest.TestCase):
@@ -66,6 +110,35 @@ class TestValidators(unittest.TestCase):
         valid_room = {"id": 1, "name": "Room A"}
         self.assertTrue(context.execute_validation(valid_room))
 
+    def test_student_validator_birthday_and_sex(self):
+        """Test student validator rejects malformed birthdays and unknown sexes."""
+        student = {"id": 1, "name": "John Doe", "birthday": "2011-08-22T00:00:00.000000", "sex": "F", "room": 1}
+        self.assertTrue(self.student_validator.validate(student))
+        self.assertFalse(self.student_validator.validate({**student, "birthday": "2011-02-30"}))
+        self.assertFalse(self.student_validator.validate({**student, "birthday": "22/08/2011"}))
+        self.assertFalse(self.student_validator.validate({**student, "sex": "X"}))
+
+    def test_tally_batch_mask_and_rejections(self):
+        """Test batch validation flags each item and counts the first rule it fails."""
+        base = {"id": 1, "name": "John Doe", "birthday": "1995-05-15", "sex": "M", "room": 1}
+        items = [
+            base,
+            {"id": 2, "name": "Jane"},
+            {**base, "id": -2},
+            {**base, "birthday": "1995-13-01"},
+            {**base, "sex": ["M"]},
+            "not an object",
+        ]
+
+        mask, rejections = self.student_validator.tally_batch(items)
+
+        self.assertEqual(mask, [True, False, False, False, False, False])
+        self.assertEqual(rejections, {
+            "incomplete": 2, "invalid_id": 1, "invalid_name": 0,
+            "invalid_room": 0, "invalid_birthday": 1, "invalid_sex": 1,
+        })
+        self.assertEqual(mask, [self.student_validator.validate(item) for item in items])
+
     def test_validator_context_invalid_type(self):
         """Test validator context with invalid type."""
         with self.assertRaises(ValueError):
@@ -80,7 +153,7 @@ class TestDataFilter(unittest.TestCase):
         """Test data filter with all valid items."""
         # Setup mock validator
         mock_validator = Mock()
-        mock_validator.execute_validation.return_value = True
+        mock_validator.execute_batch.return_value = BatchValidation([True, True], {})
         mock_validator_context.return_value = mock_validator
 
         # Test data
@@ -98,7 +171,7 @@ class TestDataFilter(unittest.TestCase):
         """Test data filter with mix of valid and invalid items."""
         # Setup mock validator to alternate between True/False
         mock_validator = Mock()
-        mock_validator.execute_validation.side_effect = [True, False, True]
+        mock_validator.execute_batch.return_value = BatchValidation([True, False, True], {"invalid_id": 1})
         mock_validator_context.return_value = mock_validator
 
         # Test data
@@ -116,12 +189,60 @@ class TestDataFilter(unittest.TestCase):
         self.assertEqual(filtered_data[0]["id"], 1)
         self.assertEqual(filtered_data[1]["id"], 2)
 
+    def test_filter_data_counts_rejections_across_batches(self):
+        """Test data filter keeps order and totals rejections over several batches."""
+        test_data = [{"id": i if i % 3 else -i, "name": f"Room {i}"} for i in range(1, 11)]
+        rejections = Counter()
+
+        filtered_data = list(DataFilter.filter_data(iter(test_data), "room", rejections, batch_size=4))
+
+        self.assertEqual([room["id"] for room in filtered_data], [1, 2, 4, 5, 7, 8, 10])
+        self.assertEqual(rejections["invalid_id"], 3)
+
+
+class TestRowLoader(unittest.TestCase):
+    """Basic tests for the dictionary-free row fast path."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        _, self.students_path = generate(self.temp_dir.name, students=500, rooms=20, invalid_ratio=0.2)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_rows_match_dict_chain(self):
+        """Test every backend keeps the items the dict chain keeps, as insert tuples with date birthdays."""
+        fields = StudentRepository.row_fields
+        rejections = Counter()
+        expected = [
+            (item["id"], item["name"], date.fromisoformat(item["birthday"][:10]), item["sex"], item["room"])
+            for item in DataFilter.filter_data(FileLoader.load_file_data(self.students_path), "student", rejections)
+        ]
+        for backend in ("python", None):
+            ROWS_REJECTED.reset()
+            self.assertEqual(list(RowLoader.load_valid_rows(self.students_path, "student", fields, backend)), expected)
+            samples = {labels["reason"]: value for labels, value in ROWS_REJECTED.samples()}
+            self.assertEqual(samples, +rejections)
+
+        ndjson_path = os.path.join(self.temp_dir.name, "students.ndjson")
+        NdjsonLoader.convert(self.students_path, ndjson_path)
+        self.assertEqual(list(load_valid_rows(ndjson_path, "student", fields)), expected)
+
+    def test_malformed_members_are_rejected(self):
+        """Test non-object members, missing fields and nested values are counted like the dict chain counts them."""
+        path = os.path.join(self.temp_dir.name, "rooms.json")
+        with open(path, "w") as f:
+            f.write('[1, [2], {"id": 3}, {"id": 4, "name": {"first": "A"}}, {"id": 5, "name": "Room #5", "x": [{}]}]')
+
+        self.assertEqual(list(RowLoader.load_valid_rows(path, "room", RoomRepository.row_fields)), [(5, "Room #5")])
+
 
 class TestRepositories(unittest.TestCase):
     """Basic tests for repository classes."""
 
     def setUp(self):
         self.mock_connector = Mock()
+        self.mock_connector.queries = SQLQueries
         self.mock_cursor = Mock()
         self.mock_connector.get_cursor.return_value = self.mock_cursor
         self.mock_connector.db_is_connected.return_value = True
@@ -169,6 +290,1635 @@ class TestRepositories(unittest.TestCase):
         with self.assertRaises(ConnectionError):
             repo.execute_batch_insertion(iter([]))  # type: ignore
 
+    def test_room_id_set(self):
+        """Test ids below and above the bitmap limit are kept and counted once."""
+        room_ids = RoomIdSet(bitmap_limit=64)
+        room_ids.update([0, 7, 8, 63, 64, 10 ** 12, 7])
+
+        self.assertEqual(len(room_ids), 6)
+        for room_id in (0, 7, 8, 63, 64, 10 ** 12):
+            self.assertIn(room_id, room_ids)
+        for room_id in (1, 9, 62, 65, -1, "7"):
+            self.assertNotIn(room_id, room_ids)
+
+    def test_orphan_students_are_quarantined(self):
+        """Test students of rooms neither inserted nor stored never reach the server."""
+        self.mock_cursor.fetchmany.side_effect = [[(5,)], []]
+        room_ids = RoomIdSet()
+        rooms = RoomRepository(self.mock_connector, room_ids=room_ids)
+        rooms.load_room_ids()
+        rooms.insert_batch(iter([{"id": 1, "name": "Room A"}]))
+
+        students = [
+            {"id": i, "name": f"S{i}", "birthday": "2000-01-01", "sex": "M", "room": room}
+            for i, room in enumerate((1, 2, 5, 3))
+        ]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "orphans.jsonl")
+            repo = StudentRepository(self.mock_connector, room_ids=room_ids, quarantine_path=path)
+            repo.insert_batch(iter(students))
+            with open(path) as f:
+                quarantined = [json.loads(line) for line in f]
+
+        query, rows = self.mock_cursor.executemany.call_args_list[-1].args
+        self.assertEqual([row[0] for row in rows], [0, 2])
+        self.assertEqual(quarantined, [students[1], students[3]])
+
+    def test_repository_unknown_insert_strategy(self):
+        """Test repository rejects unsupported insert strategies."""
+        with self.assertRaises(ValueError):
+            RoomRepository(self.mock_connector, "copy")
+
+
+class TestBulkLoader(unittest.TestCase):
+    """Basic tests for the LOAD DATA LOCAL INFILE strategy."""
+
+    def setUp(self):
+        self.mock_connector = Mock()
+        self.mock_connector.queries = SQLQueries
+        self.mock_cursor = Mock()
+        self.mock_connector.get_cursor.return_value = self.mock_cursor
+        self.mock_connector.db_is_connected.return_value = True
+
+    def test_format_tsv_field_escapes_special_characters(self):
+        """Test TSV fields escape separators and render NULL."""
+        self.assertEqual(format_tsv_field("a\tb\nc\\"), "a\\tb\\nc\\\\")
+        self.assertEqual(format_tsv_field(None), "\\N")
+        self.assertEqual(format_tsv_field(42), "42")
+
+    def test_bulk_load_writes_file_and_merges_staging(self):
+        """Test rows are written to a TSV file that is loaded, merged and removed."""
+        loaded = {}
+
+        def execute(query, params=None):
+            if params and query != SQLQueries.BUMP_DATA_VERSION:
+                with open(params[0]) as f:
+                    loaded[params[0]] = f.read()
+
+        self.mock_cursor.execute.side_effect = execute
+        repo = RoomRepository(self.mock_connector, "bulk_load")
+        repo.execute_batch_insertion(iter([{"id": 1, "name": "Room A"}, {"id": 2, "name": "Room\tB"}]))
+
+        queries = repo.get_bulk_load_queries()
+        executed = [c.args[0] for c in self.mock_cursor.execute.call_args_list]
+        self.assertEqual(executed, [
+            queries.create_staging, queries.load_staging, queries.merge_staging,
+            queries.clear_staging, queries.drop_staging, SQLQueries.BUMP_DATA_VERSION
+        ])
+        (path, content), = loaded.items()
+        self.assertEqual(content, "1\tRoom A\n2\tRoom\\tB\n")
+        self.assertFalse(os.path.exists(path))
+        self.mock_cursor.executemany.assert_not_called()
+
+    def test_bulk_load_splits_rows_across_files(self):
+        """Test large streams are loaded in several bounded files."""
+        loader = BulkLoader(self.mock_connector, StudentRepository(self.mock_connector).get_bulk_load_queries(), 2)
+        total = loader.load(iter([(i, "John Doe", "1995-05-15", "M", 1) for i in range(5)]))
+
+        self.assertEqual(total, 5)
+        load_calls = [c for c in self.mock_cursor.execute.call_args_list if len(c.args) > 1]
+        self.assertEqual(len(load_calls), 3)
+
+
+class TestMultiRowInsert(unittest.TestCase):
+    """Basic tests for packet-sized multi-row inserts."""
+
+    def setUp(self):
+        self.mock_connector = Mock()
+        self.mock_connector.queries = SQLQueries
+        self.mock_cursor = Mock()
+        self.mock_connector.get_cursor.return_value = self.mock_cursor
+        self.mock_connector.db_is_connected.return_value = True
+        self.mock_connector.get_max_allowed_packet.return_value = 4 * 1024 * 1024
+
+    def test_builder_builds_statement_for_all_rows(self):
+        """Test builder repeats the VALUES row and flattens parameters."""
+        builder = MultiRowInsertBuilder(RoomRepository(self.mock_connector).get_multi_row_template(), 1024)
+        statement, params = builder.build([(1, "Room A"), (2, "Room B")])
+
+        self.assertIn("VALUES (%s, %s), (%s, %s) ON DUPLICATE KEY UPDATE", statement)
+        self.assertEqual(params, [1, "Room A", 2, "Room B"])
+
+    def test_builder_splits_rows_by_packet_size(self):
+        """Test groups never exceed the packet budget."""
+        builder = MultiRowInsertBuilder(RoomRepository(self.mock_connector).get_multi_row_template(), 400)
+        rows = [(i, "Room #%d" % i) for i in range(100)]
+        groups = list(builder.split(rows))
+
+        self.assertGreater(len(groups), 1)
+        self.assertEqual([row for group in groups for row in group], rows)
+        for group in groups:
+            self.assertLessEqual(sum(map(builder.estimate_row_bytes, group)), builder.max_values_bytes)
+
+    def test_row_estimate_covers_escaped_literals(self):
+        """Test the estimate is never below the statement the client renders, escapes and UTF-8 included."""
+        converter = MySQLConverter("utf8mb4")
+        builder = MultiRowInsertBuilder(StudentRepository(self.mock_connector).get_multi_row_template(), 1 << 20)
+        rows = [
+            (1, "O'Brien \\ \"Zoë\"\n", 7, datetime(2000, 1, 1, 1, 2, 3, 456), "M"),
+            (2, "\x00\x1a\r", 8, date(2000, 1, 1), None),
+            (3, "名前", 9, "2001-03-02", Decimal("1.5")),
+        ]
+        statement, params = builder.build(rows)
+        rendered = statement.encode() % tuple(
+            bytes(converter.quote(converter.escape(converter.to_mysql(value)))) for value in params
+        )
+        fixed = len(builder.template.prefix) + len(builder.template.suffix)
+
+        self.assertLessEqual(len(rendered) - fixed, sum(map(builder.estimate_row_bytes, rows)))
+
+    def test_batch_sizer_grows_and_shrinks(self):
+        """Test batch size follows throughput."""
+        sizer = AdaptiveBatchSizer(initial=100, minimum=10, maximum=1000)
+        sizer.record(100, 1.0)
+        sizer.record(100, 0.5)
+        self.assertEqual(sizer.size, 150)
+        sizer.record(150, 3.0)
+        self.assertEqual(sizer.size, 112)
+        sizer.record_packet_error()
+        self.assertEqual(sizer.size, 56)
+
+    def test_packet_error_retries_with_smaller_statements(self):
+        """Test a packet error splits the statement instead of failing the load."""
+        packet_error = MYSQLError(errno=errorcode.ER_NET_PACKET_TOO_LARGE)
+        self.mock_cursor.execute.side_effect = [packet_error, None, None, None]
+        repo = RoomRepository(self.mock_connector, "multi_row")
+        repo.execute_batch_insertion(iter([{"id": 1, "name": "Room A"}, {"id": 2, "name": "Room B"}]))
+
+        sent = [c.args[1] for c in self.mock_cursor.execute.call_args_list[:-1]]
+        self.assertEqual(sent, [[1, "Room A", 2, "Room B"], [1, "Room A"], [2, "Room B"]])
+        self.assertEqual(self.mock_cursor.execute.call_args.args[0], SQLQueries.BUMP_DATA_VERSION)
+
+    def test_packet_error_with_lost_connection_is_not_retried(self):
+        """Test a packet refused together with the connection fails instead of retrying on the dead cursor."""
+        connected = [True]
+
+        def refuse(statement, params):
+            connected[0] = False
+            raise MYSQLError(errno=errorcode.ER_NET_PACKET_TOO_LARGE)
+
+        self.mock_cursor.execute.side_effect = refuse
+        self.mock_connector.db_is_connected.side_effect = lambda: connected[0]
+        repo = RoomRepository(self.mock_connector, "multi_row")
+
+        with self.assertRaises(MYSQLError) as raised:
+            repo.execute_batch_insertion(iter([{"id": 1, "name": "Room A"}, {"id": 2, "name": "Room B"}]))
+
+        self.assertEqual(raised.exception.errno, errorcode.ER_NET_PACKET_TOO_LARGE)
+        self.assertEqual(self.mock_cursor.execute.call_count, 1)
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Basic tests for pooled connections and sharded inserts."""
+
+    @patch('src.app.database.database_connector.mysql.connector.connect')
+    def test_pooled_connector_leases_connections(self, mock_connect):
+        """Test pooled mode leases spare connections, takes them back and closes every one on disconnect."""
+        mock_connect.side_effect = lambda **parameters: Mock()
+        connector = MySQLConnector(pool_size=3)
+        connector.connect()
+
+        with connector.lease() as leased:
+            self.assertIsNot(leased, connector)
+            self.assertIsNot(leased.connection, connector.connection)
+            self.assertTrue(leased.db_is_connected())
+            leased_connection = leased.connection
+
+        self.assertEqual(mock_connect.call_count, 3)
+        leased_connection.close.assert_not_called()
+        self.assertEqual(connector.pool.qsize(), 2)
+
+        connections = [connector.connection, *connector.pool.queue]
+        connector.disconnect()
+        for connection in connections:
+            connection.close.assert_called_once()
+
+    def test_pool_size_is_limited_up_front(self):
+        """Test a pool larger than the limit is refused before any connection opens."""
+        with patch('src.app.database.database_connector.mysql.connector.connect') as mock_connect:
+            with self.assertRaisesRegex(ValueError, "at most 32"):
+                MySQLConnector(pool_size=40)
+        mock_connect.assert_not_called()
+
+    def test_lease_without_pool_raises(self):
+        """Test leasing requires a pooled connector."""
+        with self.assertRaises(ConnectionError):
+            with MySQLConnector().lease():
+                pass
+
+    def test_load_session_tunes_and_restores_session(self):
+        """Test a load session turns autocommit off, commits per group and restores the session."""
+        connector = MySQLConnector()
+        connector.connection = Mock()
+        connector.connection.is_connected.return_value = True
+        cursor = connector.connection.cursor.return_value
+        cursor.fetchone.return_value = (1, "REPEATABLE-READ")
+
+        with connector.load_session(commit_batches=2, commit_seconds=60):
+            self.assertFalse(connector.connection.autocommit)
+            for _ in range(5):
+                connector.batch_sent()
+
+        self.assertTrue(connector.connection.autocommit)
+        self.assertEqual(connector.connection.commit.call_count, 4)
+        self.assertEqual(cursor.execute.call_args_list[-1].args, (SQLQueries.SET_LOAD_SESSION, (1, "REPEATABLE-READ")))
+
+        with self.assertRaises(RuntimeError):
+            with connector.load_session():
+                raise RuntimeError("insert failed")
+        connector.connection.rollback.assert_called_once()
+        self.assertFalse(connector.in_load_session())
+
+    def test_prepared_statements_are_cached_per_connection(self):
+        """Test prepared mode prepares each query once, binds named parameters and releases handles."""
+        connector = MySQLConnector(prepared=True)
+        connector.connection = Mock()
+        connector.connection.is_connected.return_value = True
+        prepared = []
+
+        def cursor(**options):
+            handle = Mock(with_rows=True)
+            handle.fetchall.return_value = []
+            handle.fetchone.return_value = ("token",)
+            prepared.append((options, handle))
+            return handle
+
+        connector.connection.cursor.side_effect = cursor
+        report = ReportingService(connector, as_of=date(2024, 1, 1))
+        for _ in range(2):
+            report.run_all(concurrent=False)
+            self.assertEqual(read_data_version(connector), "token")
+
+        self.assertEqual(len(prepared), len(ReportingService._report_queries) + 1)
+        self.assertTrue(all(options["prepared"] for options, _ in prepared))
+        params = {"as_of": "2024-01-01", "top_n": ApplicationConfig.REPORT_TOP_N,
+                  "first_room": ApplicationConfig.REPORT_FIRST_ROOM_ID,
+                  "last_room": ApplicationConfig.REPORT_LAST_ROOM_ID}
+        for statement in connector._statements._statements.values():
+            first, second = statement.cursor.execute.call_args_list
+            self.assertIs(first.args[0], second.args[0])
+            self.assertNotIn("%(", first.args[0])
+            if first.args[1] is not None:
+                self.assertEqual(first.args[1], tuple(params[name] for name in statement.names))
+        # the version row was read with fetchone, so the rest of its result is drained on close
+        self.assertEqual(prepared[-1][1].fetchall.call_count, 2)
+
+        connector.disconnect()
+        for _, handle in prepared:
+            handle.close.assert_called_once()
+
+    def test_sharded_inserter_splits_items_by_key_block(self):
+        """Test every item reaches exactly one worker, in key blocks."""
+        received = {}
+        lock = threading.Lock()
+        connector = Mock()
+
+        @contextmanager
+        def lease():
+            yield Mock()
+
+        def factory(leased):
+            repo = Mock()
+
+            def insert_batch(items):
+                items = list(items)
+                with lock:
+                    received[threading.current_thread().name] = items
+            repo.insert_batch.side_effect = insert_batch
+            return repo
+
+        connector.lease.side_effect = lease
+        items = [{"id": i} for i in range(5000)]
+        ShardedInserter(connector, factory, workers=2).insert_batch(iter(items))
+
+        self.assertEqual(len(received), 2)
+        all_ids = sorted(item["id"] for shard in received.values() for item in shard)
+        self.assertEqual(all_ids, list(range(5000)))
+        for shard in received.values():
+            self.assertEqual(len({item["id"] // 1000 % 2 for item in shard}), 1)
+
+    def test_sharded_inserter_raises_worker_error(self):
+        """Test a failing worker aborts the sharded insert."""
+        connector = Mock()
+
+        @contextmanager
+        def lease():
+            yield Mock()
+
+        def factory(leased):
+            repo = Mock()
+            repo.insert_batch.side_effect = RuntimeError("insert failed")
+            return repo
+
+        connector.lease.side_effect = lease
+        with self.assertRaises(RuntimeError):
+            ShardedInserter(connector, factory, workers=2).insert_batch(iter([{"id": i} for i in range(10)]))
+
+
+    def test_failing_shard_stops_and_rolls_back_its_siblings(self):
+        """Test the other shards fail instead of committing, and the first failure is the one raised."""
+        connector = Mock()
+        session_errors = []
+
+        @contextmanager
+        def load_session():
+            try:
+                yield
+            except BaseException as error:
+                session_errors.append(type(error).__name__)
+                raise
+
+        @contextmanager
+        def lease():
+            leased = Mock()
+            leased.load_session.side_effect = load_session
+            yield leased
+
+        def insert_batch(items):
+            shard = threading.current_thread()
+            if shard.name.endswith("-0"):
+                raise RuntimeError("insert failed")
+            for _ in items:
+                shard.stop_event.wait()
+
+        def factory(leased):
+            return Mock(insert_batch=Mock(side_effect=insert_batch))
+
+        connector.lease.side_effect = lease
+        with self.assertRaisesRegex(RuntimeError, "insert failed"):
+            ShardedInserter(connector, factory, workers=2, load_session=True).insert_batch(
+                iter([{"id": i} for i in range(20000)])
+            )
+
+        self.assertEqual(sorted(session_errors), ["RuntimeError", "_ShardAborted"])
+
+    def test_parallel_inserts_refuse_room_stats(self):
+        """Test RoomStats maintenance, which needs a single writer, is refused with several insert workers."""
+        connector = Mock()
+        connector.queries = SQLQueries
+        with patch.object(ApplicationConfig, "STUDENT_INSERT_WORKERS", 4), \
+                patch.object(ApplicationConfig, "MAINTAIN_ROOM_STATS", True):
+            with self.assertRaises(ValueError):
+                application._check_backend_features(connector)
+
+class TestReportingService(unittest.TestCase):
+    """Basic tests for running and deriving reports."""
+
+    def setUp(self):
+        self.summary = [
+            {"room_id": 1, "name": "Room A", "students_count": 2, "avg_age": Decimal("20.5000"),
+             "min_age": 20, "max_age": 21, "sex_count": 2},
+            {"room_id": 2, "name": "Room B", "students_count": 0, "avg_age": None,
+             "min_age": None, "max_age": None, "sex_count": 0},
+            {"room_id": 3, "name": "Room C", "students_count": 3, "avg_age": Decimal("12.0000"),
+             "min_age": 5, "max_age": 30, "sex_count": 1},
+        ]
+
+    def test_derive_reports_matches_report_shapes(self):
+        """Test every report is derived from the single-scan summary."""
+        reports = ReportingService.derive_reports(self.summary)
+
+        self.assertEqual(reports["top_5_least_average_age_room"], [
+            {"room_id": 3, "name": "Room C", "avg_age": Decimal("12.0000")},
+            {"room_id": 1, "name": "Room A", "avg_age": Decimal("20.5000")},
+        ])
+        self.assertEqual(reports["rooms_with_different_sex"], [{"room_id": 1, "name": "Room A"}])
+        self.assertEqual([row["students_count"] for row in reports["rooms_with_students_count"]], [2, 0, 3])
+        self.assertEqual([row["age_diff"] for row in reports["top_5_rooms_with_largest_age_diff"]], [25, 1])
+
+    def test_report_queries_order_ties_by_room_id(self):
+        """Test every report query lists its rooms in a deterministic order."""
+        for name in SQLQueries.ROOM_RANGE_QUERIES:
+            with self.subTest(query=name):
+                order_by = getattr(SQLQueries, name).split("ORDER BY")[-1].split("LIMIT")[0]
+                self.assertTrue(order_by.strip().rstrip(";").endswith("Rooms.room_id"))
+
+    def test_run_all_without_pool_runs_queries_on_main_connection(self):
+        """Test run_all falls back to sequential queries without a pool."""
+        connector = Mock()
+        connector.pool = None
+        connector.get_cursor.return_value.fetchall.return_value = [{"room_id": 1}]
+
+        results = ReportingService(connector).run_all()
+
+        self.assertEqual(set(results), set(ReportingService._report_queries))
+        self.assertEqual(connector.get_cursor.return_value.execute.call_count, 4)
+        connector.lease.assert_not_called()
+
+    def test_stream_report_fetches_in_chunks_and_drains_on_close(self):
+        """Test streamed reports use an unbuffered cursor and read it to the end when abandoned."""
+        connector = Mock()
+        cursor = connector.get_cursor.return_value
+        cursor.fetchmany.side_effect = [[{"room_id": 1}, {"room_id": 2}], [{"room_id": 3}], []]
+
+        rows = ReportingService(connector).stream_report("rooms_with_students_count", fetch_size=2)
+        self.assertEqual(next(rows), {"room_id": 1})
+        rows.close()
+
+        connector.get_cursor.assert_called_once_with(dictionary=True, buffered=False)
+        cursor.fetchmany.assert_called_once_with(2)
+        cursor.fetchall.assert_called_once()
+        cursor.close.assert_called_once()
+
+    def test_run_all_concurrent_uses_leased_connections(self):
+        """Test concurrent run_all runs each query on a pooled connection."""
+        connector = Mock()
+        leased_connectors = []
+
+        @contextmanager
+        def lease():
+            leased = Mock()
+            leased.get_cursor.return_value.fetchall.return_value = []
+            leased_connectors.append(leased)
+            yield leased
+
+        connector.lease.side_effect = lease
+        results = ReportingService(connector).run_all(concurrent=True)
+
+        self.assertEqual(len(results), 4)
+        self.assertEqual(len(leased_connectors), 4)
+        connector.get_cursor.assert_not_called()
+
+
+class TestRoomStats(unittest.TestCase):
+    """Basic tests for incremental room statistics."""
+
+    def setUp(self):
+        self.mock_connector = Mock()
+        self.mock_cursor = Mock()
+        self.mock_connector.get_cursor.return_value = self.mock_cursor
+        self.mock_connector.db_is_connected.return_value = True
+
+    def test_to_days_matches_mysql(self):
+        """Test day numbers match MySQL TO_DAYS()."""
+        self.assertEqual(to_days(date(2007, 10, 7)), 733321)
+
+    def test_apply_moves_student_between_rooms(self):
+        """Test a moved student is subtracted from the old room and added to the new one."""
+        students = [{"id": 1, "name": "John Doe", "birthday": "1995-05-15T00:00:00.000000", "sex": "M", "room": 2}]
+        previous = {1: (date(1995, 5, 15), "M", 1)}
+
+        RoomStatsMaintainer(self.mock_connector).apply(students, previous)
+
+        rows = self.mock_cursor.executemany.call_args.args[1]
+        days = to_days(date(1995, 5, 15))
+        self.assertEqual(sorted(rows), [
+            (1, -1, None, None, -days, -1, 0),
+            (2, 1, date(1995, 5, 15), date(1995, 5, 15), days, 1, 0),
+        ])
+        self.assertEqual(self.mock_cursor.execute.call_args.args[1], [1])
+
+    def test_apply_skips_unchanged_students(self):
+        """Test re-upserting identical students does not touch RoomStats."""
+        students = [{"id": 1, "name": "John Doe", "birthday": "1995-05-15", "sex": "M", "room": 1}]
+        previous = {1: (date(1995, 5, 15), "M", 1)}
+
+        RoomStatsMaintainer(self.mock_connector).apply(students, previous)
+
+        self.mock_connector.get_cursor.assert_not_called()
+
+    def _transactional_connector(self):
+        connector = MySQLConnector()
+        connector.connection = Mock()
+        connector.connection.is_connected.return_value = True
+        return connector
+
+    def test_student_repository_updates_stats_per_chunk(self):
+        """Test stats are captured before and applied after each upserted chunk, one transaction per chunk."""
+        connector = self._transactional_connector()
+        repo = StudentRepository(connector, maintain_room_stats=True)
+        repo.room_stats = Mock()
+        repo.room_stats.capture.return_value = {}
+        repo.room_stats.capture.side_effect = lambda chunk: self.assertFalse(connector.connection.autocommit)
+        students = [{"id": i, "name": "John Doe", "birthday": "1995-05-15", "sex": "M", "room": 1} for i in range(3)]
+
+        with patch('src.app.database.database_operations.ApplicationConfig.ROOM_STATS_CHUNK_SIZE', 2):
+            repo.insert_batch(iter(students))
+
+        self.assertEqual(repo.room_stats.capture.call_count, 2)
+        self.assertEqual(repo.room_stats.apply.call_args.args[0], students[2:])
+        self.assertEqual(connector.connection.commit.call_count, 2)
+        self.assertTrue(connector.connection.autocommit)
+
+    def test_failed_chunk_rolls_back_without_applying_stats(self):
+        """Test a chunk whose upsert fails leaves neither its students nor its stats behind."""
+        connector = self._transactional_connector()
+        repo = StudentRepository(connector, maintain_room_stats=True)
+        repo.room_stats = Mock()
+        repo.room_stats.capture.return_value = {}
+        students = [{"id": 1, "name": "John Doe", "birthday": "1995-05-15", "sex": "M", "room": 1}]
+
+        with patch.object(repo, 'execute_batch_insertion', side_effect=RuntimeError("insert failed")):
+            with self.assertRaises(RuntimeError):
+                repo.insert_batch(iter(students))
+
+        repo.room_stats.apply.assert_not_called()
+        connector.connection.rollback.assert_called_once()
+        connector.connection.commit.assert_not_called()
+        self.assertTrue(connector.connection.autocommit)
+
+    def test_chunk_in_load_session_is_not_split_by_a_commit(self):
+        """Test a load session defers a commit falling due inside a chunk to its end."""
+        connector = self._transactional_connector()
+        connector.connection.cursor.return_value.fetchone.return_value = (1, "REPEATABLE-READ")
+        commits = []
+
+        with connector.load_session(commit_batches=1, commit_seconds=60):
+            with connector.transaction():
+                connector.batch_sent()
+                connector.batch_sent()
+                commits.append(connector.connection.commit.call_count)
+            commits.append(connector.connection.commit.call_count)
+
+        self.assertEqual(commits, [0, 1])
+
+    def test_capture_locks_the_students_it_reads(self):
+        """Test captured students are read with a locking read."""
+        self.mock_cursor.fetchall.return_value = [(1, date(1995, 5, 15), "M", 1)]
+
+        previous = RoomStatsMaintainer(self.mock_connector).capture([{"id": 1}])
+
+        self.assertEqual(previous, {1: (date(1995, 5, 15), "M", 1)})
+        self.assertTrue(self.mock_cursor.execute.call_args.args[0].endswith("FOR UPDATE"))
+
+
+class TestOfflineReportEngine(unittest.TestCase):
+    """Basic tests for the in-process report engine."""
+
+    def setUp(self):
+        self.rooms = [{"id": 1, "name": "Room A"}, {"id": 2, "name": "Room B"}, {"id": 3, "name": "Room C"}]
+        self.students = [
+            {"id": 1, "name": "A", "birthday": "2000-03-01T00:00:00.000000", "sex": "M", "room": 1},
+            {"id": 2, "name": "B", "birthday": "2001-03-02T00:00:00.000000", "sex": "F", "room": 1},
+            {"id": 3, "name": "C", "birthday": "1950-01-01T00:00:00.000000", "sex": "F", "room": 3},
+            {"id": 4, "name": "D", "birthday": "1990-01-01T00:00:00.000000", "sex": "M", "room": 99},
+        ]
+
+    def test_reports_follow_sql_semantics(self):
+        """Test ages, averages and per-room aggregates use the SQL definitions."""
+        engine = OfflineReportEngine(as_of=date(2025, 3, 1), chunk_size=2)
+        engine.load_rooms(iter(self.rooms))
+        engine.load_students(iter(self.students))
+        reports = engine.run_all()
+
+        self.assertEqual(reports["rooms_with_students_count"], [
+            {"room_id": 1, "name": "Room A", "students_count": 2},
+            {"room_id": 2, "name": "Room B", "students_count": 0},
+            {"room_id": 3, "name": "Room C", "students_count": 1},
+        ])
+        self.assertEqual(reports["top_5_least_average_age_room"], [
+            {"room_id": 1, "name": "Room A", "avg_age": Decimal("23.5000")},
+            {"room_id": 3, "name": "Room C", "avg_age": Decimal("75.0000")},
+        ])
+        self.assertEqual(reports["rooms_with_different_sex"], [{"room_id": 1, "name": "Room A"}])
+        self.assertEqual(reports["top_5_rooms_with_largest_age_diff"][0]["age_diff"], 2)
+
+    def test_repeated_student_ids_keep_last_row(self):
+        """Test a repeated id counts once, with its last row, like the SQL upserts leave it."""
+        moved = {**self.students[0], "sex": "F", "room": 3, "id": 2 ** 31 - 1}
+        engine = OfflineReportEngine(as_of=date(2025, 3, 1), chunk_size=2)
+        engine.load_rooms(iter(self.rooms))
+        engine.load_students(iter(self.students[:3] + [{**moved, "room": 1}, moved]))
+        reports = engine.run_all()
+
+        self.assertEqual(
+            [row["students_count"] for row in reports["rooms_with_students_count"]], [2, 0, 2]
+        )
+        self.assertEqual(reports["rooms_with_different_sex"], [{"room_id": 1, "name": "Room A"}])
+
+    def test_repeated_oldest_student_refreshes_room_extremes(self):
+        """Test replacing a room's oldest student recomputes its age difference from the rows left."""
+        younger = {**self.students[0], "birthday": "2001-01-01T00:00:00.000000"}
+        engine = OfflineReportEngine(as_of=date(2025, 3, 1), chunk_size=2)
+        engine.load_rooms(iter(self.rooms))
+        engine.load_students(iter(self.students[:3] + [younger]))
+
+        room = engine.summary()[0]
+        self.assertEqual((room["students_count"], room["min_age"], room["max_age"]), (2, 23, 24))
+
+    def test_unique_ids_fold_without_a_ledger(self):
+        """Test unique_ids gives the same reports while keeping no per-student rows."""
+        reports = {}
+        for unique_ids in (False, True):
+            engine = OfflineReportEngine(as_of=date(2025, 3, 1), chunk_size=2, unique_ids=unique_ids)
+            engine.load_rooms(iter(self.rooms))
+            engine.load_students(iter(self.students))
+            reports[unique_ids] = engine.run_all()
+            self.assertEqual(bool(engine._runs), not unique_ids)
+
+        self.assertEqual(reports[True], reports[False])
+
+    def test_sample_data_matches_committed_sql_output(self):
+        """Test the sample files reproduce the committed MySQL reports."""
+        engine = OfflineReportEngine(as_of=date(2025, 8, 18))
+        engine.load_rooms(DataFilter.filter_data(FileLoader.load_file_data(ApplicationConfig.ROOM_FILE_PATH), "room"))
+        engine.load_students(
+            DataFilter.filter_data(FileLoader.load_file_data(ApplicationConfig.STUDENT_FILE_PATH), "student")
+        )
+        reports = engine.run_all()
+
+        def render(rows):
+            return "".join(", ".join(f"{k}: {v}" for k, v in row.items()) + "\n" for row in rows)
+
+        for name in ("top_5_least_average_age_room", "rooms_with_students_count", "rooms_with_different_sex"):
+            with open(ApplicationConfig.REPORT_OUTPUTS[name]) as f:
+                self.assertEqual(render(reports[name]), f.read())
+
+        # rooms tied on age_diff may come back in any order from MySQL
+        age_diffs = {row["room_id"]: row["max_age"] - row["min_age"] for row in engine.summary() if row["students_count"]}
+        with open(ApplicationConfig.TOP_5_LARGEST_AGE_DIFF_OUTPUT) as f:
+            for line in f:
+                room_id, _, age_diff = (field.split(": ")[1] for field in line.strip().split(", "))
+                self.assertEqual(age_diffs[int(room_id)], int(age_diff))
+
+
+class FakeSchemaCursor:
+    """Cursor double that tracks Students indexes and foreign keys through ALTER TABLE."""
+
+    def __init__(self, indexes, foreign_keys, orphans=0):
+        self.indexes = set(indexes)
+        self.foreign_keys = set(foreign_keys)
+        self.orphans = orphans
+        self.executed = []
+        self._result = []
+
+    def execute(self, query, params=None):
+        self.executed.append((query, params))
+        if query == SQLQueries.SELECT_SECONDARY_INDEXES:
+            self._result = [(name,) for name in sorted(self.indexes)]
+        elif query == SQLQueries.SELECT_FOREIGN_KEYS:
+            self._result = [(name,) for name in sorted(self.foreign_keys)]
+        elif query == SQLQueries.SELECT_BULK_CHECKS:
+            self._result = [(1, 1)]
+        elif query == SQLQueries.COUNT_ORPHAN_STUDENTS:
+            self._result = [(self.orphans,)]
+        elif query.startswith("ALTER TABLE"):
+            for clause in query.split(" ", 3)[3].split(", "):
+                words = clause.split(" ")
+                if clause.startswith("DROP FOREIGN KEY"):
+                    self.foreign_keys.discard(words[3])
+                elif clause.startswith("DROP INDEX"):
+                    self.indexes.discard(words[2])
+                elif clause.startswith("ADD INDEX"):
+                    self.indexes.add(words[2])
+                elif clause.startswith("ADD CONSTRAINT"):
+                    self.foreign_keys.add(words[2])
+
+    def fetchall(self):
+        return self._result
+
+    def fetchone(self):
+        return self._result[0]
+
+    def close(self):
+        pass
+
+
+class TestSchemaManager(unittest.TestCase):
+    """Basic tests for declared indexes and bulk load mode."""
+
+    def setUp(self):
+        self.mock_connector = Mock()
+        self.mock_connector.queries = SQLQueries
+        self.mock_connector.db_is_connected.return_value = True
+
+    def test_create_schema_builds_missing_indexes_in_one_alter(self):
+        """Test the declared Students indexes are created together."""
+        cursor = FakeSchemaCursor(indexes={"fk_students_room"}, foreign_keys={"fk_students_room"})
+        self.mock_connector.get_cursor.return_value = cursor
+
+        SchemaManager(self.mock_connector).create_room_student_schema()
+
+        alters = [query for query, _ in cursor.executed if query.startswith("ALTER TABLE")]
+        self.assertEqual(len(alters), 1)
+        self.assertTrue(set(SQLQueries.STUDENT_INDEXES) <= cursor.indexes)
+
+    def test_bulk_load_mode_drops_and_rebuilds_indexes(self):
+        """Test indexes and checks are off during the load and restored afterwards."""
+        cursor = FakeSchemaCursor(indexes=set(SQLQueries.STUDENT_INDEXES), foreign_keys={"Students_ibfk_1"})
+        self.mock_connector.get_cursor.return_value = cursor
+
+        with SchemaManager(self.mock_connector).bulk_load_mode():
+            self.assertEqual(cursor.indexes, set())
+            self.assertEqual(cursor.foreign_keys, set())
+            self.assertIn((SQLQueries.SET_BULK_CHECKS, (0, 0)), cursor.executed)
+
+        self.assertEqual(cursor.indexes, set(SQLQueries.STUDENT_INDEXES))
+        self.assertEqual(cursor.foreign_keys, {"fk_students_room"})
+        self.assertIn((SQLQueries.SET_BULK_CHECKS, (1, 1)), cursor.executed)
+        self.assertEqual(cursor.executed[-1][0], SQLQueries.COUNT_ORPHAN_STUDENTS)
+
+    def test_bulk_load_mode_reports_orphans(self):
+        """Test orphan students fail the integrity check after the load."""
+        cursor = FakeSchemaCursor(indexes=set(), foreign_keys=set(), orphans=3)
+        self.mock_connector.get_cursor.return_value = cursor
+
+        with self.assertRaises(IntegrityError):
+            with SchemaManager(self.mock_connector).bulk_load_mode():
+                pass
+
+
+class TestFileLoader(unittest.TestCase):
+    """Basic tests for whole-file and streamed JSON parsing."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "students.json")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write('[{"id": 1, "name": "Zoë", "weight": 61.5}, {"id": 2, "name": "Li"}]')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_whole_file_matches_stream(self):
+        """Test both parse modes yield the same items, numbers included."""
+        with self.assertLogs("src.app.services.file_loader", level="INFO") as logs:
+            whole = list(FileLoader.load_file_data(self.path, whole_file_threshold=1 << 20))
+            streamed = list(FileLoader.load_file_data(self.path, whole_file_threshold=0, backend="python"))
+
+        self.assertIn("json.loads", logs.output[0])
+        self.assertIn("ijson python backend", logs.output[1])
+        self.assertEqual(whole, streamed)
+        self.assertEqual(whole[0], {"id": 1, "name": "Zoë", "weight": Decimal("61.5")})
+
+    def test_invalid_json_raises_value_error(self):
+        """Test malformed JSON is reported as ValueError in both modes."""
+        with open(self.path, "w") as f:
+            f.write('[{"id": 1,')
+        for threshold in (0, 1 << 20):
+            with self.assertRaises(ValueError):
+                list(FileLoader.load_file_data(self.path, whole_file_threshold=threshold))
+
+    def test_unknown_backend_raises(self):
+        """Test requesting a backend that does not exist fails clearly."""
+        with self.assertRaises(ImportError):
+            FileLoader.backend_name("no_such_backend")
+
+
+class TestNdjsonLoader(unittest.TestCase):
+    """Basic tests for parallel NDJSON parsing and the array converter."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        _, self.students_path = generate(self.temp_dir.name, students=500, rooms=20, invalid_ratio=0.2)
+        self.ndjson_path = os.path.join(self.temp_dir.name, "students.ndjson")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_ranges_end_on_newlines(self):
+        """Test ranges cover the file and split it only after newlines."""
+        NdjsonLoader.convert(self.students_path, self.ndjson_path)
+        ranges = split_ranges(self.ndjson_path, 1000)
+        with open(self.ndjson_path, "rb") as f:
+            content = f.read()
+
+        self.assertGreater(len(ranges), 1)
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], len(content))
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start)
+            self.assertEqual(content[end - 1:end], b"\n")
+
+    def test_parallel_load_matches_array_filter(self):
+        """Test the converted file yields the items the array path keeps, in order."""
+        self.assertEqual(NdjsonLoader.convert(self.students_path, self.ndjson_path), 500)
+        fields = ("id", "name", "room", "birthday", "sex")
+        expected = [
+            {field: item[field] for field in fields}
+            for item in DataFilter.filter_data(FileLoader.load_file_data(self.students_path), "student")
+        ]
+
+        for workers in (1, 2):
+            loaded = list(NdjsonLoader.load_valid(self.ndjson_path, "student", workers=workers, range_size=4096))
+            self.assertEqual(loaded, expected)
+
+    def test_ranges_in_flight_stay_within_pending_bytes(self):
+        """Test ranges shrink with the worker count so the parent holds a bounded amount of parsed input."""
+        NdjsonLoader.convert(self.students_path, self.ndjson_path)
+        ranges = []
+
+        def recording(path, range_size):
+            ranges.extend(split_ranges(path, range_size))
+            return ranges
+
+        with patch('src.app.services.ndjson_loader.ApplicationConfig.NDJSON_PENDING_BYTES', 16 * 1024), \
+                patch('src.app.services.ndjson_loader.split_ranges', side_effect=recording) as split:
+            loaded = list(NdjsonLoader.load_valid(self.ndjson_path, "student", workers=1))
+
+        self.assertEqual(split.call_args.args[1], 8 * 1024)
+        self.assertGreater(len(ranges), 1)
+        self.assertEqual(len(loaded), len(list(NdjsonLoader.load_valid(self.ndjson_path, "student", workers=1))))
+
+    def test_parsing_processes_are_not_forked(self):
+        """Test the parsing pool starts its processes without forking the multithreaded loader."""
+        NdjsonLoader.convert(self.students_path, self.ndjson_path)
+        with patch('src.app.services.ndjson_loader.ProcessPoolExecutor', wraps=ProcessPoolExecutor) as pool:
+            list(NdjsonLoader.load_valid(self.ndjson_path, "student", workers=2, range_size=4096))
+
+        self.assertNotEqual(pool.call_args.kwargs["mp_context"].get_start_method(), "fork")
+
+    def test_invalid_line_raises_value_error(self):
+        """Test a malformed line is reported with its offset."""
+        with open(self.ndjson_path, "w") as f:
+            f.write('{"id": 1, "name": "Room #1"}\n{"id": 2,\n')
+        with self.assertRaisesRegex(ValueError, "byte 29"):
+            list(NdjsonLoader.load_valid(self.ndjson_path, "room", workers=1))
+
+
+class TestResultWriter(unittest.TestCase):
+    """Basic tests for streamed, atomic report output."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.rows = [{"room_id": i, "name": f"Room, {i}", "avg_age": Decimal("20.5000")} for i in range(5)]
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.temp_dir.name, name)
+
+    def test_output_mode_follows_umask(self):
+        """Test a written report gets the mode open() would give it under the process umask."""
+        previous = os.umask(0o027)
+        try:
+            path = self._path("report.txt")
+            ResultWriter.write(path, iter(self.rows))
+        finally:
+            os.umask(previous)
+
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o640)
+
+    def test_formats_from_row_iterator(self):
+        """Test txt, csv and jsonl output rendered from an iterator in several chunks."""
+        expected = {
+            "txt": "room_id: 0, name: Room, 0, avg_age: 20.5000\n",
+            "csv": 'room_id,name,avg_age\n0,"Room, 0",20.5000\n',
+            "jsonl": '{"room_id": 0, "name": "Room, 0", "avg_age": "20.5000"}\n',
+        }
+        for output_format, head in expected.items():
+            path = self._path(f"report.{output_format}")
+            written = ResultWriter.write(path, iter(self.rows), output_format, chunk_rows=2)
+
+            with open(path) as f:
+                content = f.read()
+            self.assertEqual(written, 5)
+            self.assertTrue(content.startswith(head))
+            self.assertEqual(content.count("\n"), 6 if output_format == "csv" else 5)
+
+    def test_gzip_output(self):
+        """Test compressed output decompresses to the plain rendering."""
+        path = output_path(self._path("report.txt"), "jsonl", compress=True)
+        ResultWriter.write(path, self.rows, "jsonl", compress=True)
+
+        self.assertTrue(path.endswith("report.jsonl.gz"))
+        with gzip.open(path, "rt") as f:
+            self.assertEqual([json.loads(line)["room_id"] for line in f], list(range(5)))
+
+    def test_failed_write_keeps_previous_file(self):
+        """Test a write that fails midway leaves the old file and no temporary file."""
+        path = self._path("report.txt")
+        ResultWriter.write_txt(path, self.rows[:1])
+
+        def failing_rows():
+            yield self.rows[0]
+            raise RuntimeError("query failed")
+
+        with self.assertRaises(RuntimeError):
+            ResultWriter.write(path, failing_rows(), chunk_rows=1)
+
+        with open(path) as f:
+            self.assertEqual(f.read(), "room_id: 0, name: Room, 0, avg_age: 20.5000\n")
+        self.assertEqual(os.listdir(self.temp_dir.name), ["report.txt"])
+
+
+class TestBenchmarkDataGenerator(unittest.TestCase):
+    """Basic tests for the synthetic benchmark data."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _generate(self, name, **kwargs):
+        contents = []
+        for path in generate(os.path.join(self.temp_dir.name, name), students=500, rooms=20, **kwargs):
+            with open(path, "rb") as f:
+                contents.append(f.read())
+        return contents
+
+    def test_same_seed_same_files(self):
+        """Test generation is deterministic for a seed and differs across seeds."""
+        self.assertEqual(self._generate("a", seed=3), self._generate("b", seed=3))
+        self.assertNotEqual(self._generate("c", seed=3)[1], self._generate("d", seed=4)[1])
+
+    def test_invalid_rows_fail_validation(self):
+        """Test generated invalid students are all rejected and valid ones all kept."""
+        rooms_path, students_path = generate(self.temp_dir.name, students=500, rooms=20, invalid_ratio=0.2)
+        rejections = Counter()
+        kept = list(DataFilter.filter_data(FileLoader.load_file_data(students_path), "student", rejections))
+
+        self.assertEqual(len(kept) + rejections.total(), 500)
+        self.assertTrue(50 < rejections.total() < 150)
+        self.assertEqual(len(+rejections), 5)
+        self.assertTrue(all(0 <= student["room"] < 20 for student in kept))
+
+
+class TestMetrics(unittest.TestCase):
+    """Basic tests for the metrics registry and its exports."""
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        self.rows = self.registry.counter("rows_total", "Rows seen", ("table",))
+        self.latency = self.registry.histogram("latency_seconds", "Latency", ("table",), buckets=(0.1, 1.0))
+
+    def test_prometheus_text_format(self):
+        """Test counters and cumulative histogram buckets render in the text format."""
+        self.rows.inc(3, table="Rooms")
+        self.rows.inc(2, table="Rooms")
+        for seconds in (0.05, 0.5, 5.0):
+            self.latency.observe(seconds, table='Stu"dents')
+
+        text = self.registry.to_prometheus()
+
+        self.assertIn("# TYPE python_sql_rows_total counter\npython_sql_rows_total{table=\"Rooms\"} 5\n", text)
+        self.assertIn('python_sql_latency_seconds_bucket{table="Stu\\"dents",le="1"} 2', text)
+        self.assertIn('python_sql_latency_seconds_bucket{table="Stu\\"dents",le="+Inf"} 3', text)
+        self.assertIn('python_sql_latency_seconds_count{table="Stu\\"dents"} 3', text)
+
+    def test_json_dump_and_label_check(self):
+        """Test the JSON dump holds every sample and wrong labels are refused."""
+        self.rows.inc(table="Rooms")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "metrics.json")
+            self.registry.dump_json(path)
+            with open(path) as f:
+                dumped = json.load(f)
+
+        self.assertEqual(dumped["python_sql_rows_total"]["samples"], [{"labels": {"table": "Rooms"}, "value": 1}])
+        with self.assertRaises(ValueError):
+            self.rows.inc(room="Rooms")
+
+    def test_filter_records_rejections(self):
+        """Test DataFilter reports rejected items per reason to the shared registry."""
+        registry.reset()
+        items = [{"id": 1, "name": "Room A"}, {"id": -1, "name": "Room B"}, {"id": 2}]
+        list(DataFilter.filter_data(iter(items), "room"))
+
+        samples = {tuple(labels.values()): value for labels, value in ROWS_REJECTED.samples()}
+        self.assertEqual(samples, {("room", "invalid_id"): 1, ("room", "incomplete"): 1})
+
+
+class TestIngestPipeline(unittest.TestCase):
+    """Basic tests for the pipelined ingestion stages."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.rooms_path = os.path.join(self.temp_dir.name, "rooms.json")
+        self.students_path = os.path.join(self.temp_dir.name, "students.json")
+        with open(self.rooms_path, "w") as f:
+            json.dump([{"id": i, "name": f"Room #{i}"} for i in range(5)] + [{"id": -1, "name": ""}], f)
+        with open(self.students_path, "w") as f:
+            json.dump([
+                {"id": i, "name": "John Doe", "birthday": "1995-05-15", "sex": "M", "room": i % 5}
+                for i in range(50)
+            ], f)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_pipeline_inserts_valid_items_in_order(self):
+        """Test pipeline hands valid items to each repository, rooms first."""
+        calls = []
+        rooms_repo, students_repo = Mock(), Mock()
+        rooms_repo.insert_batch.side_effect = lambda items: calls.append(("rooms", list(items)))
+        students_repo.insert_batch.side_effect = lambda items: calls.append(("students", list(items)))
+
+        pipeline = IngestPipeline(queue_size=2, chunk_size=3)
+        pipeline.add_source(self.rooms_path, "room", rooms_repo)
+        pipeline.add_source(self.students_path, "student", students_repo)
+        pipeline.run()
+
+        self.assertEqual([name for name, _ in calls], ["rooms", "students"])
+        self.assertEqual([room["id"] for room in calls[0][1]], list(range(5)))
+        self.assertEqual([student["id"] for student in calls[1][1]], list(range(50)))
+
+    def test_pipeline_propagates_stage_errors(self):
+        """Test a failing load stage surfaces in the inserting thread."""
+        rooms_repo = Mock()
+        rooms_repo.insert_batch.side_effect = lambda items: list(items)
+
+        pipeline = IngestPipeline()
+        pipeline.add_source(os.path.join(self.temp_dir.name, "missing.json"), "room", rooms_repo)
+
+        with self.assertRaises(FileNotFoundError):
+            pipeline.run()
+
+
+class TestIngestManifest(unittest.TestCase):
+    """Basic tests for change detection between loads."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.state_dir = os.path.join(self.temp_dir.name, "state")
+        self.path = os.path.join(self.temp_dir.name, "rooms.json")
+        self.rooms = [{"id": i, "name": f"Room #{i}"} for i in range(5)]
+        self._write(self.rooms)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _write(self, rooms):
+        with open(self.path, "w") as f:
+            json.dump(rooms, f)
+
+    def _load(self, commit=True):
+        manifest = IngestManifest(self.path, state_dir=self.state_dir)
+        try:
+            unchanged = manifest.is_unchanged()
+            changed = [] if unchanged else list(manifest.changed_records(self.rooms))
+            if commit:
+                manifest.commit()
+            else:
+                manifest.rollback()
+            return unchanged, changed
+        finally:
+            manifest.close()
+
+    def test_unchanged_file_is_skipped(self):
+        """Test a committed file is reported unchanged on the next load."""
+        self.assertEqual(self._load(), (False, self.rooms))
+        self.assertEqual(self._load(), (True, []))
+
+    def test_only_changed_records_pass(self):
+        """Test only edited or new records are passed on after a change."""
+        self._load()
+        self.rooms[2] = {"id": 2, "name": "Renamed"}
+        self.rooms.append({"id": 9, "name": "Room #9"})
+        self._write(self.rooms)
+
+        self.assertEqual(self._load(), (False, [self.rooms[2], self.rooms[5]]))
+
+    def test_rollback_forgets_staged_hashes(self):
+        """Test records from a failed load are offered again."""
+        self._load(commit=False)
+        self.assertEqual(self._load(), (False, self.rooms))
+
+
+    def test_orphan_is_offered_again_once_its_room_arrives(self):
+        """Test a student held back for a missing room gets no hash and is stored on a later load."""
+        students_path = os.path.join(self.temp_dir.name, "students.json")
+        students = [
+            {"id": 1, "name": "A", "birthday": "2000-01-01", "sex": "M", "room": 1},
+            {"id": 2, "name": "B", "birthday": "2000-01-01", "sex": "F", "room": 2},
+        ]
+        with open(students_path, "w") as f:
+            json.dump(students, f)
+
+        connector = SQLiteConnector()
+        connector.connect()
+        try:
+            SchemaManager(connector).create_room_student_schema()
+            rooms_repo = RoomRepository(connector, room_ids=RoomIdSet())
+            passed = []
+            for rooms in ([{"id": 1, "name": "Room #1"}], [{"id": 2, "name": "Room #2"}]):
+                rooms_repo.insert_batch(iter(rooms))
+                manifest = IngestManifest(students_path, state_dir=self.state_dir)
+                try:
+                    self.assertFalse(manifest.is_unchanged())
+                    changed = list(manifest.changed_records(students))
+                    passed.append([student["id"] for student in changed])
+                    repository = StudentRepository(connector, room_ids=rooms_repo.room_ids, on_unstored=manifest.forget)
+                    repository.insert_batch(iter(changed))
+                    manifest.commit()
+                finally:
+                    manifest.close()
+
+            self.assertEqual(passed, [[1, 2], [2]])
+            cursor = connector.get_cursor()
+            cursor.execute("SELECT student_id FROM Students ORDER BY student_id")
+            self.assertEqual(cursor.fetchall(), [(1,), (2,)])
+        finally:
+            connector.disconnect()
+
+class FakeAioCursor:
+    """Records statements like a mysql.connector.aio cursor; every query returns `rows`."""
+
+    def __init__(self, connection, rows):
+        self.connection = connection
+        self.rows = rows
+
+    async def execute(self, query, params=None):
+        self.connection.statements.append((query, params))
+        await asyncio.sleep(0)
+
+    async def executemany(self, query, rows):
+        self.connection.statements.append((query, list(rows)))
+        await asyncio.sleep(0)
+
+    async def fetchone(self):
+        return ("version-1",)
+
+    async def fetchall(self):
+        return list(self.rows)
+
+    async def close(self):
+        pass
+
+
+class FakeAioConnection:
+    """Stands in for a mysql.connector.aio connection."""
+
+    def __init__(self, rows=()):
+        self.rows = rows
+        self.statements = []
+
+    async def is_connected(self):
+        return True
+
+    async def cursor(self, dictionary=False, buffered=None):
+        return FakeAioCursor(self, self.rows)
+
+    async def close(self):
+        pass
+
+
+def fake_async_connector(spare_connections: int, rows=()) -> AsyncMySQLConnector:
+    """Async connector over fake connections, with a pool of the given spare connections."""
+    connector = AsyncMySQLConnector()
+    connector.connection = FakeAioConnection(rows)
+    if spare_connections:
+        connector.pool = asyncio.Queue()
+        for _ in range(spare_connections):
+            connector.pool.put_nowait(FakeAioConnection(rows))
+    return connector
+
+
+class TestAsyncOperations(unittest.TestCase):
+    """Basic tests for asyncio inserts and reports."""
+
+    def test_sharded_insert_keeps_key_blocks_together(self):
+        """Test every student is inserted once, each key block over a single leased connection."""
+        connector = fake_async_connector(spare_connections=3)
+        spares = list(connector.pool._queue)
+        repository = StudentRepository(connector)
+        repository.batch_size = 2
+        students = [
+            {"id": i, "name": f"S{i}", "birthday": "2000-01-01", "sex": "M", "room": 1}
+            for i in range(0, 6000, 500)
+        ]
+
+        asyncio.run(AsyncRepository(repository, concurrency=3).insert_batch(iter(students)))
+
+        inserted = {}
+        for index, connection in enumerate(spares):
+            for _, rows in connection.statements:
+                for row in rows:
+                    inserted[row[0]] = index
+        self.assertEqual(sorted(inserted), [student["id"] for student in students])
+        for key in inserted:
+            self.assertEqual(inserted[key], inserted[key - key % 1000])
+        self.assertEqual(len(connector.pool._queue), 3)
+        self.assertEqual([query for query, _ in connector.connection.statements], [SQLQueries.BUMP_DATA_VERSION])
+
+    def test_packet_error_with_lost_connection_is_not_retried(self):
+        """Test the asyncio path gives up on a packet the server refused together with the connection."""
+        connector = fake_async_connector(0)
+        connector._max_allowed_packet = 4 * 1024 * 1024
+        connection = connector.connection
+        repository = RoomRepository(connector, ApplicationConfig.MULTI_ROW_STRATEGY)
+        rooms = [{"id": 1, "name": "Room A"}, {"id": 2, "name": "Room B"}]
+
+        execute = FakeAioCursor.execute
+
+        async def refuse(cursor, query, params=None):
+            await execute(cursor, query, params)
+            if query.lstrip().startswith("INSERT"):
+                connection.is_connected = AsyncMock(return_value=False)
+                raise MYSQLError(errno=errorcode.ER_NET_PACKET_TOO_LARGE)
+
+        with patch.object(FakeAioCursor, 'execute', refuse):
+            with self.assertRaises(MYSQLError) as raised:
+                asyncio.run(AsyncRepository(repository).insert_batch(iter(rooms)))
+
+        self.assertEqual(raised.exception.errno, errorcode.ER_NET_PACKET_TOO_LARGE)
+        self.assertEqual(sum(query.lstrip().startswith("INSERT") for query, _ in connection.statements), 1)
+
+    def test_items_are_parsed_off_the_event_loop(self):
+        """Test the item iterable is advanced on worker threads, with and without insert shards."""
+        for spare_connections in (0, 3):
+            with self.subTest(spare_connections=spare_connections):
+                connector = fake_async_connector(spare_connections)
+                threads = set()
+
+                def rooms():
+                    for i in range(2500):
+                        threads.add(threading.current_thread())
+                        yield {"id": i, "name": f"Room #{i}"}
+
+                asyncio.run(AsyncRepository(RoomRepository(connector), concurrency=3).insert_batch(rooms()))
+
+                self.assertNotIn(threading.main_thread(), threads)
+
+    def test_async_flow_refuses_unsupported_features(self):
+        """Test features the asyncio flow does not implement are refused before the schema is touched."""
+        for feature in ("INCREMENTAL_INGEST", "LOAD_SESSION", "DEFERRED_INDEX_BUILD", "STREAM_REPORTS",
+                        "PAGED_REPORTS", "EXPORT_METRICS", "MAINTAIN_ROOM_STATS"):
+            with self.subTest(feature=feature), patch.object(ApplicationConfig, feature, True), \
+                    patch.object(application, "_create_schema") as create_schema:
+                with self.assertRaisesRegex(ValueError, feature):
+                    asyncio.run(application.start_application_async())
+                create_schema.assert_not_called()
+
+    @patch.object(application, "SchemaManager")
+    @patch.object(application, "MySQLConnector")
+    def test_async_flow_drops_room_stats(self, mock_connector_class, mock_schema_manager_class):
+        """Test the asyncio flow, which inserts students without RoomStats maintenance, drops the table."""
+        with patch.object(ApplicationConfig, "ORPHAN_STUDENT_CHECK", False):
+            application._create_schema()
+
+        mock_schema_manager_class.return_value.drop_room_stats_schema.assert_called_once()
+        mock_connector_class.return_value.disconnect.assert_called_once()
+
+    def test_bulk_load_is_refused(self):
+        """Test strategies the asyncio connector lacks are refused up front."""
+        repository = RoomRepository(fake_async_connector(0), ApplicationConfig.BULK_LOAD_STRATEGY)
+        with self.assertRaises(ValueError):
+            AsyncRepository(repository)
+
+    def test_reports_run_concurrently_and_cache(self):
+        """Test run_all sends each report on a leased connection and replays cached rows."""
+        rows = [{"room_id": 1, "name": "Room #1"}]
+        connector = fake_async_connector(spare_connections=4, rows=rows)
+        spares = list(connector.pool._queue)
+        service = AsyncReportingService(connector, as_of=date(2024, 1, 1), cache=ReportCache())
+
+        first = asyncio.run(service.run_all())
+        second = asyncio.run(service.run_all())
+
+        self.assertEqual(set(first), set(ReportingService._report_queries))
+        self.assertEqual(first, second)
+        self.assertTrue(all(result == rows for result in first.values()))
+        self.assertEqual(sum(len(connection.statements) for connection in spares), 4)
+        self.assertEqual(asyncio.run(service.rooms_with_students_count()), rows)
+
+
+class TestEmbeddedBackends(unittest.TestCase):
+    """Basic tests for the in-process database backends."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.rooms_path, self.students_path = generate(self.temp_dir.name, students=300, rooms=20, seed=5)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _load(self, connector, rows: bool = False, strategy: str = ApplicationConfig.EXECUTEMANY_STRATEGY):
+        connector.connect()
+        SchemaManager(connector).create_room_student_schema()
+        if rows:
+            room_ids = RoomIdSet()
+            RoomRepository(connector, strategy, room_ids=room_ids).insert_rows(
+                load_valid_rows(self.rooms_path, ApplicationConfig.ROOM_STRATEGY, RoomRepository.row_fields)
+            )
+            StudentRepository(connector, strategy, room_ids=room_ids).insert_rows(
+                load_valid_rows(self.students_path, ApplicationConfig.STUDENT_STRATEGY, StudentRepository.row_fields)
+            )
+            return
+
+        RoomRepository(connector, strategy).insert_batch(
+            DataFilter.filter_data(FileLoader.load_file_data(self.rooms_path), ApplicationConfig.ROOM_STRATEGY)
+        )
+        StudentRepository(connector, strategy).insert_batch(
+            DataFilter.filter_data(FileLoader.load_file_data(self.students_path), ApplicationConfig.STUDENT_STRATEGY)
+        )
+
+    def _expected_reports(self):
+        engine = OfflineReportEngine(as_of=date.today())
+        engine.load_rooms(FileLoader.load_file_data(self.rooms_path))
+        engine.load_students(FileLoader.load_file_data(self.students_path))
+        return engine.run_all()
+
+    def _assert_reports_match(self, connector, rows: bool = False,
+                              strategy: str = ApplicationConfig.EXECUTEMANY_STRATEGY):
+        self._load(connector, rows, strategy)
+        try:
+            expected = self._expected_reports()
+            for single_scan in (False, True):
+                reports = ReportingService(connector).run_all(single_scan=single_scan)
+                self.assertEqual(reports.keys(), expected.keys())
+                for name, rows in expected.items():
+                    # embedded engines return avg_age as a float rather than a Decimal
+                    self.assertEqual(
+                        [{**row, "avg_age": float(row["avg_age"])} if "avg_age" in row else row
+                         for row in rows],
+                        reports[name]
+                    )
+        finally:
+            connector.disconnect()
+
+    def test_sqlite_reports_match_offline_engine(self):
+        """Test SQLite ingests the input and computes the same reports as MySQL would."""
+        self._assert_reports_match(SQLiteConnector())
+
+    def test_sqlite_reports_match_after_row_fast_path(self):
+        """Test rows inserted by the fast path, birthdays as dates, give the same reports."""
+        self._assert_reports_match(SQLiteConnector(), rows=True)
+
+    @unittest.skipUnless(importlib.util.find_spec("duckdb"), "duckdb is not installed")
+    def test_duckdb_reports_match_offline_engine(self):
+        """Test DuckDB ingests the input and computes the same reports as MySQL would."""
+        self._assert_reports_match(DuckDBConnector())
+
+    @unittest.skipUnless(importlib.util.find_spec("duckdb"), "duckdb is not installed")
+    def test_duckdb_bulk_load_reports_match_offline_engine(self):
+        """Test DuckDB's staged bulk load, from items and from rows, gives the same reports."""
+        for rows in (False, True):
+            with self.subTest(rows=rows):
+                self._assert_reports_match(DuckDBConnector(), rows, ApplicationConfig.BULK_LOAD_STRATEGY)
+
+    @unittest.skipUnless(importlib.util.find_spec("duckdb"), "duckdb is not installed")
+    def test_duckdb_bulk_load_keeps_last_duplicate(self):
+        """Test staged CSV keeps separators, quotes and newlines and repeated ids upsert like executemany."""
+        connector = DuckDBConnector()
+        connector.connect()
+        try:
+            SchemaManager(connector).create_room_student_schema()
+            RoomRepository(connector, ApplicationConfig.BULK_LOAD_STRATEGY).insert_batch(iter([
+                {"id": 1, "name": 'Room "A", first'}, {"id": 2, "name": "Room\nB"}, {"id": 1, "name": "Room\tA"},
+            ]))
+            StudentRepository(connector, ApplicationConfig.BULK_LOAD_STRATEGY).insert_batch(iter([
+                {"id": 7, "name": "S", "birthday": "2000-01-01T00:00:00", "sex": "M", "room": 1},
+                {"id": 7, "name": "S", "birthday": "2001-02-03T00:00:00", "sex": "F", "room": 2},
+            ]))
+            cursor = connector.get_cursor()
+            cursor.execute("SELECT room_id, name FROM Rooms ORDER BY room_id")
+            self.assertEqual(cursor.fetchall(), [(1, "Room\tA"), (2, "Room\nB")])
+            cursor.execute("SELECT student_id, birthday, sex, room_id FROM Students")
+            self.assertEqual(cursor.fetchall(), [(7, date(2001, 2, 3), "F", 2)])
+            cursor.close()
+        finally:
+            connector.disconnect()
+
+    def _assert_pages_match(self, connector):
+        self._load(connector)
+        try:
+            full = ReportingService(connector).run_all(concurrent=False)
+            ranged = ReportingService(connector, top_n=3, first_room=5, last_room=14)
+            for name in ReportingService._page_queries:
+                pages = list(ReportingService(connector).report_pages(name, page_size=3))
+                self.assertTrue(all(len(page) <= 3 for page in pages))
+                self.assertEqual([row for page in pages for row in page], full[name])
+                self.assertEqual(
+                    list(ranged.paged_report(name, page_size=4)),
+                    [row for row in full[name] if 5 <= row["room_id"] <= 14]
+                )
+
+            reports = ranged.run_all(concurrent=False)
+            self.assertEqual(reports, ranged.run_all(single_scan=True))
+            top = reports[ApplicationConfig.TOP_5_LEAST_AVG_AGE_REPORT]
+            self.assertEqual(len(top), 3)
+            self.assertTrue(all(5 <= row["room_id"] <= 14 for row in top))
+            with self.assertRaises(ValueError):
+                next(ranged.report_pages(ApplicationConfig.TOP_5_LEAST_AVG_AGE_REPORT))
+        finally:
+            connector.disconnect()
+
+    def test_sqlite_report_pages_match_full_listing(self):
+        """Test keyset pages add up to the listing and reports honour top_n and the room range."""
+        self._assert_pages_match(SQLiteConnector())
+
+    @unittest.skipUnless(importlib.util.find_spec("duckdb"), "duckdb is not installed")
+    def test_duckdb_report_pages_match_full_listing(self):
+        """Test DuckDB pages and filters reports like SQLite."""
+        self._assert_pages_match(DuckDBConnector())
+
+    def test_stored_room_ids_are_loaded(self):
+        """Test the ids of rooms already stored are read back for the orphan check."""
+        connector = SQLiteConnector()
+        connector.connect()
+        try:
+            SchemaManager(connector).create_room_student_schema()
+            RoomRepository(connector).insert_batch(iter([{"id": 3, "name": "Room C"}, {"id": 8, "name": "Room H"}]))
+            room_ids = RoomIdSet()
+            RoomRepository(connector, room_ids=room_ids).load_room_ids()
+            self.assertIn(3, room_ids)
+            self.assertIn(8, room_ids)
+            self.assertNotIn(5, room_ids)
+        finally:
+            connector.disconnect()
+
+    def test_sqlite_enforces_room_foreign_key(self):
+        """Test students referencing a missing room are refused like on MySQL."""
+        connector = SQLiteConnector()
+        connector.connect()
+        try:
+            SchemaManager(connector).create_room_student_schema()
+            student = {"id": 1, "name": "A", "birthday": "2000-01-01T00:00:00", "sex": "M", "room": 7}
+            with self.assertRaises(sqlite3.IntegrityError):
+                StudentRepository(connector).insert_batch(iter([student]))
+        finally:
+            connector.disconnect()
+
+    def test_refused_rows_are_bisected_into_reject_file(self):
+        """Test batch recovery stores every good row and rejects only the bad ones, with the error."""
+        connector = SQLiteConnector()
+        connector.connect()
+        try:
+            SchemaManager(connector).create_room_student_schema()
+            RoomRepository(connector).insert_batch(iter([{"id": 1, "name": "Room #1"}]))
+            students = [
+                {"id": i, "name": f"S{i}", "birthday": "2000-01-01T00:00:00", "sex": "M",
+                 "room": 7 if i in (5, 17, 33) else 1}
+                for i in range(40)
+            ]
+            reject_path = os.path.join(self.temp_dir.name, "rejects.jsonl")
+            unstored = []
+            repository = StudentRepository(connector, reject_path=reject_path, on_unstored=unstored.extend)
+            repository.batch_size = 16
+            with patch.object(repository, "_execute_many_timed", wraps=repository._execute_many_timed) as send:
+                repository.insert_batch(iter(students))
+
+            cursor = connector.get_cursor()
+            cursor.execute("SELECT COUNT(*) FROM Students")
+            self.assertEqual(cursor.fetchone(), (37,))
+            with open(reject_path) as f:
+                rejects = [json.loads(line) for line in f]
+            self.assertEqual([reject["row"][0] for reject in rejects], [5, 17, 33])
+            self.assertIn("FOREIGN KEY", rejects[0]["error"])
+            self.assertEqual(unstored, [5, 17, 33])
+            self.assertLess(send.call_count, 40)
+        finally:
+            connector.disconnect()
+
+    def test_load_session_commits_groups_and_rolls_back_the_rest(self):
+        """Test batches commit in groups and a failure undoes only the open group."""
+        connector = SQLiteConnector()
+        connector.connect()
+        try:
+            SchemaManager(connector).create_room_student_schema()
+            repository = RoomRepository(connector)
+            repository.batch_size = 2
+
+            def rooms():
+                for i in range(6):
+                    yield {"id": i, "name": f"Room #{i}"}
+                raise ValueError("export truncated")
+
+            with self.assertRaises(ValueError):
+                with connector.load_session(commit_batches=2, commit_seconds=60) as session:
+                    repository.insert_batch(rooms())
+
+            self.assertEqual(session.commits, 1)
+            self.assertFalse(connector.in_load_session())
+            cursor = connector.get_cursor()
+            cursor.execute("SELECT COUNT(*) FROM Rooms")
+            self.assertEqual(cursor.fetchone(), (4,))
+        finally:
+            connector.disconnect()
+
+    def test_create_connector_selects_backend(self):
+        """Test the factory builds the named backend and refuses unknown ones."""
+        self.assertIsInstance(create_connector("sqlite"), SQLiteConnector)
+        self.assertIsInstance(create_connector("mysql"), MySQLConnector)
+        with self.assertRaises(ValueError):
+            create_connector("oracle")
+
+
+class TestReportCache(unittest.TestCase):
+    """Basic tests for the versioned report result cache."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.temp_dir.name, "cache")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_memory_layer_evicts_least_recently_used(self):
+        """Test the memory layer keeps the most recently used entries."""
+        cache = ReportCache(max_entries=2)
+        cache.put("a", [1])
+        cache.put("b", [2])
+        cache.lookup("a")
+        cache.put("c", [3])
+
+        self.assertEqual(cache.lookup("a"), ([1], "memory"))
+        self.assertEqual(cache.lookup("b"), (None, "miss"))
+        self.assertEqual(len(cache), 2)
+
+    def test_disk_layer_outlives_instance_and_is_size_bounded(self):
+        """Test results are found on disk by a new cache and old files are evicted."""
+        ReportCache(self.cache_dir).put("a", [{"avg_age": Decimal("1.5")}])
+        self.assertEqual(ReportCache(self.cache_dir).lookup("a"), ([{"avg_age": Decimal("1.5")}], "disk"))
+
+        cache = ReportCache(self.cache_dir, max_disk_bytes=1)
+        cache.put("b", [2])
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_key_changes_with_data_version_and_as_of(self):
+        """Test every input of the key separates results."""
+        key = cache_key("mysql", "SELECT 1", {"as_of": "2024-01-01"}, date(2024, 1, 1), "v1")
+        self.assertEqual(key, cache_key("mysql", "SELECT 1", {"as_of": "2024-01-01"}, date(2024, 1, 1), "v1"))
+        self.assertNotEqual(key, cache_key("mysql", "SELECT 1", {"as_of": "2024-01-01"}, date(2024, 1, 1), "v2"))
+        self.assertNotEqual(key, cache_key("mysql", "SELECT 1", {"as_of": "2024-01-02"}, date(2024, 1, 2), "v1"))
+
+    def test_inserts_invalidate_cached_reports(self):
+        """Test reports come from the cache until an insert replaces the data version."""
+        connector = SQLiteConnector()
+        connector.connect()
+        try:
+            SchemaManager(connector).create_room_student_schema()
+            RoomRepository(connector).insert_batch(iter([{"id": 1, "name": "Room A"}]))
+            service = ReportingService(connector, as_of=date(2024, 6, 1), cache=ReportCache())
+            count = ApplicationConfig.ROOMS_WITH_STUDENTS_COUNT_REPORT
+
+            first = service.run_all()
+            with patch("src.app.services.reporting_service._fetch_all") as fetch_all:
+                self.assertEqual(service.run_all(), first)
+                fetch_all.assert_not_called()
+
+            RoomRepository(connector).insert_batch(iter([{"id": 2, "name": "Room B"}]))
+            self.assertEqual(len(service.run_all()[count]), 2)
+        finally:
+            connector.disconnect()
+
+
+class TestQueryPlans(unittest.TestCase):
+    """Basic tests for query plan baselines and regression checks."""
+
+    def setUp(self):
+        self.connector = SQLiteConnector()
+        self.connector.connect()
+        SchemaManager(self.connector).create_room_student_schema()
+
+    def tearDown(self):
+        self.connector.disconnect()
+
+    def test_mysql_plan_is_normalized(self):
+        """Test table accesses and filesort are read from EXPLAIN FORMAT=JSON."""
+        explained = json.dumps({"query_block": {"ordering_operation": {
+            "using_filesort": True,
+            "nested_loop": [
+                {"table": {"table_name": "Rooms", "access_type": "ALL", "rows_examined_per_scan": 10}},
+                {"table": {"table_name": "Students", "access_type": "ref", "key": "idx_students_room_birthday",
+                           "rows_examined_per_scan": 3}},
+            ],
+        }}})
+
+        plan = query_plans._mysql_plan(explained)
+
+        self.assertTrue(plan["filesort"])
+        self.assertEqual([(t["table"], t["access"], t["key"], t["rows"]) for t in plan["tables"]], [
+            ("Rooms", "ALL", None, 10), ("Students", "ref", "idx_students_room_birthday", 3)
+        ])
+
+    def test_unchanged_plans_have_no_regressions(self):
+        """Test a baseline checks clean against the schema it was captured on."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "plans.json")
+            query_plans.save_baseline(path, query_plans.capture_plans(self.connector, date(2024, 1, 1)))
+
+            self.assertEqual(query_plans.check_plans(self.connector, path), [])
+
+    def test_dropped_index_is_flagged(self):
+        """Test losing the Students indexes shows up as lost index use and full scans."""
+        baseline = query_plans.capture_plans(self.connector)
+        cursor = self.connector.get_cursor()
+        for name in SQLQueries.STUDENT_INDEXES:
+            cursor.execute(f"DROP INDEX {name}")
+        cursor.close()
+
+        regressions = query_plans.compare_plans(baseline, query_plans.capture_plans(self.connector))
+        kinds = {(r.query, r.table, r.kind) for r in regressions}
+
+        self.assertIn(("ROOMS_WITH_DIFFERENT_SEX", "Students", query_plans.LOST_INDEX_REGRESSION), kinds)
+        self.assertIn(("COUNT_ORPHAN_STUDENTS", "Students", query_plans.FULL_SCAN_REGRESSION), kinds)
+
+    def test_baseline_of_other_dialect_is_refused(self):
+        """Test plans of different engines are not compared."""
+        captured = query_plans.capture_plans(self.connector)
+        with self.assertRaises(ValueError):
+            query_plans.compare_plans({**captured, "dialect": "mysql"}, captured)
+
+
+class TestBenchmarks(unittest.TestCase):
+    """Smoke tests keeping the benchmarks in step with the connector interface."""
+
+    def test_stages_run_on_stand_in_backend(self):
+        """Test the default stage benchmark loads and reports a few hundred rows."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output = os.path.join(temp_dir, "stages.json")
+            stages.main(["--students", "300", "--rooms", "20", "--output", output])
+            with open(output) as f:
+                results = json.load(f)
+
+        timed = {stage["stage"] for stage in results["stages"]}
+        self.assertTrue({"insert.room", "insert.student"} <= timed)
+        self.assertTrue({f"report.{name}" for name in ReportingService._report_queries} <= timed)
+
 
 if __name__ == '__main__':
     unittest.main()